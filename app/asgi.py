@@ -3,6 +3,11 @@ ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Além do Django (HTTP), atende o WebSocket de ingestão de leituras
+(/ws/leituras/, ver rfid/ws_leituras.py). Servir com:
+
+    uvicorn app.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +18,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# importado após o setup do Django (usa models)
+from rfid.ws_leituras import ROTA as ROTA_WS_LEITURAS, ws_leituras  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        if scope["path"] == ROTA_WS_LEITURAS:
+            return await ws_leituras(scope, receive, send)
+        await receive()
+        return await send({"type": "websocket.close", "code": 4404})
+    return await django_application(scope, receive, send)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 import dj_database_url
@@ -150,6 +151,111 @@ from_email="rfidflow.app@gmail.com"
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
 
+# RFID – ingestão de leituras
+# Máximo de itens aceitos por POST em /api/leituras/lote/
+RFID_LOTE_MAX_ITENS = int(os.environ.get("RFID_LOTE_MAX_ITENS", "1000"))
+# "orm" (LeituraRFID.save) ou "sql" (motor set-based de rfid/utils/ingestao_sql.py)
+RFID_INGESTAO_MOTOR = os.environ.get("RFID_INGESTAO_MOTOR", "orm").strip().lower()
+# Modo assíncrono ("fast ack"): a API só grava em LeituraPendente e responde 202;
+# o comando `processar_leituras_pendentes` aplica as leituras em lote.
+RFID_INGESTAO_ASSINCRONA = os.environ.get(
+    "RFID_INGESTAO_ASSINCRONA", "False"
+).strip().lower() in ("1", "true", "yes")
+# Tentativas por leitura pendente antes de ela parar na fila (falha persistente)
+RFID_FILA_MAX_TENTATIVAS = int(os.environ.get("RFID_FILA_MAX_TENTATIVAS", "3"))
+# Cache tag_rfid -> botijao_id (por processo) usado na ingestão
+RFID_CACHE_TAGS_MAX = int(os.environ.get("RFID_CACHE_TAGS_MAX", "50000"))
+RFID_CACHE_TAGS_TTL = int(os.environ.get("RFID_CACHE_TAGS_TTL", "300"))
+# Rejeita (400) textos-lixo conhecidos ("Última leitura:", BOM, barra de URL...)
+RFID_REJEITAR_TAGS_LIXO = os.environ.get(
+    "RFID_REJEITAR_TAGS_LIXO", "False"
+).strip().lower() in ("1", "true", "yes")
+# Deduplicação: repetições da mesma tag no mesmo leitor/antena dentro da janela
+# são descartadas (0 = desligado). Backend "memoria" (por processo) ou "cache"
+# (cache do Django, compartilhado entre workers).
+RFID_DEDUP_JANELA_SEGUNDOS = float(os.environ.get("RFID_DEDUP_JANELA_SEGUNDOS", "0"))
+RFID_DEDUP_BACKEND = os.environ.get("RFID_DEDUP_BACKEND", "memoria").strip().lower()
+RFID_DEDUP_MAX_CHAVES = int(os.environ.get("RFID_DEDUP_MAX_CHAVES", "50000"))
+RFID_DEDUP_CACHE_ALIAS = os.environ.get("RFID_DEDUP_CACHE_ALIAS", "default")
+# Chaves de idempotência (seq/id_cliente) lembradas por processo
+RFID_IDEMPOTENCIA_MAX_CHAVES = int(
+    os.environ.get("RFID_IDEMPOTENCIA_MAX_CHAVES", "100000")
+)
+# WebSocket de ingestão (/ws/leituras/, servido por app.asgi)
+RFID_WS_TOKEN = os.environ.get("RFID_WS_TOKEN", "").strip()
+RFID_WS_LOTE_MS = int(os.environ.get("RFID_WS_LOTE_MS", "10"))
+# Snapshot do dashboard (rfid/utils/cache_dashboard.py): recalculado no máximo a
+# cada RFID_DASHBOARD_CACHE_SEGUNDOS quando chegam leituras (0 = sem cache) e
+# descartado após RFID_DASHBOARD_CACHE_MAX_SEGUNDOS. Backend "arquivo"
+# (compartilhado entre os workers da máquina) ou "memoria" (por processo).
+RFID_DASHBOARD_CACHE_SEGUNDOS = float(
+    os.environ.get("RFID_DASHBOARD_CACHE_SEGUNDOS", "5")
+)
+RFID_DASHBOARD_CACHE_MAX_SEGUNDOS = int(
+    os.environ.get("RFID_DASHBOARD_CACHE_MAX_SEGUNDOS", "60")
+)
+RFID_DASHBOARD_CACHE_BACKEND = (
+    os.environ.get("RFID_DASHBOARD_CACHE_BACKEND", "arquivo").strip().lower()
+)
+RFID_DASHBOARD_CACHE_DIR = os.environ.get(
+    "RFID_DASHBOARD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "rfid-dashboard")
+)
+
+# Server-Sent Events (/api/eventos/dashboard/, /api/barcode/eventos/; só no ASGI):
+# frequência de checagem de leituras novas e duração máxima de cada conexão
+RFID_SSE_INTERVALO_MS = int(os.environ.get("RFID_SSE_INTERVALO_MS", "1000"))
+RFID_SSE_MAX_SEGUNDOS = int(os.environ.get("RFID_SSE_MAX_SEGUNDOS", "300"))
+
+# Listas paginadas por cursor (relatórios, históricos, /api/relatorios/): linhas
+# por página e até quantas linhas o total é contado exato (acima: estimativa)
+RFID_PAGINA_TAMANHO = int(os.environ.get("RFID_PAGINA_TAMANHO", "100"))
+RFID_CONTAGEM_LIMITE = int(os.environ.get("RFID_CONTAGEM_LIMITE", "10000"))
+# Exportação XLSX em streaming (rfid/utils/planilhas.py): linhas buscadas por
+# lote do cursor (server-side no PostgreSQL)
+RFID_EXPORTACAO_CHUNK = int(os.environ.get("RFID_EXPORTACAO_CHUNK", "2000"))
+# Relatórios em segundo plano (rfid/utils/tarefas_relatorio.py): exportação e
+# e-mail viram TarefaRelatorio, processadas por `processar_tarefas_relatorio`.
+# Web e worker precisam enxergar o mesmo MEDIA_ROOT (ou storage remoto).
+RFID_RELATORIOS_ASSINCRONOS = os.environ.get(
+    "RFID_RELATORIOS_ASSINCRONOS", "False"
+).strip().lower() in ("1", "true", "yes")
+RFID_RELATORIOS_MAX_TENTATIVAS = int(
+    os.environ.get("RFID_RELATORIOS_MAX_TENTATIVAS", "3")
+)
+RFID_RELATORIOS_BACKOFF_SEGUNDOS = float(
+    os.environ.get("RFID_RELATORIOS_BACKOFF_SEGUNDOS", "30")
+)
+RFID_RELATORIOS_TEMPO_LIMITE = int(
+    os.environ.get("RFID_RELATORIOS_TEMPO_LIMITE", "1800")
+)
+RFID_RELATORIOS_RETENCAO_DIAS = int(
+    os.environ.get("RFID_RELATORIOS_RETENCAO_DIAS", "7")
+)
+# Cache em disco dos arquivos de relatório (rfid/utils/cache_relatorios.py):
+# chave = filtros + formato + marca d'água dos dados; despejo LRU acima do
+# limite em MB (0 = sem cache)
+RFID_RELATORIOS_CACHE_MB = float(os.environ.get("RFID_RELATORIOS_CACHE_MB", "512"))
+RFID_RELATORIOS_CACHE_DIR = os.environ.get(
+    "RFID_RELATORIOS_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "rfid-relatorios"),
+)
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "dashboard": (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": RFID_DASHBOARD_CACHE_DIR,
+        }
+        if RFID_DASHBOARD_CACHE_BACKEND == "arquivo"
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "rfid-dashboard",
+        }
+    ),
+}
+
+
 # Login
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "dashboard"
@@ -1,7 +1,14 @@
 # rfid/admin.py — VERSÃO AJUSTADA E COMPATÍVEL
 from django.contrib import admin
 
-from .models import Botijao, LeituraRFID, LogAuditoria
+from .models import (
+    Botijao,
+    LeituraPendente,
+    LeituraRFID,
+    LogAuditoria,
+    ResumoLeituraDiaria,
+    TarefaRelatorio,
+)
 
 
 # ============================================================
@@ -41,6 +48,9 @@ class BotijaoAdmin(admin.ModelAdmin):
         "data_delecao",
         "deletado_por",
         "total_leituras",
+        "ultima_leitura_em",
+        "ultimo_leitor_id",
+        "status_requalificacao",
     ]
 
     fieldsets = (
@@ -77,7 +87,10 @@ class BotijaoAdmin(admin.ModelAdmin):
                 )
             },
         ),
-        ("Estatísticas", {"fields": ("total_leituras",)}),
+        (
+            "Estatísticas",
+            {"fields": ("total_leituras", "ultima_leitura_em", "ultimo_leitor_id")},
+        ),
         (
             "Soft Delete",
             {
@@ -111,6 +124,55 @@ class LeituraRFIDAdmin(admin.ModelAdmin):
     search_fields = ["botijao__tag_rfid", "operador"]
 
 
+# ============================================================
+# LEITURA PENDENTE (fila assíncrona)
+# ============================================================
+@admin.register(LeituraPendente)
+class LeituraPendenteAdmin(admin.ModelAdmin):
+    list_display = [
+        "tag_rfid",
+        "recebida_em",
+        "operador",
+        "leitor_id",
+        "antena",
+        "tentativas",
+    ]
+    list_filter = ["tentativas"]
+    search_fields = ["tag_rfid", "operador", "erro"]
+
+
+# ============================================================
+# RESUMO DIÁRIO DE LEITURAS
+# ============================================================
+@admin.register(ResumoLeituraDiaria)
+class ResumoLeituraDiariaAdmin(admin.ModelAdmin):
+    list_display = ["dia", "tipo", "operador", "leitor_id", "antena", "total"]
+    list_filter = ["tipo", "dia"]
+    search_fields = ["operador", "leitor_id"]
+
+
+# ============================================================
+# TAREFAS DE RELATÓRIO
+# ============================================================
+@admin.register(TarefaRelatorio)
+class TarefaRelatorioAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "tipo",
+        "status",
+        "usuario",
+        "formato",
+        "destinatario",
+        "tentativas",
+        "criada_em",
+        "duracao_geracao",
+        "duracao_envio",
+    ]
+    list_filter = ["tipo", "status", "formato"]
+    search_fields = ["destinatario", "usuario__username"]
+    readonly_fields = ["criada_em", "iniciada_em", "concluida_em"]
+
+
 # ============================================================
 # LOG DE AUDITORIA
 # ============================================================
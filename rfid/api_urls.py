@@ -6,4 +6,14 @@ urlpatterns = [
     path(
         "registrar-leitura/", views.api_registrar_leitura, name="api_registrar_leitura"
     ),
+    path(
+        "leituras/lote/",
+        views.api_registrar_leituras_lote,
+        name="api_registrar_leituras_lote",
+    ),
+    path(
+        "leituras/ndjson/",
+        views.api_registrar_leituras_ndjson,
+        name="api_registrar_leituras_ndjson",
+    ),
 ]
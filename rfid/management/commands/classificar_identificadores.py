@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rfid.models import Botijao, LeituraCodigoBarra
+from rfid.utils.identificadores import classificar_identificador
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche tipo_identificador (rfid/qr/barcode/lixo/outro) de botijões e "
+        "leituras de código de barras, em lotes por faixa de id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote", type=int, default=2000, help="Linhas por transação (padrão 2000)"
+        )
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Reclassifica todas as linhas (padrão: só as ainda não classificadas)",
+        )
+
+    def handle(self, *args, **options):
+        alvos = (
+            ("botijões", Botijao.all_objects, "tag_rfid"),
+            ("leituras de código de barras", LeituraCodigoBarra.objects, "codigo"),
+        )
+        for nome, manager, campo in alvos:
+            total = self._classificar(manager, campo, options["lote"], options["todos"])
+            self.stdout.write(self.style.SUCCESS(f"✅ {nome}: {total} classificados"))
+
+    def _classificar(self, manager, campo, tamanho, todos):
+        qs = manager.all() if todos else manager.filter(tipo_identificador__isnull=True)
+        ultimo_id = 0
+        total = 0
+
+        while True:
+            linhas = list(
+                qs.filter(pk__gt=ultimo_id)
+                .order_by("pk")
+                .values_list("pk", campo)[:tamanho]
+            )
+            if not linhas:
+                return total
+
+            # um UPDATE por tipo (no máximo 5 por lote)
+            por_tipo = defaultdict(list)
+            for pk, valor in linhas:
+                por_tipo[classificar_identificador(valor)].append(pk)
+
+            with transaction.atomic():
+                for tipo, ids in por_tipo.items():
+                    manager.filter(pk__in=ids).update(tipo_identificador=tipo)
+
+            ultimo_id = linhas[-1][0]
+            total += len(linhas)
+            self.stdout.write(f"lote: {len(linhas)} (até id {ultimo_id})")
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from rfid.models import Botijao, LeituraRFID
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche ultima_leitura_em/ultimo_leitor_id dos botijões a partir da "
+        "leitura RFID mais recente, em lotes por faixa de id (um UPDATE por lote)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=2000,
+            help="Botijões por transação (padrão 2000)",
+        )
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Recalcula todos os botijões (padrão: só os ainda sem última leitura)",
+        )
+
+    def handle(self, *args, **options):
+        qs = Botijao.all_objects.all()
+        if not options["todos"]:
+            qs = qs.filter(ultima_leitura_em__isnull=True)
+
+        # índice leitura_botijao_data_idx: uma descida por botijão
+        ultima = LeituraRFID.objects.filter(botijao=OuterRef("pk")).order_by(
+            "-data_hora", "-id"
+        )
+        ultimo_id = 0
+        total = 0
+
+        while True:
+            ids = list(
+                qs.filter(pk__gt=ultimo_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[: options["lote"]]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                Botijao.all_objects.filter(pk__in=ids).update(
+                    ultima_leitura_em=Subquery(ultima.values("data_hora")[:1]),
+                    ultimo_leitor_id=Subquery(ultima.values("leitor_id")[:1]),
+                )
+
+            ultimo_id = ids[-1]
+            total += len(ids)
+            self.stdout.write(f"lote: {len(ids)} (até id {ultimo_id})")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Última leitura preenchida: {total} botijões")
+        )
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rfid.utils.ingestao import estado_fila, processar_leituras_pendentes
+
+
+class Command(BaseCommand):
+    help = (
+        "Drena a fila de leituras pendentes (modo assíncrono) em lotes, "
+        "aplicando contador, ciclo de envasadoras e auditoria."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote", type=int, default=500, help="Leituras por transação (padrão 500)"
+        )
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="Fica em execução, aguardando novas leituras",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=1.0,
+            help="Espera (s) quando a fila está vazia no modo contínuo (padrão 1.0)",
+        )
+
+    def handle(self, *args, **options):
+        tamanho = options["lote"]
+        continuo = options["continuo"]
+        intervalo = options["intervalo"]
+
+        total = 0
+        while True:
+            stats = processar_leituras_pendentes(tamanho_lote=tamanho)
+            total += stats["processadas"]
+
+            if stats["processadas"] or stats["falhas"]:
+                fila = estado_fila()
+                self.stdout.write(
+                    f"lote: {stats['processadas']} processadas "
+                    f"({stats['erros']} erros, {stats['falhas']} falhas) "
+                    f"em {stats['duracao_segundos']:.3f}s | "
+                    f"lag {stats['lag_segundos']:.1f}s | "
+                    f"pendentes {fila['pendentes']} | "
+                    f"descartadas {fila['descartadas']}"
+                )
+                # lote cheio => provavelmente há mais; segue sem esperar
+                if stats["processadas"] + stats["falhas"] >= tamanho:
+                    continue
+
+            if not continuo:
+                break
+            time.sleep(intervalo)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} leituras processadas"))
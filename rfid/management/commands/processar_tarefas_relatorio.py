@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rfid.models import TarefaRelatorio
+from rfid.utils.tarefas_relatorio import limpar_antigas, processar_proxima
+
+# no modo contínuo, tarefas antigas são apagadas no máximo uma vez por hora
+LIMPEZA_SEGUNDOS = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa a fila de relatórios em segundo plano (exportações e envios "
+        "por e-mail), reservando cada tarefa com SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="Fica em execução, aguardando novas tarefas",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Espera (s) quando a fila está vazia no modo contínuo (padrão 2.0)",
+        )
+
+    def handle(self, *args, **options):
+        continuo = options["continuo"]
+        intervalo = options["intervalo"]
+
+        total = 0
+        ultima_limpeza = 0.0
+        while True:
+            if time.monotonic() - ultima_limpeza >= LIMPEZA_SEGUNDOS:
+                apagadas = limpar_antigas()
+                if apagadas:
+                    self.stdout.write(f"limpeza: {apagadas} tarefas antigas apagadas")
+                ultima_limpeza = time.monotonic()
+
+            tarefa = processar_proxima()
+            if tarefa is not None:
+                total += 1
+                self.stdout.write(
+                    f"tarefa #{tarefa.pk} ({tarefa.tipo}): {tarefa.status} | "
+                    f"tentativa {tarefa.tentativas} | "
+                    f"geração {tarefa.duracao_geracao or 0:.2f}s | "
+                    f"envio {tarefa.duracao_envio or 0:.2f}s | "
+                    f"pendentes {TarefaRelatorio.objects.filter(status=TarefaRelatorio.STATUS_PENDENTE).count()}"
+                )
+                continue
+
+            if not continuo:
+                break
+            time.sleep(intervalo)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} tarefas processadas"))
@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rfid.utils.requalificacao import recalcular_status
+
+
+def _data(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Data inválida: {valor} (use AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula status_requalificacao de todos os botijões a partir da data da "
+        "próxima requalificação (um UPDATE por faixa). Agende uma vez por dia, "
+        "logo após a meia-noite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hoje", type=_data, help="Data de referência (AAAA-MM-DD; padrão: hoje)"
+        )
+
+    def handle(self, *args, **options):
+        alterados = recalcular_status(options["hoje"])
+        for status, linhas in alterados.items():
+            self.stdout.write(f"{status}: {linhas}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Status de requalificação recalculado: "
+                f"{sum(alterados.values())} botijões alterados"
+            )
+        )
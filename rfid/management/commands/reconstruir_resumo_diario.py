@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rfid.utils.resumo_diario import reconstruir
+
+
+def _data(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Data inválida: {valor} (use AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o resumo diário de leituras (ResumoLeituraDiaria) a partir das "
+        "leituras RFID e de código de barras. Sem opções: ontem e hoje."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--inicio", type=_data, help="Primeiro dia (AAAA-MM-DD)")
+        parser.add_argument("--fim", type=_data, help="Último dia (AAAA-MM-DD)")
+        parser.add_argument(
+            "--todos", action="store_true", help="Recalcula todo o histórico"
+        )
+
+    def handle(self, *args, **options):
+        if options["todos"]:
+            inicio = fim = None
+        else:
+            hoje = timezone.localdate()
+            inicio = options["inicio"] or hoje - timedelta(days=1)
+            fim = options["fim"] or hoje
+            if inicio > fim:
+                raise CommandError("--inicio maior que --fim")
+
+        linhas = reconstruir(inicio, fim)
+        periodo = "todo o histórico" if inicio is None else f"{inicio} a {fim}"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Resumo diário recalculado ({periodo}): {linhas} linhas"
+            )
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:27
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0006_botijao_indice_distribuidora"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeituraPendente",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tag_rfid", models.CharField(max_length=200)),
+                ("operador", models.CharField(blank=True, max_length=100, null=True)),
+                ("observacao", models.TextField(blank=True, null=True)),
+                ("rssi", models.IntegerField(blank=True, null=True)),
+                ("antena", models.IntegerField(blank=True, null=True)),
+                ("leitor_id", models.CharField(blank=True, max_length=100, null=True)),
+                (
+                    "recebida_em",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "verbose_name": "Leitura Pendente",
+                "verbose_name_plural": "Leituras Pendentes",
+            },
+        ),
+        migrations.AlterField(
+            model_name="leiturarfid",
+            name="data_hora",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
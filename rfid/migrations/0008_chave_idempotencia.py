@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0007_leiturapendente"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="leiturapendente",
+            name="chave_idempotencia",
+            field=models.CharField(blank=True, max_length=150, null=True),
+        ),
+        migrations.AddField(
+            model_name="leiturarfid",
+            name="chave_idempotencia",
+            field=models.CharField(
+                blank=True, editable=False, max_length=150, null=True, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0008_chave_idempotencia"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botijao",
+            name="tipo_identificador",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("rfid", "RFID"),
+                    ("qr", "QR Code"),
+                    ("barcode", "Código de Barras"),
+                    ("lixo", "Lixo"),
+                    ("outro", "Outro"),
+                ],
+                editable=False,
+                max_length=10,
+                null=True,
+                verbose_name="Tipo de Identificador",
+            ),
+        ),
+        migrations.AddField(
+            model_name="leituracodigobarra",
+            name="tipo_identificador",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("rfid", "RFID"),
+                    ("qr", "QR Code"),
+                    ("barcode", "Código de Barras"),
+                    ("lixo", "Lixo"),
+                    ("outro", "Outro"),
+                ],
+                editable=False,
+                max_length=10,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="botijao",
+            index=models.Index(
+                fields=["deletado", "tipo_identificador"],
+                name="botijao_deletado_tipo_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="leituracodigobarra",
+            index=models.Index(
+                fields=["tipo_identificador", "data_hora"],
+                name="codbarra_tipo_data_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0009_tipo_identificador"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="botijao",
+            index=models.Index(
+                fields=["deletado", "data_proxima_requalificacao"],
+                name="botijao_deletado_requal_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:45
+
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def preencher_resumo(apps, schema_editor):
+    """Resumo inicial a partir do histórico (um GROUP BY por tabela de leitura)."""
+    Resumo = apps.get_model("rfid", "ResumoLeituraDiaria")
+    fontes = (
+        (
+            "rfid",
+            apps.get_model("rfid", "LeituraRFID"),
+            Coalesce("leitor_id", Value("")),
+            Coalesce("antena", Value(0)),
+        ),
+        ("codigo", apps.get_model("rfid", "LeituraCodigoBarra"), Value(""), Value(0)),
+    )
+    for tipo, modelo, leitor_id, antena in fontes:
+        grupos = (
+            modelo.objects.order_by()
+            .annotate(
+                dia_local=TruncDate("data_hora"),
+                operador_chave=Coalesce("operador", Value("")),
+                leitor_id_chave=leitor_id,
+                antena_chave=antena,
+            )
+            .values("dia_local", "operador_chave", "leitor_id_chave", "antena_chave")
+            .annotate(qtd=Count("id"))
+        )
+        Resumo.objects.bulk_create(
+            (
+                Resumo(
+                    dia=grupo["dia_local"],
+                    tipo=tipo,
+                    operador=grupo["operador_chave"],
+                    leitor_id=grupo["leitor_id_chave"],
+                    antena=grupo["antena_chave"],
+                    total=grupo["qtd"],
+                )
+                for grupo in grupos.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0010_dashboard_indices"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumoLeituraDiaria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("dia", models.DateField()),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("rfid", "Leitura RFID"),
+                            ("codigo", "Leitura de código de barras/QR"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("operador", models.CharField(blank=True, default="", max_length=100)),
+                ("leitor_id", models.CharField(blank=True, default="", max_length=100)),
+                ("antena", models.IntegerField(default=0)),
+                ("total", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Resumo diário de leituras",
+                "verbose_name_plural": "Resumos diários de leituras",
+                "ordering": ["-dia"],
+                "indexes": [
+                    models.Index(
+                        fields=["tipo", "dia"], name="resumo_leitura_tipo_dia_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="resumoleituradiaria",
+            constraint=models.UniqueConstraint(
+                fields=("dia", "tipo", "operador", "leitor_id", "antena"),
+                name="resumo_leitura_chave_unica",
+            ),
+        ),
+        migrations.RunPython(preencher_resumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0011_resumo_leitura_diaria"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botijao",
+            name="atualizado_em",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, verbose_name="Atualizado em"
+            ),
+        ),
+    ]
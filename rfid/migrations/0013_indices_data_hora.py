@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0012_botijao_atualizado_em"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="leituracodigobarra",
+            index=models.Index(fields=["data_hora"], name="codbarra_data_hora_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="leiturarfid",
+            index=models.Index(fields=["data_hora"], name="leitura_data_hora_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="leiturarfid",
+            index=models.Index(
+                fields=["botijao", "data_hora"], name="leitura_botijao_data_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:56
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+# cópia das regras de rfid/utils/requalificacao.py nesta data: a migração não
+# pode mudar se a regra do código mudar depois
+DIAS_ALERTA_REQUALIFICACAO = 90
+
+
+def preencher_status(apps, schema_editor):
+    """Status inicial da frota a partir das datas (um UPDATE por faixa)."""
+    Botijao = apps.get_model("rfid", "Botijao")
+    hoje = timezone.localdate()
+    limite = hoje + timedelta(days=DIAS_ALERTA_REQUALIFICACAO)
+    faixas = [
+        ("pendente", Q(data_proxima_requalificacao__isnull=True)),
+        ("vencida", Q(data_proxima_requalificacao__lte=hoje)),
+        (
+            "proximo_vencimento",
+            Q(data_proxima_requalificacao__gt=hoje)
+            & Q(data_proxima_requalificacao__lte=limite),
+        ),
+        ("em_dia", Q(data_proxima_requalificacao__gt=limite)),
+    ]
+    # gerenciador histórico: inclui os deletados
+    for status, faixa in faixas:
+        Botijao.objects.filter(faixa).exclude(status_requalificacao=status).update(
+            status_requalificacao=status
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0013_indices_data_hora"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="botijao",
+            index=models.Index(
+                fields=["deletado", "status_requalificacao"],
+                name="botijao_status_requal_idx",
+            ),
+        ),
+        migrations.RunPython(preencher_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0014_status_requalificacao"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botijao",
+            name="ultima_leitura_em",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Última Leitura"
+            ),
+        ),
+        migrations.AddField(
+            model_name="botijao",
+            name="ultimo_leitor_id",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=100,
+                null=True,
+                verbose_name="Último Leitor",
+            ),
+        ),
+    ]
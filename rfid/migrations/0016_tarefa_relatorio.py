@@ -0,0 +1,98 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("rfid", "0015_ultima_leitura"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TarefaRelatorio",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("exportacao", "Exportação"),
+                            ("email", "Envio por e-mail"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pendente", "Na fila"),
+                            ("processando", "Processando"),
+                            ("concluida", "Concluída"),
+                            ("erro", "Erro"),
+                        ],
+                        default="pendente",
+                        max_length=20,
+                    ),
+                ),
+                ("filtros", models.JSONField(default=dict)),
+                ("formato", models.CharField(default="xlsx", max_length=10)),
+                ("gzip", models.BooleanField(default=False)),
+                (
+                    "destinatario",
+                    models.EmailField(blank=True, default="", max_length=254),
+                ),
+                ("progresso", models.PositiveIntegerField(default=0)),
+                ("total", models.PositiveIntegerField(blank=True, null=True)),
+                ("arquivo", models.FileField(blank=True, upload_to="relatorios/")),
+                (
+                    "tamanho_bytes",
+                    models.PositiveBigIntegerField(blank=True, null=True),
+                ),
+                ("erro", models.TextField(blank=True, default="")),
+                ("tentativas", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "disponivel_em",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("criada_em", models.DateTimeField(auto_now_add=True)),
+                ("iniciada_em", models.DateTimeField(blank=True, null=True)),
+                ("concluida_em", models.DateTimeField(blank=True, null=True)),
+                ("duracao_geracao", models.FloatField(blank=True, null=True)),
+                ("duracao_envio", models.FloatField(blank=True, null=True)),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tarefa de relatório",
+                "verbose_name_plural": "Tarefas de relatório",
+                "ordering": ["-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "disponivel_em"], name="tarefa_rel_fila_idx"
+                    )
+                ],
+            },
+        ),
+    ]
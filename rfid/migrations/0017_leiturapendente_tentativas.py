@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rfid", "0016_tarefa_relatorio"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="leiturapendente",
+            name="erro",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="leiturapendente",
+            name="tentativas",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -3,6 +3,12 @@ from django.contrib.auth.models import User
 from django.db import models, transaction
 from django.utils import timezone
 
+from rfid.utils.identificadores import (
+    TIPO_IDENTIFICADOR_CHOICES,
+    classificar_identificador,
+)
+from rfid.utils.requalificacao import status_por_data
+
 
 # ============================================================
 # GERENCIADOR PARA SOFT DELETE
@@ -36,6 +42,17 @@ class Botijao(models.Model):
     # -------- CAMPOS PRINCIPAIS --------
     tag_rfid = models.CharField(max_length=200, unique=True, verbose_name="Tag RFID")
 
+    # calculado a partir da tag no save()/ingestão (NULL = ainda não classificado,
+    # ver comando `classificar_identificadores`)
+    tipo_identificador = models.CharField(
+        max_length=10,
+        choices=TIPO_IDENTIFICADOR_CHOICES,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Tipo de Identificador",
+    )
+
     fabricante = models.CharField(
         max_length=200, blank=True, null=True, verbose_name="Fabricante"
     )
@@ -93,6 +110,11 @@ class Botijao(models.Model):
     data_cadastro = models.DateTimeField(
         auto_now_add=True, verbose_name="Data de Cadastro"
     )
+    # marca d'água das respostas condicionais (ETag) de dashboard/relatórios:
+    # MAX(atualizado_em) sai do índice sem varrer a tabela
+    atualizado_em = models.DateTimeField(
+        auto_now=True, db_index=True, editable=False, verbose_name="Atualizado em"
+    )
 
     # -------- STATUS GERAL --------
     status = models.CharField(
@@ -101,6 +123,18 @@ class Botijao(models.Model):
 
     # -------- ESTATÍSTICAS --------
     total_leituras = models.IntegerField(default=0, verbose_name="Total de Leituras")
+    # leitura RFID mais recente (data_hora/leitor_id), gravada junto com o
+    # contador na ingestão: exportações e telas não consultam as leituras
+    ultima_leitura_em = models.DateTimeField(
+        blank=True, null=True, editable=False, verbose_name="Última Leitura"
+    )
+    ultimo_leitor_id = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Último Leitor",
+    )
 
     # -------- SOFT DELETE --------
     deletado = models.BooleanField(default=False)
@@ -118,6 +152,19 @@ class Botijao(models.Model):
     objects = BotijaoManager()  # sem deletados
     all_objects = models.Manager()  # com deletados
 
+    # Campos lidos/gravados ao avançar o ciclo de envasadoras
+    CAMPOS_CICLO = (
+        "id",
+        "tag_rfid",
+        "indice_distribuidora",
+        "ultima_envasadora",
+        "penultima_envasadora",
+        "data_ultimo_envasamento",
+        "data_penultimo_envasamento",
+    )
+    # Campos gravados a cada leitura RFID (contador + última leitura)
+    CAMPOS_LEITURA = ("total_leituras", "ultima_leitura_em", "ultimo_leitor_id")
+
     # ============================================================
     # META
     # ============================================================
@@ -129,6 +176,20 @@ class Botijao(models.Model):
             models.Index(fields=["tag_rfid"]),
             models.Index(fields=["numero_serie"]),
             models.Index(fields=["status"]),
+            models.Index(
+                fields=["deletado", "tipo_identificador"],
+                name="botijao_deletado_tipo_idx",
+            ),
+            # dashboard: próximas requalificações (ORDER BY ... LIMIT)
+            models.Index(
+                fields=["deletado", "data_proxima_requalificacao"],
+                name="botijao_deletado_requal_idx",
+            ),
+            # contagens/filtros por status (recalcular_status_requalificacao)
+            models.Index(
+                fields=["deletado", "status_requalificacao"],
+                name="botijao_status_requal_idx",
+            ),
         ]
 
     # ============================================================
@@ -137,11 +198,88 @@ class Botijao(models.Model):
     def __str__(self):
         return f"{self.tag_rfid} – {self.numero_serie or 'Sem Série'}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # guarda a tag carregada para invalidar o cache de tags se ela for editada
+        instance._tag_rfid_original = instance.__dict__.get("tag_rfid")
+        return instance
+
+    def _invalidar_cache_tag(self):
+        from rfid.utils.cache_tags import invalidar_tag
+
+        invalidar_tag(self.tag_rfid, getattr(self, "_tag_rfid_original", None))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "tag_rfid" in update_fields:
+            self.tipo_identificador = classificar_identificador(self.tag_rfid)
+            if update_fields is not None:
+                update_fields = kwargs["update_fields"] = {
+                    *update_fields,
+                    "tipo_identificador",
+                }
+        if update_fields is None or "data_proxima_requalificacao" in update_fields:
+            # a mudança de faixa com o passar dos dias fica com o comando
+            # recalcular_status_requalificacao
+            self.status_requalificacao = status_por_data(
+                self.data_proxima_requalificacao
+            )
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "status_requalificacao"}
+
+        super().save(*args, **kwargs)
+        # saves parciais do ciclo/contador não mexem na identidade do botijão
+        if update_fields is None or {"tag_rfid", "deletado"} & set(update_fields):
+            self._invalidar_cache_tag()
+            self._tag_rfid_original = self.tag_rfid
+
+    def delete(self, *args, **kwargs):
+        self._invalidar_cache_tag()
+        return super().delete(*args, **kwargs)
+
     @property
     def ultima_leitura(self):
-        """Retorna a última leitura registrada."""
-        leitura = self.leituras.order_by("-data_hora").first()
-        return leitura.data_hora if leitura else None
+        """Data/hora da última leitura registrada (coluna ultima_leitura_em)."""
+        return self.ultima_leitura_em
+
+    @staticmethod
+    def atualizacao_ultima_leitura(data_hora, leitor_id) -> dict:
+        """
+        Kwargs de UPDATE (junto com o incremento de total_leituras) que gravam
+        a leitura em ultima_leitura_em/ultimo_leitor_id se ela for a mais
+        recente — leituras de backfill chegam fora de ordem.
+        """
+        mais_recente = models.Q(ultima_leitura_em__isnull=True) | models.Q(
+            ultima_leitura_em__lte=data_hora
+        )
+        return {
+            "ultima_leitura_em": models.Case(
+                models.When(mais_recente, then=models.Value(data_hora)),
+                default=models.F("ultima_leitura_em"),
+            ),
+            "ultimo_leitor_id": models.Case(
+                models.When(
+                    mais_recente,
+                    then=models.Value(leitor_id, output_field=models.CharField()),
+                ),
+                default=models.F("ultimo_leitor_id"),
+            ),
+        }
+
+    def _leitura_em_ordem(self, data_hora) -> bool:
+        """
+        A leitura não é anterior à última já aplicada (mesma regra de
+        atualizacao_ultima_leitura). Backfill mais antigo que o histórico
+        conta, mas não avança o ciclo de envasadoras.
+        """
+        return self.ultima_leitura_em is None or self.ultima_leitura_em <= data_hora
+
+    def _registrar_ultima_leitura(self, data_hora, leitor_id) -> None:
+        """Mesma regra de atualizacao_ultima_leitura, em memória (sem salvar)."""
+        if self._leitura_em_ordem(data_hora):
+            self.ultima_leitura_em = data_hora
+            self.ultimo_leitor_id = leitor_id
 
     def deletar(self, usuario, motivo=""):
         self.deletado = True
@@ -164,112 +302,99 @@ class Botijao(models.Model):
         """
         return f"Distribuidora {idx + 1}"
 
+    def _snapshot_ciclo(self) -> dict:
+        """Campos do ciclo de envasadoras (serializáveis) para auditoria."""
+        return {
+            "indice_distribuidora": self.indice_distribuidora,
+            "ultima_envasadora": self.ultima_envasadora,
+            "penultima_envasadora": self.penultima_envasadora,
+            "data_ultimo_envasamento": (
+                self.data_ultimo_envasamento.isoformat()
+                if self.data_ultimo_envasamento
+                else None
+            ),
+            "data_penultimo_envasamento": (
+                self.data_penultimo_envasamento.isoformat()
+                if self.data_penultimo_envasamento
+                else None
+            ),
+        }
+
+    def _aplicar_proximo_ciclo(self, hoje) -> None:
+        """
+        Avança o ciclo em memória (sem salvar).
+
+        - NULL (não iniciado) => primeira leitura: ultima=Distribuidora 1, penultima permanece vazia
+        - leituras seguintes: shift e avanço do ciclo
+        """
+        if self.indice_distribuidora is None:
+            proximo_idx = 0  # primeira leitura => Distribuidora 1
+            # Primeira leitura: NÃO move ultima->penultima (porque ultima pode estar vazia/legada)
+            self.ultima_envasadora = self._nome_distribuidora(proximo_idx)
+            self.data_ultimo_envasamento = hoje
+        else:
+            proximo_idx = (self.indice_distribuidora + 1) % 4
+
+            # Shift: última -> penúltima (e datas)
+            self.penultima_envasadora = self.ultima_envasadora
+            self.data_penultimo_envasamento = self.data_ultimo_envasamento
+
+            # Nova última
+            self.ultima_envasadora = self._nome_distribuidora(proximo_idx)
+            self.data_ultimo_envasamento = hoje
+
+        self.indice_distribuidora = proximo_idx
+
+    @staticmethod
+    def _descricao_troca_envasadora(antes: dict, depois: dict) -> str:
+        return (
+            "Envasadora atualizada automaticamente por leitura RFID. "
+            f"Última: {depois['ultima_envasadora'] or '-'} "
+            f"(antes: {antes['ultima_envasadora'] or '-'}) | "
+            f"Penúltima: {depois['penultima_envasadora'] or '-'} "
+            f"(antes: {antes['penultima_envasadora'] or '-'})"
+        )
+
     @classmethod
-    def avancar_envasadora_por_leitura(cls, botijao_id: int) -> None:
+    def avancar_envasadora_por_leitura(
+        cls, botijao_id: int, hoje=None, data_hora=None
+    ) -> None:
         """
         Atualiza (penúltima/última) envasadora e datas, avançando em ciclo (1..4),
         com lock para evitar corrida quando chegam leituras simultâneas.
 
+        `hoje` é a data gravada no envasamento (padrão: data atual).
+        `data_hora` (horário da leitura): se for anterior à última leitura já
+        aplicada (backfill fora de ordem), o ciclo não avança (_leitura_em_ordem).
         Gera LogAuditoria (acao="leitura") registrando antes/depois.
-
-        - NULL (não iniciado) => primeira leitura: ultima=Distribuidora 1, penultima permanece vazia
-        - leituras seguintes: shift e avanço do ciclo
         """
-        hoje = timezone.now().date()
+        hoje = hoje or timezone.localdate()
 
         with transaction.atomic():
             botijao = (
                 cls.all_objects.select_for_update()
-                .only(
-                    "id",
-                    "tag_rfid",
-                    "indice_distribuidora",
-                    "ultima_envasadora",
-                    "penultima_envasadora",
-                    "data_ultimo_envasamento",
-                    "data_penultimo_envasamento",
-                )
+                .only(*cls.CAMPOS_CICLO, "ultima_leitura_em")
                 .get(pk=botijao_id)
             )
+            if data_hora is not None and not botijao._leitura_em_ordem(data_hora):
+                return
 
             # Snapshot "antes" para auditoria
-            antes = {
-                "indice_distribuidora": botijao.indice_distribuidora,
-                "ultima_envasadora": botijao.ultima_envasadora,
-                "penultima_envasadora": botijao.penultima_envasadora,
-                "data_ultimo_envasamento": (
-                    botijao.data_ultimo_envasamento.isoformat()
-                    if botijao.data_ultimo_envasamento
-                    else None
-                ),
-                "data_penultimo_envasamento": (
-                    botijao.data_penultimo_envasamento.isoformat()
-                    if botijao.data_penultimo_envasamento
-                    else None
-                ),
-            }
-
-            # Determina próximo índice (0..3) e aplica regras
-            if botijao.indice_distribuidora is None:
-                proximo_idx = 0  # primeira leitura => Distribuidora 1
-                # Primeira leitura: NÃO move ultima->penultima (porque ultima pode estar vazia/legada)
-                botijao.ultima_envasadora = cls._nome_distribuidora(proximo_idx)
-                botijao.data_ultimo_envasamento = hoje
-            else:
-                proximo_idx = (botijao.indice_distribuidora + 1) % 4
-
-                # Shift: última -> penúltima (e datas)
-                botijao.penultima_envasadora = botijao.ultima_envasadora
-                botijao.data_penultimo_envasamento = botijao.data_ultimo_envasamento
-
-                # Nova última
-                botijao.ultima_envasadora = cls._nome_distribuidora(proximo_idx)
-                botijao.data_ultimo_envasamento = hoje
-
-            botijao.indice_distribuidora = proximo_idx
-
-            botijao.save(
-                update_fields=[
-                    "indice_distribuidora",
-                    "ultima_envasadora",
-                    "penultima_envasadora",
-                    "data_ultimo_envasamento",
-                    "data_penultimo_envasamento",
-                ]
-            )
+            antes = botijao._snapshot_ciclo()
+
+            botijao._aplicar_proximo_ciclo(hoje)
+
+            botijao.save(update_fields=list(cls.CAMPOS_CICLO[2:]))
 
             # Snapshot "depois" para auditoria
-            depois = {
-                "indice_distribuidora": botijao.indice_distribuidora,
-                "ultima_envasadora": botijao.ultima_envasadora,
-                "penultima_envasadora": botijao.penultima_envasadora,
-                "data_ultimo_envasamento": (
-                    botijao.data_ultimo_envasamento.isoformat()
-                    if botijao.data_ultimo_envasamento
-                    else None
-                ),
-                "data_penultimo_envasamento": (
-                    botijao.data_penultimo_envasamento.isoformat()
-                    if botijao.data_penultimo_envasamento
-                    else None
-                ),
-            }
-
-            # Descrição auditável
-            desc = (
-                "Envasadora atualizada automaticamente por leitura RFID. "
-                f"Última: {depois['ultima_envasadora'] or '-'} "
-                f"(antes: {antes['ultima_envasadora'] or '-'}) | "
-                f"Penúltima: {depois['penultima_envasadora'] or '-'} "
-                f"(antes: {antes['penultima_envasadora'] or '-'})"
-            )
+            depois = botijao._snapshot_ciclo()
 
             # Cria log (usuario=None por padrão: evento automático)
             LogAuditoria.criar_log(
                 botijao=botijao,
                 acao="leitura",
                 usuario=None,
-                descricao=desc,
+                descricao=cls._descricao_troca_envasadora(antes, depois),
                 dados_anteriores=antes,
                 dados_novos=depois,
             )
@@ -283,7 +408,9 @@ class LeituraRFID(models.Model):
         Botijao, on_delete=models.CASCADE, related_name="leituras"
     )
 
-    data_hora = models.DateTimeField(auto_now_add=True)
+    # default (e não auto_now_add) para permitir gravar o horário de recebimento
+    # quando a leitura passa pela fila assíncrona (LeituraPendente)
+    data_hora = models.DateTimeField(default=timezone.now, editable=False)
     operador = models.CharField(max_length=100, blank=True, null=True)
     observacao = models.TextField(blank=True, null=True)
 
@@ -292,24 +419,94 @@ class LeituraRFID(models.Model):
     antena = models.IntegerField(blank=True, null=True)
     leitor_id = models.CharField(max_length=100, blank=True, null=True)
 
+    # "<leitor_id>#<seq>" ou "uuid:<uuid>" enviado pelo coletor: reenvios
+    # (retry após falha de rede) devolvem a leitura original sem nova gravação
+    chave_idempotencia = models.CharField(
+        max_length=150, blank=True, null=True, unique=True, editable=False
+    )
+
     class Meta:
         ordering = ["-data_hora"]
+        indexes = [
+            # filtros por período (rfid/utils/periodo.py) e ORDER BY -data_hora
+            models.Index(fields=["data_hora"], name="leitura_data_hora_idx"),
+            # histórico / última leitura de um botijão
+            models.Index(
+                fields=["botijao", "data_hora"], name="leitura_botijao_data_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.botijao.tag_rfid} – {self.data_hora:%d/%m/%Y %H:%M}"
 
-    def save(self, *args, **kwargs):
-        novo = self.pk is None
-        super().save(*args, **kwargs)
+    def save(self, *args, tag_rfid=None, **kwargs):
+        """
+        `tag_rfid`: tag pela qual o botijao_id foi resolvido (cache de tags). O
+        UPDATE do contador então só casa se o botijão ainda tem essa tag e não
+        está deletado; senão levanta Botijao.DoesNotExist e nada é gravado.
+        """
+        if self.pk is not None:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-        if novo:
             # Incrementa contador (como já fazia) — update atômico
-            Botijao.all_objects.filter(pk=self.botijao_id).update(
-                total_leituras=models.F("total_leituras") + 1
+            botijoes = Botijao.all_objects.filter(pk=self.botijao_id)
+            if tag_rfid is not None:
+                botijoes = Botijao.objects.filter(pk=self.botijao_id, tag_rfid=tag_rfid)
+            atualizados = botijoes.update(
+                total_leituras=models.F("total_leituras") + 1,
+                **Botijao.atualizacao_ultima_leitura(self.data_hora, self.leitor_id),
             )
+            if not atualizados and tag_rfid is not None:
+                raise Botijao.DoesNotExist(f"Botijão da tag {tag_rfid} não encontrado")
 
             # Avança ciclo de envasadoras + gera log de auditoria
-            Botijao.avancar_envasadora_por_leitura(self.botijao_id)
+            # (data da leitura: difere de hoje quando o coletor envia o horário;
+            # leitura mais antiga que a última já aplicada não avança)
+            Botijao.avancar_envasadora_por_leitura(
+                self.botijao_id,
+                hoje=timezone.localdate(self.data_hora),
+                data_hora=self.data_hora,
+            )
+
+            from rfid.utils.resumo_diario import contabilizar_leituras
+
+            contabilizar_leituras(ResumoLeituraDiaria.TIPO_RFID, [self])
+
+
+# ============================================================
+# LEITURA PENDENTE (fila de ingestão assíncrona)
+# ============================================================
+class LeituraPendente(models.Model):
+    """
+    Leitura bruta aceita pela API em modo assíncrono (RFID_INGESTAO_ASSINCRONA).
+
+    Tabela estreita, sem FK e sem índices além da PK: o INSERT é o mais barato
+    possível. O comando `processar_leituras_pendentes` drena a fila em lotes;
+    linhas que falham guardam o erro e o número de tentativas e, ao chegar em
+    RFID_FILA_MAX_TENTATIVAS, ficam paradas na tabela para análise.
+    """
+
+    tag_rfid = models.CharField(max_length=200)
+    operador = models.CharField(max_length=100, blank=True, null=True)
+    observacao = models.TextField(blank=True, null=True)
+    rssi = models.IntegerField(blank=True, null=True)
+    antena = models.IntegerField(blank=True, null=True)
+    leitor_id = models.CharField(max_length=100, blank=True, null=True)
+    chave_idempotencia = models.CharField(max_length=150, blank=True, null=True)
+    recebida_em = models.DateTimeField(default=timezone.now)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True, default="")
+
+    class Meta:
+        verbose_name = "Leitura Pendente"
+        verbose_name_plural = "Leituras Pendentes"
+
+    def __str__(self):
+        return f"{self.tag_rfid} – {self.recebida_em:%d/%m/%Y %H:%M:%S}"
 
 
 # ============================================================
@@ -341,15 +538,20 @@ class LogAuditoria(models.Model):
     @classmethod
     def criar_log(
         cls,
-        botijao,
+        botijao=None,
+        *,
         acao,
         usuario=None,
         descricao="",
         dados_anteriores=None,
         dados_novos=None,
+        botijao_id=None,
     ):
+        # aceita o id direto (ingestão via cache de tags não carrega o Botijao)
+        if botijao is not None:
+            botijao_id = botijao.pk
         return cls.objects.create(
-            botijao=botijao,
+            botijao_id=botijao_id,
             acao=acao,
             usuario=usuario,
             descricao=descricao,
@@ -390,9 +592,163 @@ class LeituraCodigoBarra(models.Model):
     operador = models.CharField(max_length=100, blank=True, null=True)
     observacao = models.TextField(blank=True, null=True)
     data_hora = models.DateTimeField(auto_now_add=True)
+    tipo_identificador = models.CharField(
+        max_length=10,
+        choices=TIPO_IDENTIFICADOR_CHOICES,
+        blank=True,
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["-data_hora"]
+        indexes = [
+            models.Index(
+                fields=["tipo_identificador", "data_hora"],
+                name="codbarra_tipo_data_idx",
+            ),
+            models.Index(fields=["data_hora"], name="codbarra_data_hora_idx"),
+        ]
 
     def __str__(self):
         return f"{self.codigo} – {self.data_hora:%d/%m/%Y %H:%M}"
+
+    def save(self, *args, **kwargs):
+        novo = self.pk is None
+        self.tipo_identificador = classificar_identificador(self.codigo)
+        super().save(*args, **kwargs)
+
+        if novo:
+            from rfid.utils.resumo_diario import contabilizar_leituras
+
+            contabilizar_leituras(ResumoLeituraDiaria.TIPO_CODIGO, [self])
+
+
+# ============================================================
+# RESUMO DIÁRIO DE LEITURAS (rollup dos gráficos/contadores)
+# ============================================================
+class ResumoLeituraDiaria(models.Model):
+    """
+    Contagem de leituras por (dia local, tipo, operador, leitor, antena).
+
+    Mantido na ingestão (upsert incremental em rfid/utils/resumo_diario.py) e
+    reconstruível a partir das leituras com `manage.py reconstruir_resumo_diario`.
+    Campos opcionais ausentes viram "" / 0 para entrarem na chave única.
+    """
+
+    TIPO_RFID = "rfid"
+    TIPO_CODIGO = "codigo"
+    TIPO_CHOICES = [
+        (TIPO_RFID, "Leitura RFID"),
+        (TIPO_CODIGO, "Leitura de código de barras/QR"),
+    ]
+
+    dia = models.DateField()
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    operador = models.CharField(max_length=100, blank=True, default="")
+    leitor_id = models.CharField(max_length=100, blank=True, default="")
+    antena = models.IntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumo diário de leituras"
+        verbose_name_plural = "Resumos diários de leituras"
+        ordering = ["-dia"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia", "tipo", "operador", "leitor_id", "antena"],
+                name="resumo_leitura_chave_unica",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["tipo", "dia"], name="resumo_leitura_tipo_dia_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.dia:%d/%m/%Y} {self.tipo} – {self.total}"
+
+
+# ============================================================
+# TAREFA DE RELATÓRIO (fila de exportações / e-mails)
+# ============================================================
+class TarefaRelatorio(models.Model):
+    """
+    Exportação ou envio por e-mail de relatório gerado fora da requisição
+    (RFID_RELATORIOS_ASSINCRONOS). O comando `processar_tarefas_relatorio`
+    trava a próxima tarefa com SKIP LOCKED, gera o arquivo e, se for e-mail,
+    envia com novas tentativas (backoff exponencial) em caso de falha.
+    """
+
+    TIPO_EXPORTACAO = "exportacao"
+    TIPO_EMAIL = "email"
+    TIPO_CHOICES = [
+        (TIPO_EXPORTACAO, "Exportação"),
+        (TIPO_EMAIL, "Envio por e-mail"),
+    ]
+
+    STATUS_PENDENTE = "pendente"
+    STATUS_PROCESSANDO = "processando"
+    STATUS_CONCLUIDA = "concluida"
+    STATUS_ERRO = "erro"
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, "Na fila"),
+        (STATUS_PROCESSANDO, "Processando"),
+        (STATUS_CONCLUIDA, "Concluída"),
+        (STATUS_ERRO, "Erro"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDENTE
+    )
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    # FiltroRelatorio.parametros() + formato/gzip da exportação
+    filtros = models.JSONField(default=dict)
+    formato = models.CharField(max_length=10, default="xlsx")
+    gzip = models.BooleanField(default=False)
+    destinatario = models.EmailField(blank=True, default="")
+
+    # progresso (linhas escritas / total estimado) e resultado
+    progresso = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(blank=True, null=True)
+    arquivo = models.FileField(upload_to="relatorios/", blank=True)
+    tamanho_bytes = models.PositiveBigIntegerField(blank=True, null=True)
+    erro = models.TextField(blank=True, default="")
+
+    # tentativas: a tarefa volta para a fila até RFID_RELATORIOS_MAX_TENTATIVAS
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    disponivel_em = models.DateTimeField(default=timezone.now)
+
+    # tempos (métricas por tarefa)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    iniciada_em = models.DateTimeField(blank=True, null=True)
+    concluida_em = models.DateTimeField(blank=True, null=True)
+    duracao_geracao = models.FloatField(blank=True, null=True)
+    duracao_envio = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Tarefa de relatório"
+        verbose_name_plural = "Tarefas de relatório"
+        ordering = ["-id"]
+        indexes = [
+            # próxima tarefa da fila (status + horário liberado)
+            models.Index(
+                fields=["status", "disponivel_em"], name="tarefa_rel_fila_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} – {self.get_status_display()}"
+
+    @property
+    def finalizada(self) -> bool:
+        return self.status in (self.STATUS_CONCLUIDA, self.STATUS_ERRO)
+
+    @property
+    def percentual(self):
+        if self.status == self.STATUS_CONCLUIDA:
+            return 100
+        if not self.total:
+            return None
+        return min(99, int(self.progresso * 100 / self.total))
@@ -1,2 +1,1528 @@
-# Create your tests here.
+import asyncio
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from rfid.models import (
+    Botijao,
+    LeituraCodigoBarra,
+    LeituraPendente,
+    LeituraRFID,
+    LogAuditoria,
+    ResumoLeituraDiaria,
+    TarefaRelatorio,
+)
+from rfid.utils import cache_relatorios, ingestao_sql, metricas, protocolo_binario
+from rfid.utils.cache_dashboard import marcar_alteracao
+from rfid.utils.cache_tags import (
+    TagRejeitada,
+    limpar_cache_tags,
+    resolver_botijao,
+    verificar_tag,
+)
+from rfid.utils.dashboard import resumo_dashboard, resumo_dashboard_em_cache
+from rfid.utils.deduplicacao import (
+    DeduplicadorCache,
+    chave_leitura,
+    obter_deduplicador,
+    reiniciar_deduplicador,
+    reservar_leitura,
+)
+from rfid.utils.eventos import CanalDashboard
+from rfid.utils.idempotencia import limpar_chaves_recentes
+from rfid.utils.identificadores import classificar_identificador, eh_lixo
+from rfid.utils.ingestao import (
+    ItemLeitura,
+    estado_fila,
+    item_de_dict,
+    processar_leituras_pendentes,
+    registrar_leituras_em_lote,
+)
+from rfid.utils.ingestao_sql import motor_disponivel, registrar_leitura_sql
+from rfid.utils.paginacao import Contagem, CursorInvalido, contar, paginar
+from rfid.utils.periodo import filtro_periodo
+from rfid.utils.planilhas import (
+    AMOSTRA_LARGURA,
+    CABECALHO_DETALHADO,
+    arquivo_xlsx,
+    larguras,
+)
+from rfid.utils.recentes import ultimas_leituras_por_botijao
+from rfid.utils.relatorios import (
+    FiltroRelatorio,
+    consulta_botijoes,
+    consulta_eventos,
+    totais_botijoes,
+)
+from rfid.utils.requalificacao import recalcular_status
+from rfid.utils.resumo_diario import reconstruir
+from rfid.utils.tarefas_relatorio import processar_proxima
+from rfid.ws_leituras import ws_leituras
+
+CAMPOS_CICLO = [
+    "total_leituras",
+    "indice_distribuidora",
+    "ultima_envasadora",
+    "penultima_envasadora",
+    "data_ultimo_envasamento",
+    "data_penultimo_envasamento",
+]
+
+
+class MotorIngestaoSQLTests(TestCase):
+    """O motor set-based deve produzir exatamente o mesmo estado do fluxo ORM."""
+
+    ESTADOS = {
+        "NOVO": None,
+        "LEGADO": {"ultima_envasadora": "Envasadora Antiga"},
+        "MEIO": {
+            "indice_distribuidora": 1,
+            "ultima_envasadora": "Distribuidora 2",
+            "penultima_envasadora": "Distribuidora 1",
+            "data_ultimo_envasamento": date(2024, 5, 2),
+            "data_penultimo_envasamento": date(2024, 4, 1),
+            "total_leituras": 7,
+        },
+        "FIM": {"indice_distribuidora": 3, "ultima_envasadora": "Distribuidora 4"},
+    }
+
+    def setUp(self):
+        if not motor_disponivel():
+            self.skipTest("Motor SQL indisponível neste banco")
+
+    def _preparar(self, prefixo):
+        for nome, campos in self.ESTADOS.items():
+            if campos is not None:
+                Botijao.objects.create(tag_rfid=f"{prefixo}{nome}", **campos)
+
+    def _estado(self, prefixo):
+        resultado = {}
+        for nome in self.ESTADOS:
+            b = Botijao.all_objects.get(tag_rfid=f"{prefixo}{nome}")
+            logs = [
+                (log.descricao, log.dados_anteriores, log.dados_novos)
+                for log in LogAuditoria.objects.filter(botijao=b).order_by("id")
+            ]
+            leituras = list(
+                LeituraRFID.objects.filter(botijao=b)
+                .order_by("id")
+                .values_list("operador", "observacao")
+            )
+            resultado[nome] = (
+                {campo: getattr(b, campo) for campo in CAMPOS_CICLO},
+                logs,
+                leituras,
+            )
+        return resultado
+
+    def test_mesmo_resultado_que_fluxo_orm(self):
+        self._preparar("ORM-")
+        self._preparar("SQL-")
+
+        # duas leituras por botijão para cobrir primeira leitura + shift
+        for _ in range(2):
+            for nome in self.ESTADOS:
+                botijao, _ = Botijao.objects.get_or_create(tag_rfid=f"ORM-{nome}")
+                LeituraRFID.objects.create(
+                    botijao=botijao, operador="PDA_C72", observacao="Leitura Mobile"
+                )
+                registrar_leitura_sql(
+                    ItemLeitura(tag_rfid=f"SQL-{nome}"),
+                )
+
+        # backfill mais antigo que as leituras acima: conta, sem avançar o ciclo
+        antiga = timezone.now() - timedelta(days=10)
+        for nome in self.ESTADOS:
+            LeituraRFID.objects.create(
+                botijao=Botijao.objects.get(tag_rfid=f"ORM-{nome}"),
+                operador="PDA_C72",
+                observacao="Leitura Mobile",
+                data_hora=antiga,
+            )
+            registrar_leitura_sql(ItemLeitura(tag_rfid=f"SQL-{nome}", data_hora=antiga))
+
+        orm, sql = self._estado("ORM-"), self._estado("SQL-")
+        self.assertEqual(orm, sql)
+        ciclo, logs, leituras = orm["MEIO"]
+        self.assertEqual(
+            (ciclo["total_leituras"], ciclo["indice_distribuidora"]), (10, 3)
+        )
+        self.assertEqual((len(logs), len(leituras)), (2, 3))
+        for prefixo in ("ORM-", "SQL-"):
+            self.assertGreater(
+                Botijao.objects.get(tag_rfid=f"{prefixo}MEIO").ultima_leitura_em, antiga
+            )
+
+    def test_botijao_deletado_nao_recebe_leitura(self):
+        Botijao.objects.create(tag_rfid="DEL", deletado=True)
+
+        with self.assertRaises(ValueError):
+            registrar_leitura_sql(ItemLeitura(tag_rfid="DEL"))
+
+        self.assertFalse(LeituraRFID.objects.exists())
+
+    def test_botijao_removido_entre_upsert_e_ciclo(self):
+        # o botijão some depois do upsert: PostgreSQL (CTE sem linha) e SQLite
+        with mock.patch(
+            "rfid.utils.ingestao_sql._upsert_botijao",
+            return_value=(999999, False, False),
+        ):
+            with self.assertRaises(ValueError):
+                registrar_leitura_sql(ItemLeitura(tag_rfid="SUMIU"))
+
+        self.assertFalse(LeituraRFID.objects.exists())
+        self.assertFalse(LogAuditoria.objects.exists())
+
+    @skipUnless(connection.vendor == "postgresql", "caminho exclusivo do PostgreSQL")
+    def test_postgres_usa_uma_instrucao_para_ciclo_e_leitura(self):
+        with mock.patch.object(
+            ingestao_sql, "_avancar_postgres", wraps=ingestao_sql._avancar_postgres
+        ) as avancar:
+            resultado = registrar_leitura_sql(ItemLeitura(tag_rfid="PG-1"))
+
+        avancar.assert_called_once()
+        botijao = Botijao.objects.get(tag_rfid="PG-1")
+        self.assertEqual(resultado["botijao_id"], botijao.id)
+        self.assertEqual((botijao.total_leituras, botijao.indice_distribuidora), (1, 0))
+        self.assertEqual(
+            LeituraRFID.objects.get(pk=resultado["id_leitura"]).botijao_id, botijao.id
+        )
+
+
+class MotorIngestaoSQLFallbackTests(TestCase):
+    def test_banco_sem_motor_grava_pelo_fluxo_orm(self):
+        Botijao.objects.create(tag_rfid="DEL", deletado=True)
+
+        with mock.patch("rfid.utils.ingestao_sql.motor_disponivel", return_value=False):
+            primeiro = registrar_leitura_sql(
+                ItemLeitura(tag_rfid="ORM-1"), descricao_log="Leitura API. Op: PDA"
+            )
+            segundo = registrar_leitura_sql(ItemLeitura(tag_rfid="ORM-1"))
+            with self.assertRaises(ValueError):
+                registrar_leitura_sql(ItemLeitura(tag_rfid="DEL"))
+
+        botijao = Botijao.objects.get(tag_rfid="ORM-1")
+        self.assertEqual((primeiro["criado"], segundo["criado"]), (True, False))
+        self.assertEqual(segundo["botijao_id"], botijao.id)
+        self.assertEqual((botijao.total_leituras, botijao.indice_distribuidora), (2, 1))
+        self.assertEqual(
+            LogAuditoria.objects.filter(descricao="Leitura API. Op: PDA").count(), 1
+        )
+        self.assertEqual(LeituraRFID.objects.count(), 2)
+
+
+class WebSocketLeiturasTests(TransactionTestCase):
+    """Conversa com o endpoint ASGI em processo (sem servidor)."""
+
+    def _conversar(self, frames, query=b""):
+        saida = []
+
+        async def rodar():
+            entrada = asyncio.Queue()
+            entrada.put_nowait({"type": "websocket.connect"})
+            for frame in frames:
+                entrada.put_nowait(
+                    {"type": "websocket.receive", "text": json.dumps(frame)}
+                )
+            esperados = len(frames)
+
+            async def send(mensagem):
+                saida.append(mensagem)
+                acks = sum(
+                    len(json.loads(m["text"])["acks"])
+                    for m in saida
+                    if m["type"] == "websocket.send"
+                )
+                if acks >= esperados:
+                    entrada.put_nowait({"type": "websocket.disconnect"})
+
+            scope = {
+                "type": "websocket",
+                "path": "/ws/leituras/",
+                "query_string": query,
+            }
+            await asyncio.wait_for(ws_leituras(scope, entrada.get, send), 10)
+
+        async_to_sync(rodar)()
+        return saida
+
+    def test_acks_por_frame_com_id_leitura(self):
+        saida = self._conversar(
+            [{"n": 1, "t": "WS-A", "a": 1}, {"n": 2, "t": "WS-B"}, {"n": 3, "a": 2}],
+            query=b"operador=PORTAL_01",
+        )
+
+        self.assertEqual(saida[0], {"type": "websocket.accept"})
+        acks = {
+            ack["n"]: ack for m in saida[1:] for ack in json.loads(m["text"])["acks"]
+        }
+        self.assertEqual(acks[3]["status"], "erro")
+        for n, tag in ((1, "WS-A"), (2, "WS-B")):
+            self.assertEqual(acks[n]["status"], "ok")
+            leitura = LeituraRFID.objects.get(pk=acks[n]["id_leitura"])
+            self.assertEqual(leitura.botijao.tag_rfid, tag)
+            self.assertEqual(leitura.operador, "PORTAL_01")
+            self.assertEqual(leitura.botijao.total_leituras, 1)
+
+    @override_settings(RFID_WS_TOKEN="segredo")
+    def test_token_invalido_fecha_conexao(self):
+        saida = self._conversar([], query=b"token=errado")
+
+        self.assertEqual(saida, [{"type": "websocket.close", "code": 4401}])
+
+
+class IdempotenciaTests(TestCase):
+    """Retry com o mesmo (leitor_id, seq) devolve a leitura original sem gravar."""
+
+    def setUp(self):
+        limpar_chaves_recentes()
+
+    def test_retry_do_lote_nao_grava_nem_avanca_ciclo(self):
+        itens = [
+            item_de_dict({"tag_rfid": "IDEM-1", "leitor_id": "pda-1", "seq": 10}),
+            item_de_dict({"tag_rfid": "IDEM-1", "leitor_id": "pda-1", "seq": 10}),
+        ]
+        primeiro = registrar_leituras_em_lote(itens)
+
+        limpar_chaves_recentes()  # força a consulta ao índice único
+        retry = registrar_leituras_em_lote(itens[:1])
+
+        self.assertEqual(
+            [r["status"] for r in primeiro + retry], ["ok", "duplicada", "duplicada"]
+        )
+        self.assertEqual(
+            {r["id_leitura"] for r in primeiro + retry}, {primeiro[0]["id_leitura"]}
+        )
+        self.assertEqual(LeituraRFID.objects.count(), 1)
+        self.assertEqual(Botijao.objects.get(tag_rfid="IDEM-1").total_leituras, 1)
+
+
+class ProtocoloBinarioTests(TestCase):
+    def test_ida_e_volta(self):
+        base = timezone.now().replace(microsecond=0) - timedelta(hours=2)
+        leituras = [
+            {"tag_rfid": "E2000017221101441890ABCD", "data_hora": base, "antena": 1},
+            {"tag_rfid": "última leitura:", "rssi": -52},
+            {
+                "tag_rfid": "E2801160600002054C6F4B3A0E9F1234",
+                "data_hora": base - timedelta(seconds=3),
+                "seq": 7,
+            },
+        ]
+        dados = protocolo_binario.codificar_lote(
+            leituras, operador="PORTAL_01", leitor_id="doca-1"
+        )
+
+        itens = protocolo_binario.decodificar_lote(dados)
+
+        # mesmo resultado do caminho JSON
+        cabecalho = {"operador": "PORTAL_01", "leitor_id": "doca-1"}
+        self.assertEqual(
+            itens, [item_de_dict(leitura, padrao=cabecalho) for leitura in leituras]
+        )
+
+    def test_envio_truncado_e_rejeitado(self):
+        dados = protocolo_binario.codificar_lote([{"tag_rfid": "E200001722110144"}])
+
+        for corte in (3, len(dados) - 1):
+            with self.assertRaises(ValueError):
+                protocolo_binario.decodificar_lote(dados[:corte])
+
+
+class ResumoDashboardTests(TestCase):
+    def test_faixas_e_grafico_agregados(self):
+        hoje = timezone.localdate()
+        for tag, proxima in [
+            ("VENCIDA", hoje),
+            ("PROXIMA-2", hoje + timedelta(days=60)),
+            ("PROXIMA-1", hoje + timedelta(days=10)),
+            ("EM-DIA", hoje + timedelta(days=91)),
+            ("SEM-DATA", None),
+        ]:
+            Botijao.objects.create(tag_rfid=tag, data_proxima_requalificacao=proxima)
+        Botijao.objects.create(tag_rfid="APAGADO", deletado=True)
+
+        botijao = Botijao.objects.get(tag_rfid="EM-DIA")
+        agora = timezone.now()
+        for data_hora in (agora, agora, agora - timedelta(days=2)):
+            LeituraRFID.objects.create(botijao=botijao, data_hora=data_hora)
+
+        with self.assertNumQueries(3):
+            resumo = resumo_dashboard(incluir_proximas=True)
+
+        self.assertEqual(resumo["total_botijoes"], 5)
+        self.assertEqual(
+            [
+                resumo[f"qtd_requal_{faixa}"]
+                for faixa in ("vencidas", "proximas", "em_dia", "sem_data")
+            ],
+            [1, 2, 1, 1],
+        )
+        self.assertEqual(
+            [c.tag_rfid for c in resumo["requal_proximas"]], ["PROXIMA-1", "PROXIMA-2"]
+        )
+        self.assertEqual(resumo["leituras_hoje"], 2)
+        self.assertEqual(
+            [ponto["total"] for ponto in resumo["leituras_7_dias"]],
+            [0, 0, 0, 0, 1, 0, 2],
+        )
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "dashboard": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "testes-dashboard",
+        },
+    },
+    RFID_DASHBOARD_CACHE_SEGUNDOS=0.01,
+)
+class CacheDashboardTests(TestCase):
+    def test_recalcula_so_com_leitura_nova_apos_intervalo(self):
+        resumo_dashboard_em_cache()
+        time.sleep(0.02)
+        with self.assertNumQueries(0):
+            resumo_dashboard_em_cache()
+
+        marcar_alteracao()
+        time.sleep(0.02)
+        with self.assertNumQueries(2):
+            resumo_dashboard_em_cache()
+
+
+@override_settings(RFID_DASHBOARD_CACHE_SEGUNDOS=0)
+class EventosDashboardTests(TestCase):
+    def test_so_deltas_apos_leitura_nova(self):
+        botijao = Botijao.objects.create(tag_rfid="E200CAFE")
+        LeituraRFID.objects.create(botijao=botijao)
+        canal = CanalDashboard()
+        canal.iniciar()
+        self.assertEqual(canal.atualizar(), [])
+
+        leitura = LeituraRFID.objects.create(botijao=botijao, operador="OP")
+        marcar_alteracao()
+        eventos = dict(canal.atualizar())
+
+        self.assertEqual(eventos["leitura"]["id"], leitura.id)
+        self.assertEqual(eventos["leitura"]["botijao"]["total_leituras"], 2)
+        self.assertEqual(eventos["contadores"]["leituras_hoje"], 2)
+        self.assertNotIn("requalificacao", eventos)
+        self.assertEqual(canal.atualizar(), [])
+
+
+class RespostaCondicionalTests(TestCase):
+    def test_304_sem_consultas_de_agregacao_ate_nova_leitura(self):
+        url = "/api/barcode/dashboard/"
+        LeituraCodigoBarra.objects.create(codigo="7891234567890")
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+
+        LeituraCodigoBarra.objects.create(codigo="7891234567891")
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta["ETag"], etag)
+
+
+class ResumoLeituraDiariaTests(TestCase):
+    def test_incremental_igual_a_reconstrucao(self):
+        ontem = timezone.now() - timedelta(days=1)
+        registrar_leituras_em_lote(
+            [
+                ItemLeitura("E200AA", "OP", "x", None, 1, "doca-1", None, None),
+                ItemLeitura("E200AA", "OP", "x", None, 1, "doca-1", ontem, None),
+                ItemLeitura("E200BB", None, "x", None, None, None, None, None),
+            ]
+        )
+        registrar_leituras_em_lote(
+            [ItemLeitura("E200BB", "OP", "x", None, 1, "doca-1", None, None)]
+        )
+        LeituraCodigoBarra.objects.create(codigo="7891234567890", operador="OP")
+
+        campos = ("dia", "tipo", "operador", "leitor_id", "antena", "total")
+        incremental = sorted(ResumoLeituraDiaria.objects.values_list(*campos))
+        self.assertIn((timezone.localdate(), "rfid", "OP", "doca-1", 1, 2), incremental)
+
+        reconstruir()
+        self.assertEqual(
+            sorted(ResumoLeituraDiaria.objects.values_list(*campos)), incremental
+        )
+
+
+class PeriodoTests(TestCase):
+    def test_dia_local_e_nao_utc(self):
+        # 23:30 em São Paulo = 02:30 UTC do dia seguinte
+        noite = timezone.make_aware(datetime(2026, 3, 10, 23, 30))
+        madrugada = timezone.make_aware(datetime(2026, 3, 11, 0, 30))
+        botijao = Botijao.objects.create(tag_rfid="E200CC")
+        LeituraRFID.objects.create(botijao=botijao, data_hora=noite)
+        LeituraRFID.objects.create(botijao=botijao, data_hora=madrugada)
+
+        dia_10 = LeituraRFID.objects.filter(
+            **filtro_periodo("data_hora", "2026-03-10", "2026-03-10")
+        )
+        self.assertEqual(list(dia_10.values_list("data_hora", flat=True)), [noite])
+        self.assertEqual(
+            LeituraRFID.objects.filter(
+                **filtro_periodo("data_hora", "2026-03-11")
+            ).count(),
+            1,
+        )
+        # data inválida/vazia = sem limite
+        self.assertEqual(filtro_periodo("data_hora", "", "31/12/2026"), {})
+
+        botijao.refresh_from_db()
+        self.assertEqual(botijao.data_penultimo_envasamento, date(2026, 3, 10))
+        self.assertEqual(botijao.data_ultimo_envasamento, date(2026, 3, 11))
+
+
+class StatusRequalificacaoTests(TestCase):
+    def test_save_e_recalculo_por_faixa(self):
+        hoje = timezone.localdate()
+        botijao = Botijao.objects.create(
+            tag_rfid="E200DD", data_proxima_requalificacao=hoje + timedelta(days=91)
+        )
+        self.assertEqual(botijao.status_requalificacao, "em_dia")
+        Botijao.objects.create(tag_rfid="E200EE")
+
+        # um dia depois o botijão entra na janela de alerta
+        alterados = recalcular_status(hoje + timedelta(days=1))
+        self.assertEqual(alterados["proximo_vencimento"], 1)
+        self.assertEqual(sum(alterados.values()), 1)
+        botijao.refresh_from_db()
+        self.assertEqual(botijao.status_requalificacao, "proximo_vencimento")
+
+        botijao.data_proxima_requalificacao = hoje
+        botijao.save(update_fields=["data_proxima_requalificacao"])
+        botijao.refresh_from_db()
+        self.assertEqual(botijao.status_requalificacao, "vencida")
+        self.assertEqual(resumo_dashboard()["qtd_requal_vencidas"], 1)
+        self.assertEqual(resumo_dashboard()["qtd_requal_sem_data"], 1)
+
+
+class MotorRelatoriosTests(TestCase):
+    def test_filtro_normalizado_e_periodo_de_leitura_sem_duplicar(self):
+        hoje = timezone.localdate()
+        filtro = FiltroRelatorio.de_parametros(
+            {"data_tipo": "leitura", "data_inicio": f" {hoje} ", "tipo": "xyz"}
+        )
+        self.assertEqual(filtro.tipo, "")
+        self.assertEqual(
+            filtro.chave(),
+            FiltroRelatorio(data_tipo="leitura", data_inicio=hoje).chave(),
+        )
+        self.assertNotEqual(filtro.chave(), FiltroRelatorio().chave())
+
+        lido = Botijao.objects.create(tag_rfid="E200FF")
+        Botijao.objects.create(tag_rfid="E20100")
+        for _ in range(3):
+            LeituraRFID.objects.create(botijao=lido)
+
+        qs = consulta_botijoes(filtro)
+        self.assertEqual([(b.tag_rfid, b.num_leituras) for b in qs], [("E200FF", 3)])
+        self.assertEqual(totais_botijoes(qs), {"itens": 1, "leituras": 3})
+        self.assertEqual(consulta_eventos(filtro._replace(modo="detalhado")).count(), 3)
+
+    @override_settings(
+        STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+    )
+    def test_total_da_tela_soma_so_leituras_rfid(self):
+        self.client.force_login(User.objects.create_user("relatorio", password="x"))
+        botijao = Botijao.objects.create(tag_rfid="E20000172211014418900000")
+        for _ in range(3):
+            LeituraRFID.objects.create(botijao=botijao)
+        # leitura de código de barras incrementa só o contador do botijão
+        Botijao.objects.filter(pk=botijao.pk).update(total_leituras=9)
+        # fora do filtro de período: leitura antiga
+        antigo = Botijao.objects.create(tag_rfid="E20000172211014418900001")
+        LeituraRFID.objects.create(
+            botijao=antigo, data_hora=timezone.now() - timedelta(days=30)
+        )
+        periodo = {
+            "data_tipo": "leitura",
+            "data_inicio": str(timezone.localdate() - timedelta(days=1)),
+        }
+
+        resposta = self.client.get("/relatorios/", periodo)
+
+        self.assertEqual(resposta.context["total_leituras"], Contagem(3, True))
+        self.assertEqual([b.num_leituras for b in resposta.context["botijoes"]], [3])
+
+        # acima do limite de contagem: "2+", como o total de botijões
+        with override_settings(RFID_CONTAGEM_LIMITE=2):
+            resposta = self.client.get("/relatorios/", periodo)
+        self.assertEqual(str(resposta.context["total_leituras"]), "2+")
+
+
+class PaginacaoKeysetTests(TestCase):
+    def test_ida_e_volta_pelas_paginas(self):
+        ids = [Botijao.objects.create(tag_rfid=f"E2P{i:03d}").id for i in range(7)]
+        ids.reverse()
+        qs = Botijao.objects.all()
+        ordem = ("-data_cadastro", "-id")
+
+        primeira = paginar(qs, ordem, tamanho=3)
+        segunda = paginar(qs, ordem, primeira.proximo, tamanho=3)
+        ultima = paginar(qs, ordem, segunda.proximo, tamanho=3)
+        self.assertEqual([b.id for b in primeira.itens], ids[:3])
+        self.assertEqual([b.id for b in segunda.itens], ids[3:6])
+        self.assertEqual([b.id for b in ultima.itens], ids[6:])
+        self.assertIsNone(primeira.anterior)
+        self.assertIsNone(ultima.proximo)
+
+        volta = paginar(qs, ordem, ultima.anterior, tamanho=3)
+        self.assertEqual([b.id for b in volta.itens], ids[3:6])
+        with self.assertRaises(CursorInvalido):
+            paginar(qs, ordem, "nao-e-cursor", tamanho=3)
+
+        self.assertEqual(contar(qs), (7, True))
+        self.assertEqual(str(contar(qs, limite=5)), "5+")
+
+
+class UltimasLeiturasTests(TestCase):
+    def test_top_n_por_botijao_com_e_sem_window(self):
+        from unittest import mock
+
+        from django.db import connection
+
+        agora = timezone.now()
+        botijoes = [Botijao.objects.create(tag_rfid=f"E2U{i}") for i in range(2)]
+        for b in botijoes:
+            for minutos in range(4):
+                LeituraRFID.objects.create(
+                    botijao=b, data_hora=agora - timedelta(minutes=minutos)
+                )
+        vazio = Botijao.objects.create(tag_rfid="E2U9")
+        ids = [b.id for b in botijoes] + [vazio.id]
+
+        for suporta in (True, False):
+            with mock.patch.object(
+                connection.features, "supports_over_clause", suporta
+            ), self.assertNumQueries(1):
+                ultimas = ultimas_leituras_por_botijao(ids, n=3)
+            for b in botijoes:
+                esperadas = list(
+                    b.leituras.order_by("-data_hora", "-id").values_list(
+                        "id", flat=True
+                    )[:3]
+                )
+                self.assertEqual([l.id for l in ultimas[b.id]], esperadas)
+            self.assertNotIn(vazio.id, ultimas)
+
+
+class UltimaLeituraTests(TestCase):
+    def test_todos_os_caminhos_gravam_a_leitura_mais_recente(self):
+        from django.core.management import call_command
+
+        agora = timezone.now().replace(microsecond=0)
+        antiga = agora - timedelta(hours=2)
+
+        b = Botijao.objects.create(tag_rfid="E2ORM")
+        LeituraRFID.objects.create(botijao=b, data_hora=agora, leitor_id="L1")
+        LeituraRFID.objects.create(botijao=b, data_hora=antiga, leitor_id="L2")
+
+        registrar_leituras_em_lote(
+            [
+                ItemLeitura(tag_rfid="E2LOTE", data_hora=agora, leitor_id="L1"),
+                ItemLeitura(tag_rfid="E2LOTE", data_hora=antiga, leitor_id="L2"),
+            ]
+        )
+        tags = ["E2ORM", "E2LOTE"]
+        if motor_disponivel():
+            for data_hora, leitor in ((agora, "L1"), (antiga, "L2")):
+                registrar_leitura_sql(
+                    ItemLeitura(tag_rfid="E2SQL", data_hora=data_hora, leitor_id=leitor)
+                )
+            tags.append("E2SQL")
+
+        for tag in tags:
+            b = Botijao.objects.get(tag_rfid=tag)
+            self.assertEqual((b.ultima_leitura, b.ultimo_leitor_id), (agora, "L1"))
+
+        # backfill reconstrói o mesmo valor a partir das leituras
+        Botijao.objects.update(ultima_leitura_em=None, ultimo_leitor_id=None)
+        call_command("preencher_ultima_leitura", stdout=StringIO())
+        for tag in tags:
+            b = Botijao.objects.get(tag_rfid=tag)
+            self.assertEqual((b.ultima_leitura, b.ultimo_leitor_id), (agora, "L1"))
+
+        # exportação: uma query só, sem consultar as leituras por linha
+        with self.assertNumQueries(1):
+            datas = [c.ultima_leitura for c in consulta_botijoes(FiltroRelatorio())]
+        self.assertEqual(datas, [agora] * len(tags))
+
+
+class ExportacaoStreamingTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("exporta", password="x"))
+
+    def _planilha(self, **parametros):
+        resposta = self.client.get("/exportar-excel/", parametros)
+        self.assertTrue(resposta.streaming)
+        self.assertIn(".xlsx", resposta["Content-Disposition"])
+        return load_workbook(BytesIO(b"".join(resposta.streaming_content))).active
+
+    def test_consolidado_e_detalhado_em_modo_write_only(self):
+        for i in range(3):
+            LeituraRFID.objects.create(
+                botijao=Botijao.objects.create(tag_rfid=f"E2X{i}"), leitor_id="L1"
+            )
+
+        ws = self._planilha()
+        linhas = list(ws.values)
+        self.assertEqual(len(linhas), 4)
+        self.assertEqual([linha[1] for linha in linhas[1:]], ["E2X0", "E2X1", "E2X2"])
+        self.assertEqual(linhas[1][13], 1)
+        self.assertTrue(ws["A1"].font.bold)
+        self.assertGreater(ws.column_dimensions["A"].width, len("Última Leitura"))
+
+        ws = self._planilha(modo="detalhado")
+        linhas = list(ws.values)
+        self.assertEqual(list(linhas[0]), CABECALHO_DETALHADO)
+        self.assertEqual(len(linhas), 4)
+        self.assertEqual(linhas[1][11], "- → Distribuidora 1")
+
+    def test_largura_pela_amostra_nao_limita_as_linhas(self):
+        linhas = ([str(i)] for i in range(AMOSTRA_LARGURA + 5))
+        with arquivo_xlsx("Teste", ["N"], linhas) as arquivo:
+            self.assertEqual(load_workbook(arquivo).active.max_row, AMOSTRA_LARGURA + 6)
+        self.assertEqual(larguras(["N"], [["x" * 80]]), [50])
+
+
+class ExportacaoTextoTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("bi", password="x"))
+        for i in range(2):
+            LeituraRFID.objects.create(
+                botijao=Botijao.objects.create(
+                    tag_rfid=f"E2000017221101441890000{i}", tara="13.50"
+                )
+            )
+        LeituraCodigoBarra.objects.create(codigo="7891234567890")
+
+    def _baixar(self, **parametros):
+        resposta = self.client.get("/exportar-excel/", parametros)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.streaming)
+        return resposta, b"".join(resposta.streaming_content)
+
+    def test_csv_e_ndjson_de_cada_modo(self):
+        _, corpo = self._baixar(formato="csv")
+        linhas = list(csv.DictReader(corpo.decode().splitlines()))
+        self.assertEqual(
+            [l["tag_rfid"] for l in linhas],
+            ["E20000172211014418900000", "E20000172211014418900001"],
+        )
+        self.assertEqual(
+            (linhas[0]["tara"], linhas[0]["total_leituras"]), ("13.50", "1")
+        )
+
+        resposta, corpo = self._baixar(formato="ndjson", modo="detalhado", tipo="rfid")
+        self.assertEqual(resposta["Content-Type"], "application/x-ndjson")
+        eventos = [json.loads(linha) for linha in corpo.decode().splitlines()]
+        self.assertEqual(len(eventos), 2)
+        self.assertEqual(
+            eventos[0]["dados_novos"]["ultima_envasadora"], "Distribuidora 1"
+        )
+
+        resposta, corpo = self._baixar(
+            formato="ndjson", modo="detalhado", tipo="barcode", gzip="1"
+        )
+        self.assertTrue(resposta["Content-Disposition"].endswith('.ndjson.gz"'))
+        leitura = json.loads(gzip.decompress(corpo))
+        self.assertEqual(
+            (leitura["codigo"], leitura["tipo_identificador"]),
+            ("7891234567890", "barcode"),
+        )
+
+        resposta = self.client.get("/exportar-excel/", {"formato": "pdf"})
+        self.assertEqual(resposta.status_code, 400)
+
+
+@override_settings(
+    RFID_RELATORIOS_ASSINCRONOS=True,
+    RFID_RELATORIOS_BACKOFF_SEGUNDOS=60,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class TarefasRelatorioTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajuste = override_settings(MEDIA_ROOT=self.media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+        self.usuario = User.objects.create_user("supervisor", password="x")
+        self.client.force_login(self.usuario)
+        for i in range(3):
+            LeituraRFID.objects.create(
+                botijao=Botijao.objects.create(tag_rfid=f"E2000017221101441890000{i}")
+            )
+
+    def test_exportacao_enfileirada_com_progresso_e_download(self):
+        resposta = self.client.get("/exportar-excel/", {"formato": "csv"})
+        tarefa = TarefaRelatorio.objects.get()
+        self.assertRedirects(resposta, f"/relatorios/tarefas/{tarefa.pk}/")
+        self.assertEqual(tarefa.status, TarefaRelatorio.STATUS_PENDENTE)
+
+        self.assertEqual(processar_proxima(), tarefa)
+        self.assertIsNone(processar_proxima())
+
+        self.assertContains(
+            self.client.get(f"/relatorios/tarefas/{tarefa.pk}/"), "Baixar arquivo"
+        )
+        estado = self.client.get(f"/relatorios/tarefas/{tarefa.pk}/estado/").json()
+        self.assertEqual(estado["status"], TarefaRelatorio.STATUS_CONCLUIDA)
+        self.assertEqual((estado["progresso"], estado["total"]), (3, 3))
+        self.assertEqual(estado["percentual"], 100)
+        self.assertIsNotNone(estado["duracao_geracao"])
+
+        resposta = self.client.get(estado["download_url"])
+        corpo = b"".join(resposta.streaming_content).decode()
+        self.assertEqual(len(corpo.splitlines()), 4)
+
+        # tarefa de outro usuário não aparece
+        self.client.force_login(User.objects.create_user("outro", password="x"))
+        resposta = self.client.get(f"/relatorios/tarefas/{tarefa.pk}/")
+        self.assertEqual(resposta.status_code, 404)
+
+    def test_metricas_da_web_agregam_as_tarefas_do_banco(self):
+        self.client.get("/exportar-excel/", {"formato": "csv"})
+        self.client.get("/exportar-excel/", {"formato": "ndjson"})
+        processar_proxima()
+        metricas.zerar()  # o worker é outro processo: nada em memória na web
+
+        relatorios = self.client.get("/api/metricas/").json()["relatorios"]
+
+        self.assertEqual(relatorios["por_status"]["concluida"], 1)
+        self.assertEqual(relatorios["por_status"]["pendente"], 1)
+        self.assertEqual(relatorios["concluidas"], 1)
+        tempos = relatorios["tempos"]
+        self.assertGreater(tempos["geracao"]["max"], 0)
+        self.assertGreaterEqual(tempos["total"]["medio"], tempos["geracao"]["medio"])
+        self.assertEqual(tempos["envio"], {"medio": 0.0, "max": 0.0})
+
+    def test_email_com_nova_tentativa_apos_falha(self):
+        resposta = self.client.post(
+            "/enviar-email/", {"destinatario": "gerente@example.com"}
+        )
+        tarefa = TarefaRelatorio.objects.get()
+        self.assertRedirects(
+            resposta, f"/relatorios/tarefas/{tarefa.pk}/", fetch_redirect_response=False
+        )
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=ConnectionError("SMTP fora do ar"),
+        ):
+            processar_proxima()
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, TarefaRelatorio.STATUS_PENDENTE)
+        self.assertEqual(tarefa.tentativas, 1)
+        self.assertIn("SMTP fora do ar", tarefa.erro)
+        self.assertGreater(tarefa.disponivel_em, timezone.now())
+        self.assertEqual(len(mail.outbox), 0)
+
+        # ainda em backoff: nada a processar
+        self.assertIsNone(processar_proxima())
+        arquivo = tarefa.arquivo.name
+        TarefaRelatorio.objects.filter(pk=tarefa.pk).update(
+            disponivel_em=timezone.now()
+        )
+        processar_proxima()
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, TarefaRelatorio.STATUS_CONCLUIDA)
+        self.assertEqual(tarefa.tentativas, 2)
+        # a planilha gerada na primeira tentativa é reaproveitada
+        self.assertEqual(tarefa.arquivo.name, arquivo)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["gerente@example.com"])
+        nome, conteudo, _ = mail.outbox[0].attachments[0]
+        self.assertTrue(nome.endswith(".xlsx"))
+        self.assertEqual(load_workbook(BytesIO(conteudo)).active.max_row, 4)
+
+
+class CacheRelatoriosTests(TestCase):
+    def setUp(self):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, ignore_errors=True)
+        ajuste = override_settings(RFID_RELATORIOS_CACHE_DIR=diretorio)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.diretorio = diretorio
+
+        self.client.force_login(User.objects.create_user("cache", password="x"))
+        LeituraRFID.objects.create(
+            botijao=Botijao.objects.create(tag_rfid="E20000172211014418900000")
+        )
+        metricas.zerar()
+
+    def _baixar(self, **parametros):
+        resposta = self.client.get("/exportar-excel/", parametros)
+        self.assertEqual(resposta.status_code, 200)
+        conteudo = b"".join(resposta.streaming_content)
+        return load_workbook(BytesIO(conteudo)).active.max_row
+
+    def test_repeticao_servida_do_cache_e_leitura_nova_invalida(self):
+        self.assertEqual(self._baixar(), 2)
+        self.assertEqual(self._baixar(), 2)
+        contadores = metricas.snapshot()["contadores"]
+        self.assertEqual(contadores["relatorios.cache.falhas"], 1)
+        self.assertEqual(contadores["relatorios.cache.acertos"], 1)
+
+        # outros filtros: outra entrada
+        self._baixar(modo="detalhado")
+        self.assertEqual(
+            metricas.snapshot()["contadores"]["relatorios.cache.falhas"], 2
+        )
+
+        LeituraRFID.objects.create(
+            botijao=Botijao.objects.create(tag_rfid="E20000172211014418900001")
+        )
+        self.assertEqual(self._baixar(), 3)
+        self.assertEqual(
+            metricas.snapshot()["contadores"]["relatorios.cache.falhas"], 3
+        )
+
+    def test_despejo_lru_por_tamanho(self):
+        for i, nome in enumerate(("antigo", "usado", "novo")):
+            caminho = f"{self.diretorio}/{nome}.xlsx"
+            with open(caminho, "wb") as arquivo:
+                arquivo.write(b"x" * 100)
+            os.utime(caminho, (1000 + i, 1000 + i))
+        # acesso recente ao "antigo" o coloca no fim da fila de despejo
+        os.utime(f"{self.diretorio}/antigo.xlsx", (2000, 2000))
+
+        self.assertEqual(cache_relatorios.despejar(limite=250), 1)
+        self.assertEqual(
+            sorted(os.listdir(self.diretorio)), ["antigo.xlsx", "novo.xlsx"]
+        )
+
+    @override_settings(RFID_RELATORIOS_CACHE_MB=0)
+    def test_cache_desligado(self):
+        self._baixar()
+        self._baixar()
+        self.assertEqual(os.listdir(self.diretorio), [])
+        self.assertNotIn("relatorios.cache.acertos", metricas.snapshot()["contadores"])
+
+
+@override_settings(RFID_DEDUP_JANELA_SEGUNDOS=0, RFID_INGESTAO_ASSINCRONA=False)
+class LoteLeiturasAPITests(TestCase):
+    def setUp(self):
+        limpar_cache_tags()
+        limpar_chaves_recentes()
+        reiniciar_deduplicador()
+        self.addCleanup(reiniciar_deduplicador)
+
+    def _enviar(self, corpo):
+        return self.client.post(
+            "/api/leituras/lote/", json.dumps(corpo), content_type="application/json"
+        )
+
+    @override_settings(RFID_REJEITAR_TAGS_LIXO=True)
+    def test_status_por_item_e_botijoes_criados_em_bulk(self):
+        Botijao.objects.create(tag_rfid="E20000172211014418900000")
+        resposta = self._enviar(
+            {
+                "operador": "PORTAL_01",
+                "leituras": [
+                    {"tag_rfid": "E20000172211014418900000", "antena": 1},
+                    {"tag_rfid": "E20000172211014418900001"},
+                    {"tag_rfid": ""},
+                    {"tag_rfid": "Última leitura:"},
+                    {"tag_rfid": "E20000172211014418900002", "rssi": "forte"},
+                    {"tag_rfid": "E20000172211014418900003"},
+                ],
+            }
+        )
+
+        self.assertEqual(resposta.status_code, 200)
+        corpo = resposta.json()
+        self.assertEqual(
+            [item["status"] for item in corpo["itens"]],
+            ["ok", "ok", "erro", "erro", "erro", "ok"],
+        )
+        self.assertEqual([item["indice"] for item in corpo["itens"]], list(range(6)))
+        self.assertEqual(corpo["itens"][3]["error"], "Tag inválida")
+        self.assertEqual((corpo["registradas"], corpo["erros"]), (3, 3))
+        self.assertEqual(
+            [item.get("criado") for item in corpo["itens"][:2]], [False, True]
+        )
+        self.assertEqual(
+            set(Botijao.objects.values_list("tag_rfid", flat=True)),
+            {f"E2000017221101441890000{i}" for i in (0, 1, 3)},
+        )
+        leitura = LeituraRFID.objects.get(pk=corpo["itens"][0]["id_leitura"])
+        self.assertEqual((leitura.operador, leitura.antena), ("PORTAL_01", 1))
+
+    def test_ciclo_e_auditoria_iguais_ao_fluxo_unitario(self):
+        estados = {
+            "NOVO": {},
+            "MEIO": {
+                "indice_distribuidora": 1,
+                "ultima_envasadora": "Distribuidora 2",
+                "penultima_envasadora": "Distribuidora 1",
+                "data_ultimo_envasamento": date(2024, 5, 2),
+            },
+        }
+        for nome, campos in estados.items():
+            for prefixo in ("UNI-", "LOTE-"):
+                Botijao.objects.create(tag_rfid=f"{prefixo}{nome}", **campos)
+
+        for _ in range(2):
+            for nome in estados:
+                LeituraRFID.objects.create(
+                    botijao=Botijao.objects.get(tag_rfid=f"UNI-{nome}"),
+                    operador="PDA_C72",
+                )
+            self._enviar([{"tag_rfid": f"LOTE-{nome}"} for nome in estados])
+
+        for nome in estados:
+            unitario, lote = (
+                Botijao.objects.get(tag_rfid=f"{prefixo}{nome}")
+                for prefixo in ("UNI-", "LOTE-")
+            )
+            self.assertEqual(
+                [getattr(unitario, c) for c in CAMPOS_CICLO],
+                [getattr(lote, c) for c in CAMPOS_CICLO],
+            )
+            trocas = [
+                list(
+                    LogAuditoria.objects.filter(
+                        botijao=b, dados_anteriores__isnull=False
+                    )
+                    .order_by("id")
+                    .values_list("descricao", "dados_anteriores", "dados_novos")
+                )
+                for b in (unitario, lote)
+            ]
+            self.assertEqual(len(trocas[0]), 2)
+            self.assertEqual(trocas[0], trocas[1])
+            # + um log "Leitura API (lote)" por leitura
+            self.assertEqual(
+                LogAuditoria.objects.filter(
+                    botijao=lote, descricao__startswith="Leitura API (lote)"
+                ).count(),
+                2,
+            )
+
+    @override_settings(RFID_LOTE_MAX_ITENS=2)
+    def test_limite_de_itens(self):
+        resposta = self._enviar([{"tag_rfid": f"LIM-{i}"} for i in range(3)])
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(resposta.json()["error"], "Lote excede 2 itens")
+        self.assertFalse(Botijao.objects.exists())
+
+
+@override_settings(RFID_DEDUP_JANELA_SEGUNDOS=0.2, RFID_INGESTAO_ASSINCRONA=False)
+class DeduplicacaoTests(TestCase):
+    def setUp(self):
+        limpar_cache_tags()
+        limpar_chaves_recentes()
+        reiniciar_deduplicador()
+        self.addCleanup(reiniciar_deduplicador)
+        metricas.zerar()
+
+    def _ler(self, **campos):
+        resposta = self.client.post(
+            "/api/registrar-leitura/",
+            json.dumps({"tag_rfid": "E20000172211014418900000", **campos}),
+            content_type="application/json",
+        )
+        return resposta.status_code, resposta.json()
+
+    def test_repeticao_na_janela_e_suprimida(self):
+        _, primeira = self._ler(leitor_id="portal-1", antena=1)
+        _, repetida = self._ler(leitor_id="portal-1", antena=1)
+
+        self.assertTrue(repetida["duplicada"])
+        self.assertEqual(repetida["id_leitura"], primeira["id_leitura"])
+        self.assertEqual(LeituraRFID.objects.count(), 1)
+        contadores = metricas.snapshot()["contadores"]
+        self.assertEqual(
+            (contadores["dedup.aceitas"], contadores["dedup.suprimidas"]), (1, 1)
+        )
+
+    def test_outro_leitor_ou_antena_nao_e_suprimido(self):
+        self._ler(leitor_id="portal-1", antena=1)
+        self._ler(leitor_id="portal-2", antena=1)
+        self._ler(leitor_id="portal-1", antena=2)
+
+        self.assertEqual(LeituraRFID.objects.count(), 3)
+        self.assertNotIn("dedup.suprimidas", metricas.snapshot()["contadores"])
+
+    def test_leitura_apos_a_janela_e_aceita(self):
+        self._ler(leitor_id="portal-1")
+        time.sleep(0.25)
+        _, depois = self._ler(leitor_id="portal-1")
+
+        self.assertNotIn("duplicada", depois)
+        self.assertEqual(LeituraRFID.objects.count(), 2)
+
+    def test_falha_na_gravacao_libera_a_chave(self):
+        with mock.patch(
+            "rfid.views._gravar_leitura_api", side_effect=RuntimeError("banco fora")
+        ):
+            status, _ = self._ler(leitor_id="portal-1")
+        self.assertEqual(status, 500)
+
+        status, retry = self._ler(leitor_id="portal-1")
+        self.assertEqual(status, 200)
+        self.assertNotIn("duplicada", retry)
+        self.assertEqual(LeituraRFID.objects.count(), 1)
+
+    @override_settings(RFID_DEDUP_BACKEND="cache", RFID_DEDUP_CACHE_ALIAS="default")
+    def test_backend_cache_locmem(self):
+        reiniciar_deduplicador()
+        self.assertIsInstance(obter_deduplicador(), DeduplicadorCache)
+        chave = chave_leitura("E20000172211014418900000", "portal-1", 1)
+
+        self.assertEqual(reservar_leitura(chave), (True, None))
+        obter_deduplicador().confirmar(chave, 42)
+        self.assertEqual(reservar_leitura(chave), (False, 42))
+
+        obter_deduplicador().liberar(chave)
+        self.assertEqual(reservar_leitura(chave), (True, None))
+        time.sleep(0.25)
+        self.assertEqual(reservar_leitura(chave), (True, None))
+
+
+class FilaAssincronaTests(TestCase):
+    def setUp(self):
+        limpar_cache_tags()
+        limpar_chaves_recentes()
+        reiniciar_deduplicador()
+        self.addCleanup(reiniciar_deduplicador)
+
+    def _pendente(self, tag, segundos_atras=0):
+        return LeituraPendente.objects.create(
+            tag_rfid=tag,
+            operador="PORTAL_01",
+            recebida_em=timezone.now() - timedelta(seconds=segundos_atras),
+        )
+
+    @override_settings(RFID_INGESTAO_ASSINCRONA=True)
+    def test_api_responde_202_e_so_enfileira(self):
+        resposta = self.client.post(
+            "/api/registrar-leitura/",
+            json.dumps({"tag_rfid": "E20000172211014418900000"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(resposta.status_code, 202)
+        corpo = resposta.json()
+        self.assertTrue(corpo["pendente"])
+        pendente = LeituraPendente.objects.get(pk=corpo["id_pendente"])
+        self.assertEqual(pendente.tag_rfid, "E20000172211014418900000")
+        self.assertFalse(LeituraRFID.objects.exists())
+        self.assertFalse(Botijao.objects.exists())
+
+    def test_drena_em_lotes_e_informa_lag(self):
+        for i in range(3):
+            self._pendente(f"E2000017221101441890000{i}", segundos_atras=60 - i)
+
+        primeiro = processar_leituras_pendentes(tamanho_lote=2)
+        self.assertEqual((primeiro["processadas"], primeiro["registradas"]), (2, 2))
+        self.assertGreaterEqual(primeiro["lag_segundos"], 60)
+        self.assertEqual(LeituraPendente.objects.count(), 1)
+
+        segundo = processar_leituras_pendentes(tamanho_lote=2)
+        self.assertEqual(segundo["processadas"], 1)
+        self.assertGreaterEqual(segundo["lag_segundos"], 58)
+
+        self.assertEqual(processar_leituras_pendentes(tamanho_lote=2)["processadas"], 0)
+        self.assertEqual(LeituraRFID.objects.count(), 3)
+        self.assertEqual(
+            LogAuditoria.objects.filter(
+                descricao__startswith="Leitura API (assíncrona)"
+            ).count(),
+            3,
+        )
+
+    @override_settings(RFID_FILA_MAX_TENTATIVAS=2)
+    def test_linha_com_defeito_nao_trava_a_fila(self):
+        self._pendente("E20000172211014418900000", segundos_atras=30)
+        ruim = self._pendente("E20000172211014418900001", segundos_atras=20)
+        self._pendente("E20000172211014418900002", segundos_atras=10)
+
+        def lote_com_defeito(itens, **kwargs):
+            if any(item.tag_rfid == ruim.tag_rfid for item in itens):
+                raise RuntimeError("linha corrompida")
+            return registrar_leituras_em_lote(itens, **kwargs)
+
+        with mock.patch(
+            "rfid.utils.ingestao.registrar_leituras_em_lote",
+            side_effect=lote_com_defeito,
+        ):
+            stats = processar_leituras_pendentes()
+            self.assertEqual((stats["processadas"], stats["falhas"]), (2, 1))
+            self.assertEqual(LeituraRFID.objects.count(), 2)
+
+            ruim.refresh_from_db()
+            self.assertEqual(ruim.tentativas, 1)
+            self.assertIn("linha corrompida", ruim.erro)
+
+            self.assertEqual(processar_leituras_pendentes()["falhas"], 1)
+            # esgotou as tentativas: fica parada e não é mais reservada
+            self.assertEqual(processar_leituras_pendentes()["processadas"], 0)
+
+        self.assertEqual(list(LeituraPendente.objects.all()), [ruim])
+        self.assertEqual(
+            estado_fila(), {"pendentes": 0, "lag_segundos": 0.0, "descartadas": 1}
+        )
+
+    def test_metricas_api_mostra_lag_da_fila(self):
+        self.client.force_login(User.objects.create_user("operacao", password="x"))
+        self._pendente("E20000172211014418900000", segundos_atras=120)
+        metricas.zerar()  # a web não roda o worker: nada em memória
+
+        fila = self.client.get("/api/metricas/").json()["fila"]
+
+        self.assertEqual((fila["pendentes"], fila["descartadas"]), (1, 0))
+        self.assertGreaterEqual(fila["lag_segundos"], 120)
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+class FilaSkipLockedTests(TransactionTestCase):
+    def test_worker_pula_linhas_travadas_por_outro(self):
+        travada = LeituraPendente.objects.create(tag_rfid="E20000172211014418900000")
+        LeituraPendente.objects.create(tag_rfid="E20000172211014418900001")
+        travou, liberar = threading.Event(), threading.Event()
+
+        def outro_worker():
+            try:
+                with transaction.atomic():
+                    list(
+                        LeituraPendente.objects.select_for_update().filter(
+                            pk=travada.pk
+                        )
+                    )
+                    travou.set()
+                    liberar.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=outro_worker)
+        thread.start()
+        try:
+            self.assertTrue(travou.wait(5))
+            stats = processar_leituras_pendentes()
+        finally:
+            liberar.set()
+            thread.join()
+
+        self.assertEqual(stats["processadas"], 1)
+        self.assertEqual(list(LeituraPendente.objects.all()), [travada])
+        self.assertEqual(
+            LeituraRFID.objects.get().botijao.tag_rfid, "E20000172211014418900001"
+        )
+
+
+class CacheTagsTests(TestCase):
+    TAG = "E20000172211014418900000"
+
+    def setUp(self):
+        limpar_cache_tags()
+        limpar_chaves_recentes()
+        reiniciar_deduplicador()
+        self.addCleanup(reiniciar_deduplicador)
+        metricas.zerar()
+
+    def _contadores(self, *nomes):
+        contadores = metricas.snapshot()["contadores"]
+        return tuple(contadores.get(f"tags.{nome}", 0) for nome in nomes)
+
+    def _ler(self, tag=TAG):
+        return self.client.post(
+            "/api/registrar-leitura/",
+            json.dumps({"tag_rfid": tag}),
+            content_type="application/json",
+        )
+
+    def test_acertos_e_falhas(self):
+        botijao_id, criado = resolver_botijao(self.TAG)
+        self.assertTrue(criado)
+        self.assertEqual(resolver_botijao(self.TAG), (botijao_id, False))
+        self.assertEqual(self._contadores("cache_hits", "cache_misses"), (1, 1))
+
+    def test_soft_delete_e_restauracao_invalidam(self):
+        botijao_id, _ = resolver_botijao(self.TAG)
+        botijao = Botijao.objects.get(pk=botijao_id)
+
+        botijao.deletar(usuario=None)
+        with self.assertRaises(IntegrityError):
+            # a tag é única: sem cache, não existe botijão ativo para ela
+            resolver_botijao(self.TAG)
+        self.assertEqual(self._contadores("cache_hits", "cache_misses"), (0, 2))
+
+        botijao.restaurar()
+        self.assertEqual(resolver_botijao(self.TAG), (botijao_id, False))
+        self.assertEqual(self._contadores("cache_hits", "cache_misses"), (0, 3))
+
+    def test_edicao_de_tag_invalida_as_duas_tags(self):
+        botijao_id, _ = resolver_botijao(self.TAG)
+        botijao = Botijao.objects.get(pk=botijao_id)
+        botijao.tag_rfid = "E20000172211014418900009"
+        botijao.save()
+
+        self.assertEqual(resolver_botijao("E20000172211014418900009")[0], botijao_id)
+        self.assertNotEqual(resolver_botijao(self.TAG)[0], botijao_id)
+        self.assertEqual(self._contadores("cache_hits"), (0,))
+
+    def test_id_removido_em_outro_worker_nao_recebe_leitura(self):
+        botijao_id, _ = resolver_botijao(self.TAG)
+        # UPDATE direto: o save() (e a invalidação) rodaram em outro processo
+        Botijao.all_objects.filter(pk=botijao_id).update(deletado=True)
+
+        resposta = self._ler()
+
+        self.assertEqual(resposta.status_code, 500)
+        self.assertFalse(LeituraRFID.objects.exists())
+        self.assertEqual(Botijao.all_objects.get(pk=botijao_id).total_leituras, 0)
+        self.assertEqual(self._contadores("cache_obsoletas"), (1,))
+
+    def test_tag_trocada_em_outro_worker_cai_no_banco(self):
+        botijao_id, _ = resolver_botijao(self.TAG)
+        Botijao.all_objects.filter(pk=botijao_id).update(
+            tag_rfid="E20000172211014418900009"
+        )
+
+        resposta = self._ler()
+
+        self.assertEqual(resposta.status_code, 200)
+        leitura = LeituraRFID.objects.get(pk=resposta.json()["id_leitura"])
+        self.assertNotEqual(leitura.botijao_id, botijao_id)
+        self.assertEqual(leitura.botijao.tag_rfid, self.TAG)
+        self.assertEqual(leitura.botijao.total_leituras, 1)
+        self.assertTrue(
+            LogAuditoria.objects.filter(
+                botijao=leitura.botijao, descricao__startswith="Leitura API"
+            ).exists()
+        )
+        self.assertEqual(Botijao.all_objects.get(pk=botijao_id).total_leituras, 0)
+        self.assertEqual(self._contadores("cache_obsoletas"), (1,))
+
+    def test_barcode_com_id_obsoleto_cai_no_banco(self):
+        codigo = "7891234567895"
+        botijao_id, _ = resolver_botijao(codigo)
+        Botijao.all_objects.filter(pk=botijao_id).update(tag_rfid="7891234567000")
+
+        resposta = self.client.post(
+            "/api/barcode/registrar/",
+            json.dumps({"barcode": codigo}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(Botijao.objects.get(tag_rfid=codigo).total_leituras, 1)
+        self.assertEqual(Botijao.all_objects.get(pk=botijao_id).total_leituras, 0)
+
+    def test_leitura_manual_de_tag_nova_e_existente(self):
+        self.client.force_login(User.objects.create_user("operador", password="x"))
+
+        for tag, mensagem in (
+            (
+                "E20000172211014418900009",
+                "Novo botijão cadastrado e leitura registrada",
+            ),
+            (self.TAG, "Leitura registrada"),
+        ):
+            if tag == self.TAG:
+                resolver_botijao(self.TAG)  # já cadastrado e em cache
+            resposta = self.client.post(
+                "/nova-leitura/", {"tag_rfid": tag, "operador": "balcão"}
+            )
+            self.assertRedirects(resposta, "/", fetch_redirect_response=False)
+            mensagens = [str(m) for m in get_messages(resposta.wsgi_request)]
+            self.assertEqual(mensagens[-1], f"{mensagem}. Tag: {tag}")
+            botijao = Botijao.objects.get(tag_rfid=tag)
+            self.assertEqual(botijao.total_leituras, 1)
+            self.assertTrue(
+                LogAuditoria.objects.filter(
+                    botijao=botijao, descricao__startswith="Leitura manual"
+                ).exists()
+            )
+
+    @override_settings(RFID_REJEITAR_TAGS_LIXO=True)
+    def test_cache_negativo_de_tags_lixo(self):
+        with mock.patch(
+            "rfid.utils.cache_tags.eh_lixo", wraps=eh_lixo
+        ) as classificador:
+            for _ in range(3):
+                with self.assertRaises(TagRejeitada):
+                    verificar_tag("Última leitura:")
+            verificar_tag(self.TAG)
+
+        # rejeitada uma vez pelo classificador, depois só pelo cache negativo
+        self.assertEqual(classificador.call_count, 2)
+        self.assertEqual(self._contadores("lixo_rejeitadas"), (3,))
+        self.assertFalse(Botijao.objects.exists())
+
+
+class BackfillNDJSONTests(TestCase):
+    TAG = "E20000172211014418900000"
+
+    def setUp(self):
+        limpar_cache_tags()
+        limpar_chaves_recentes()
+        reiniciar_deduplicador()
+        self.addCleanup(reiniciar_deduplicador)
+
+    def _enviar(self, *linhas):
+        corpo = "\n".join(
+            linha if isinstance(linha, str) else json.dumps(linha) for linha in linhas
+        )
+        return self.client.post(
+            "/api/leituras/ndjson/?leitor_id=pda-07",
+            corpo,
+            content_type="application/x-ndjson",
+        )
+
+    def _leitura(self, dias_atras, tag=TAG):
+        quando = timezone.now().replace(hour=12) - timedelta(days=dias_atras)
+        return {"tag_rfid": tag, "data_hora": quando.isoformat()}
+
+    @override_settings(RFID_LOTE_MAX_ITENS=2)
+    def test_bloco_fora_de_ordem_nao_avanca_o_ciclo(self):
+        resposta = self._enviar(
+            self._leitura(7),
+            self._leitura(6),
+            self._leitura(9),  # bloco 2: mais antiga que o bloco 1
+            self._leitura(5),
+        )
+
+        self.assertEqual(resposta.json()["registradas"], 4)
+        botijao = Botijao.objects.get(tag_rfid=self.TAG)
+        self.assertEqual(botijao.total_leituras, 4)
+        self.assertEqual(botijao.indice_distribuidora, 2)
+        self.assertEqual(
+            (botijao.data_penultimo_envasamento, botijao.data_ultimo_envasamento),
+            (
+                timezone.localdate(timezone.now() - timedelta(days=6)),
+                timezone.localdate(timezone.now() - timedelta(days=5)),
+            ),
+        )
+        self.assertEqual(
+            botijao.ultima_leitura_em.date(),
+            (timezone.now() - timedelta(days=5)).date(),
+        )
+        self.assertEqual(LeituraRFID.objects.filter(botijao=botijao).count(), 4)
+
+    def test_leitura_mais_antiga_que_a_leitura_ao_vivo(self):
+        self.client.post(
+            "/api/registrar-leitura/",
+            json.dumps({"tag_rfid": self.TAG}),
+            content_type="application/json",
+        )
+        botijao = Botijao.objects.get(tag_rfid=self.TAG)
+        ciclo = [getattr(botijao, campo) for campo in CAMPOS_CICLO[1:]]
+        ultima = botijao.ultima_leitura_em
+
+        resposta = self._enviar(self._leitura(1))
+
+        self.assertEqual(resposta.json()["registradas"], 1)
+        botijao.refresh_from_db()
+        self.assertEqual(botijao.total_leituras, 2)
+        self.assertEqual([getattr(botijao, c) for c in CAMPOS_CICLO[1:]], ciclo)
+        self.assertEqual(botijao.ultima_leitura_em, ultima)
+        self.assertEqual(LeituraRFID.objects.filter(botijao=botijao).count(), 2)
+
+    def test_falhas_por_linha(self):
+        futuro = (timezone.now() + timedelta(days=1)).isoformat()
+        resposta = self._enviar(
+            self._leitura(1),
+            "{quebrado",
+            "",
+            {"tag_rfid": ""},
+            {"tag_rfid": self.TAG, "data_hora": futuro},
+            self._leitura(0),
+        )
+
+        corpo = resposta.json()
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            (corpo["linhas"], corpo["registradas"], corpo["erros"]), (5, 2, 3)
+        )
+        self.assertEqual(
+            corpo["falhas"],
+            [
+                {"linha": 2, "error": "JSON inválido"},
+                {"linha": 4, "error": "Tag RFID faltando"},
+                {"linha": 5, "error": "Campo 'data_hora' no futuro"},
+            ],
+        )
+
+
+class IdentificadoresTests(TestCase):
+    def test_classificacao(self):
+        casos = {
+            "E20000172211014418900000": "rfid",  # 24 hex
+            "a2000017221101441890000b": "rfid",
+            "3034257BF7194E40000000010000ABCD": "rfid",  # 32 hex
+            "E2003412": "rfid",  # prefixo E200
+            "123456789-123": "qr",
+            "7891234567895": "barcode",  # EAN-13
+            "12345678": "barcode",  # EAN-8
+            "1234567": "outro",
+            "A2000017221101441890000": "outro",  # 23 hex
+            "E200XYZ": "outro",
+            "Última leitura:": "lixo",
+            "Pesquisar ou digitar URL": "lixo",
+            "\ufeffE20000172211014418900000": "lixo",
+            "": "outro",
+            None: "outro",
+        }
+        for valor, tipo in casos.items():
+            with self.subTest(valor=valor):
+                self.assertEqual(classificar_identificador(valor), tipo)
+
+    def test_comando_classifica_linhas_nulas(self):
+        rfid = Botijao.objects.create(tag_rfid="E20000172211014418900000")
+        deletado = Botijao.objects.create(tag_rfid="7891234567895")
+        deletado.deletar(usuario=None)
+        errado = Botijao.objects.create(tag_rfid="123456789-123")
+        codigo = LeituraCodigoBarra.objects.create(codigo="Última leitura:")
+        Botijao.all_objects.exclude(pk=errado.pk).update(tipo_identificador=None)
+        Botijao.all_objects.filter(pk=errado.pk).update(tipo_identificador="outro")
+        LeituraCodigoBarra.objects.update(tipo_identificador=None)
+
+        call_command("classificar_identificadores", "--lote", "1", stdout=StringIO())
+
+        tipos = dict(Botijao.all_objects.values_list("pk", "tipo_identificador"))
+        self.assertEqual(
+            tipos, {rfid.pk: "rfid", deletado.pk: "barcode", errado.pk: "outro"}
+        )
+        codigo.refresh_from_db()
+        self.assertEqual(codigo.tipo_identificador, "lixo")
+
+        call_command("classificar_identificadores", "--todos", stdout=StringIO())
+        errado.refresh_from_db()
+        self.assertEqual(errado.tipo_identificador, "qr")
@@ -4,7 +4,13 @@ from django.contrib.auth import views as auth_views
 from django.urls import path
 
 from . import views
+from .views_eventos import eventos_dashboard
 from .views_import import confirmar_import, preview_import, upload_xls
+from .views_tarefas import (
+    baixar_tarefa_relatorio,
+    tarefa_relatorio,
+    tarefa_relatorio_api,
+)
 
 urlpatterns = [
     # ========================================
@@ -83,11 +89,29 @@ urlpatterns = [
     path(
         "enviar-relatorio/", views.enviar_email_view, name="enviar_relatorio"
     ),  # Alias para compatibilidade
+    # tarefas em segundo plano (RFID_RELATORIOS_ASSINCRONOS)
+    path(
+        "relatorios/tarefas/<int:tarefa_id>/",
+        tarefa_relatorio,
+        name="tarefa_relatorio",
+    ),
+    path(
+        "relatorios/tarefas/<int:tarefa_id>/estado/",
+        tarefa_relatorio_api,
+        name="tarefa_relatorio_api",
+    ),
+    path(
+        "relatorios/tarefas/<int:tarefa_id>/download/",
+        baixar_tarefa_relatorio,
+        name="baixar_tarefa_relatorio",
+    ),
     # ========================================
     # 🔌 APIs AJAX (Atualização em Tempo Real)
     # ========================================
     path("api/dashboard/", views.dashboard_api, name="dashboard_api"),
     path("api/relatorios/", views.relatorios_api, name="relatorios_api"),
+    path("api/metricas/", views.metricas_api, name="metricas_api"),
+    path("api/eventos/dashboard/", eventos_dashboard, name="eventos_dashboard"),
     # ========================================
     # 📡 API PARA INTEGRAÇÃO RFID
     # ========================================
@@ -96,6 +120,16 @@ urlpatterns = [
         views.api_registrar_leitura,
         name="api_registrar_leitura",
     ),
+    path(
+        "api/leituras/lote/",
+        views.api_registrar_leituras_lote,
+        name="api_registrar_leituras_lote",
+    ),
+    path(
+        "api/leituras/ndjson/",
+        views.api_registrar_leituras_ndjson,
+        name="api_registrar_leituras_ndjson",
+    ),
     # ========================================
     # 🔧 UTILITÁRIOS (DESENVOLVIMENTO)
     # ========================================
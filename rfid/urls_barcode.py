@@ -5,6 +5,7 @@ from .views_barcode import (
     api_registrar_barcode,
     pagina_leitura_barcode,
 )
+from .views_eventos import eventos_barcode
 
 urlpatterns = [
     # Página visual
@@ -12,4 +13,5 @@ urlpatterns = [
     # APIs
     path("registrar/", api_registrar_barcode, name="api_registrar_barcode"),
     path("dashboard/", api_barcode_dashboard, name="api_barcode_dashboard"),
+    path("eventos/", eventos_barcode, name="eventos_barcode"),
 ]
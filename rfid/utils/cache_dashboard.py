@@ -0,0 +1,110 @@
+# rfid/utils/cache_dashboard.py
+"""
+Snapshot do dashboard no cache do Django (alias "dashboard"), compartilhado
+entre workers quando o backend é o de arquivo.
+
+- Cada ingestão confirmada incrementa um contador de versão
+  (`marcar_alteracao`, chamado pelo resumo diário).
+- O snapshot guardado serve enquanto a versão não mudar; com leituras novas
+  ele é recalculado, mas no máximo uma vez a cada RFID_DASHBOARD_CACHE_SEGUNDOS
+  (até lá, todos recebem o mesmo snapshot).
+- Um lock (cache.add) evita que vários workers recalculem ao mesmo tempo:
+  quem não pega o lock devolve o snapshot anterior.
+- Mudanças que não passam pela ingestão (cadastro, requalificação) aparecem
+  quando o snapshot expira (RFID_DASHBOARD_CACHE_MAX_SEGUNDOS).
+
+Métricas (/api/metricas/): dashboard.cache.acertos, dashboard.cache.falhas,
+dashboard.cache.antigos e o tempo de dashboard.calculo.
+"""
+import time
+from typing import Any, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rfid.utils import metricas
+
+ALIAS = "dashboard"
+CHAVE_VERSAO = "rfid:dashboard:versao"
+LOCK_SEGUNDOS = 30
+
+
+class Snapshot(NamedTuple):
+    versao: int  # versão das leituras em que foi calculado
+    dados: Any
+    calculado_em: Optional[float]  # None = cache desligado (recém-calculado)
+
+
+def _cache():
+    return caches[ALIAS]
+
+
+def _intervalo() -> float:
+    return float(getattr(settings, "RFID_DASHBOARD_CACHE_SEGUNDOS", 5))
+
+
+def cache_ativo() -> bool:
+    return _intervalo() > 0
+
+
+def versao_atual() -> int:
+    return _cache().get(CHAVE_VERSAO) or 0
+
+
+def marcar_alteracao() -> None:
+    """Leitura nova gravada: o próximo snapshot (após o intervalo) é recalculado."""
+    cache = _cache()
+    if cache.add(CHAVE_VERSAO, 1, timeout=None):
+        return
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        # chave expirou/foi removida entre o add e o incr
+        cache.set(CHAVE_VERSAO, 1, timeout=None)
+
+
+def obter_snapshot(nome, calcular):
+    """
+    Valor de `calcular()` guardado sob `nome`, recalculado só quando houver
+    leitura nova e o snapshot tiver mais de RFID_DASHBOARD_CACHE_SEGUNDOS.
+    """
+    return obter_snapshot_versionado(nome, calcular).dados
+
+
+def obter_snapshot_versionado(nome, calcular) -> Snapshot:
+    """Como obter_snapshot, devolvendo também a versão e o horário do cálculo."""
+    intervalo = _intervalo()
+    if intervalo <= 0:
+        return Snapshot(versao_atual(), calcular(), None)
+
+    cache = _cache()
+    chave = f"rfid:dashboard:{nome}"
+    versao = versao_atual()
+    snapshot = cache.get(chave)
+
+    if snapshot is not None and (
+        snapshot["versao"] == versao
+        or time.time() - snapshot["calculado_em"] < intervalo
+    ):
+        metricas.incrementar("dashboard.cache.acertos")
+        return Snapshot(**snapshot)
+
+    lock = f"{chave}:calculando"
+    travado = cache.add(lock, 1, timeout=LOCK_SEGUNDOS)
+    if snapshot is not None and not travado:
+        # outro worker já está recalculando
+        metricas.incrementar("dashboard.cache.antigos")
+        return Snapshot(**snapshot)
+
+    metricas.incrementar("dashboard.cache.falhas")
+    try:
+        novo = Snapshot(versao, calcular(), time.time())
+        cache.set(
+            chave,
+            novo._asdict(),
+            timeout=getattr(settings, "RFID_DASHBOARD_CACHE_MAX_SEGUNDOS", 60),
+        )
+    finally:
+        if travado:
+            cache.delete(lock)
+    return novo
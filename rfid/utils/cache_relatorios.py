@@ -0,0 +1,158 @@
+# rfid/utils/cache_relatorios.py
+"""
+Cache em disco dos arquivos de relatório gerados (XLSX do download e do
+e-mail, arquivos das tarefas em segundo plano).
+
+O nome do arquivo é o hash de:
+
+  - filtros normalizados (FiltroRelatorio.parametros()) + formato + gzip;
+  - marca d'água dos dados (validadores.marca_dados_relatorios: data de hoje,
+    MAX(atualizado_em) dos botijões, MAX(id) de leituras RFID, auditoria e
+    leituras de código).
+
+Leitura nova => marca nova => chave nova: entradas antigas nunca são servidas
+e saem pelo despejo LRU. Num acerto o arquivo só é reaberto (e o mtime
+atualizado, que serve de "último acesso"). Ao passar de RFID_RELATORIOS_CACHE_MB
+os arquivos menos usados são apagados.
+
+A gravação é atômica (temporário no mesmo diretório + os.replace): vários
+workers podem gerar a mesma chave ao mesmo tempo sem corromper o arquivo.
+Compartilhado entre os processos da máquina (RFID_RELATORIOS_CACHE_DIR).
+
+Métricas (/api/metricas/): relatorios.cache.acertos, relatorios.cache.falhas,
+relatorios.cache.despejos e relatorios.cache.bytes.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+
+from rfid.utils import metricas
+from rfid.utils.validadores import marca_dados_relatorios
+
+SUFIXO_PARCIAL = ".parcial"
+# temporário de geração abandonado (processo morto no meio) é apagado depois disso
+PARCIAL_MAX_SEGUNDOS = 3600
+
+
+def _diretorio() -> str:
+    diretorio = getattr(
+        settings,
+        "RFID_RELATORIOS_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "rfid-relatorios"),
+    )
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def limite_bytes() -> int:
+    return int(float(getattr(settings, "RFID_RELATORIOS_CACHE_MB", 512)) * 1024**2)
+
+
+def cache_ativo() -> bool:
+    return limite_bytes() > 0
+
+
+def chave(filtro, formato, gzip=False) -> str:
+    partes = {
+        "filtros": filtro.parametros(),
+        "formato": formato,
+        "gzip": bool(gzip),
+        "marca": marca_dados_relatorios(),
+    }
+    canonico = json.dumps(partes, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonico.encode()).hexdigest()
+
+
+def _caminho(chave_arquivo, formato, gzip=False) -> str:
+    extensao = f"{formato}.gz" if gzip else formato
+    return os.path.join(_diretorio(), f"{chave_arquivo}.{extensao}")
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def _entradas():
+    """(mtime, tamanho, caminho) de cada arquivo completo do cache."""
+    entradas = []
+    with os.scandir(_diretorio()) as itens:
+        for item in itens:
+            if not item.is_file():
+                continue
+            try:
+                info = item.stat()
+            except FileNotFoundError:  # apagado por outro processo
+                continue
+            if item.name.endswith(SUFIXO_PARCIAL):
+                if time.time() - info.st_mtime > PARCIAL_MAX_SEGUNDOS:
+                    _remover(item.path)
+                continue
+            entradas.append((info.st_mtime, info.st_size, item.path))
+    return entradas
+
+
+def despejar(limite=None) -> int:
+    """Apaga os arquivos menos usados até o total caber em `limite` bytes."""
+    limite = limite_bytes() if limite is None else limite
+    entradas = sorted(_entradas())
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    apagados = 0
+    for _, tamanho, caminho in entradas:
+        if total <= limite:
+            break
+        _remover(caminho)
+        total -= tamanho
+        apagados += 1
+    if apagados:
+        metricas.incrementar("relatorios.cache.despejos", apagados)
+    metricas.definir("relatorios.cache.bytes", total)
+    return apagados
+
+
+def abrir(filtro, formato, gzip, gerar):
+    """
+    Arquivo binário (aberto, no início) com o relatório. Se ainda não estiver
+    no cache, `gerar(destino)` escreve o conteúdo em `destino`.
+    """
+    if not cache_ativo():
+        arquivo = tempfile.TemporaryFile()
+        gerar(arquivo)
+        arquivo.seek(0)
+        return arquivo
+
+    caminho = _caminho(chave(filtro, formato, gzip), formato, gzip)
+    try:
+        arquivo = open(caminho, "rb")
+    except FileNotFoundError:
+        pass
+    else:
+        try:
+            os.utime(caminho)  # último acesso (LRU)
+        except FileNotFoundError:  # despejado agora; o descritor segue válido
+            pass
+        metricas.incrementar("relatorios.cache.acertos")
+        return arquivo
+
+    metricas.incrementar("relatorios.cache.falhas")
+    temporario = tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(caminho), suffix=SUFIXO_PARCIAL, delete=False
+    )
+    try:
+        with temporario:
+            gerar(temporario)
+        os.replace(temporario.name, caminho)
+    except BaseException:
+        os.unlink(temporario.name)
+        raise
+
+    # aberto antes do despejo: continua legível mesmo se ele mesmo sair
+    arquivo = open(caminho, "rb")
+    despejar()
+    return arquivo
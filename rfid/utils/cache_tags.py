@@ -0,0 +1,111 @@
+# rfid/utils/cache_tags.py
+"""
+Cache tag_rfid -> botijao_id para o caminho quente da ingestão.
+
+A frota (~40k cilindros) é estável e lida repetidamente; com o cache,
+`Botijao.objects.get_or_create(tag_rfid=...)` só vai ao banco no primeiro
+contato com cada tag (por processo).
+
+- LRU limitado (RFID_CACHE_TAGS_MAX) com TTL (RFID_CACHE_TAGS_TTL), que limita
+  o tempo em que outro worker pode enxergar um mapeamento desatualizado
+- invalidado no save()/delete() do Botijao (soft delete, restauração, edição de tag)
+- em outro worker, um id em cache desatualizado é pego pelo UPDATE do contador,
+  que filtra tag e deletado=False (`gravar_com_botijao`): a tag sai do cache e
+  a gravação é refeita resolvendo pelo banco
+- cache negativo opcional (RFID_REJEITAR_TAGS_LIXO): textos-lixo são rejeitados
+  antes de qualquer query
+"""
+from django.conf import settings
+
+from rfid.models import Botijao
+from rfid.utils import metricas
+from rfid.utils.identificadores import eh_lixo
+from rfid.utils.lru import CacheLRU
+
+_cache = None
+_negativo = None
+
+
+def _obter_cache():
+    global _cache
+    if _cache is None:
+        _cache = CacheLRU(
+            getattr(settings, "RFID_CACHE_TAGS_MAX", 50000),
+            ttl=getattr(settings, "RFID_CACHE_TAGS_TTL", 300) or None,
+        )
+    return _cache
+
+
+def _obter_negativo():
+    global _negativo
+    if _negativo is None:
+        _negativo = CacheLRU(1000)
+    return _negativo
+
+
+class TagRejeitada(ValueError):
+    pass
+
+
+def verificar_tag(tag_rfid: str) -> None:
+    """Levanta TagRejeitada para textos-lixo quando RFID_REJEITAR_TAGS_LIXO está ativo."""
+    if not getattr(settings, "RFID_REJEITAR_TAGS_LIXO", False):
+        return
+    negativo = _obter_negativo()
+    if tag_rfid in negativo or eh_lixo(tag_rfid):
+        negativo.set(tag_rfid, True)
+        metricas.incrementar("tags.lixo_rejeitadas")
+        raise TagRejeitada("Tag inválida")
+
+
+def resolver_botijao(tag_rfid: str):
+    """
+    Retorna (botijao_id, criado) para uma tag, criando o botijão se necessário.
+    Equivale a Botijao.objects.get_or_create(tag_rfid=...), sem query quando em cache.
+    """
+    verificar_tag(tag_rfid)
+
+    cache = _obter_cache()
+    botijao_id = cache.get(tag_rfid)
+    if botijao_id is not None:
+        metricas.incrementar("tags.cache_hits")
+        return botijao_id, False
+
+    metricas.incrementar("tags.cache_misses")
+    botijao, criado = Botijao.objects.get_or_create(tag_rfid=tag_rfid)
+    cache.set(tag_rfid, botijao.id)
+    return botijao.id, criado
+
+
+def gravar_com_botijao(tag_rfid: str, gravar):
+    """
+    Resolve a tag e retorna gravar(botijao_id, criado).
+
+    `gravar` confirma o id no próprio UPDATE do contador (filtrando tag_rfid e
+    deletado=False) e levanta Botijao.DoesNotExist se nada casou — id em cache
+    de um botijão removido ou com a tag trocada em outro worker. Nesse caso a
+    tag é esquecida e a gravação é refeita uma vez, resolvendo pelo banco.
+    """
+    botijao_id, criado = resolver_botijao(tag_rfid)
+    try:
+        return gravar(botijao_id, criado)
+    except Botijao.DoesNotExist:
+        metricas.incrementar("tags.cache_obsoletas")
+        invalidar_tag(tag_rfid)
+        botijao_id, criado = resolver_botijao(tag_rfid)
+        return gravar(botijao_id, criado)
+
+
+def invalidar_tag(*tags) -> None:
+    if _cache is None:
+        return
+    for tag in tags:
+        if tag:
+            _cache.pop(tag)
+
+
+def limpar_cache_tags() -> None:
+    if _cache is not None:
+        _cache.clear()
+    if _negativo is not None:
+        _negativo.clear()
@@ -0,0 +1,148 @@
+# rfid/utils/dashboard.py
+"""
+Indicadores do dashboard calculados no banco (compartilhado por `dashboard` e
+`dashboard_api`).
+
+Em vez de um COUNT por dia e de carregar a frota inteira em Python:
+
+  1. leituras por dia  -> soma do resumo diário (ResumoLeituraDiaria), custo
+                          constante independente do histórico de leituras
+  2. requalificação    -> um aggregate com COUNT(CASE WHEN ...) por status
+                          gravado (rfid/utils/requalificacao.py)
+  3. próximas a vencer -> ORDER BY data_proxima_requalificacao LIMIT n
+                          (índice botijao_deletado_requal_idx)
+
+`resumo_dashboard_em_cache` é o que as views usam: o mesmo resumo servido do
+snapshot compartilhado (rfid/utils/cache_dashboard.py).
+"""
+import time
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from rfid.models import Botijao, LeituraRFID, ResumoLeituraDiaria
+from rfid.utils import metricas
+from rfid.utils.cache_dashboard import obter_snapshot_versionado
+from rfid.utils.identificadores import TIPO_RFID
+from rfid.utils.requalificacao import (
+    DIAS_ALERTA_REQUALIFICACAO,
+    STATUS_EM_DIA,
+    STATUS_PENDENTE,
+    STATUS_PROXIMO,
+    STATUS_VENCIDA,
+)
+from rfid.utils.resumo_diario import totais_por_dia
+
+DIAS_GRAFICO = 7
+LIMITE_PROXIMAS = 10
+
+
+def leituras_por_dia(hoje=None, dias=DIAS_GRAFICO):
+    """
+    [{"dia": date, "data": "dd/mm", "total": n}, ...] do mais antigo para hoje.
+    Lida do resumo diário; dias sem leitura entram com 0.
+    """
+    hoje = hoje or timezone.localdate()
+    primeiro = hoje - timedelta(days=dias - 1)
+
+    totais = totais_por_dia(ResumoLeituraDiaria.TIPO_RFID, primeiro, hoje)
+
+    serie = []
+    for i in range(dias):
+        dia = primeiro + timedelta(days=i)
+        serie.append(
+            {"dia": dia, "data": dia.strftime("%d/%m"), "total": totais.get(dia, 0)}
+        )
+    return serie
+
+
+def contagem_requalificacao():
+    """
+    Total da frota, ativos e faixas de requalificação em um único aggregate
+    sobre o status gravado: vencidas / proximas / em_dia / sem_data.
+    """
+    return Botijao.objects.filter(deletado=False).aggregate(
+        total=Count("id"),
+        ativos=Count("id", filter=~Q(status_requalificacao=STATUS_VENCIDA)),
+        vencidas=Count("id", filter=Q(status_requalificacao=STATUS_VENCIDA)),
+        proximas=Count("id", filter=Q(status_requalificacao=STATUS_PROXIMO)),
+        em_dia=Count("id", filter=Q(status_requalificacao=STATUS_EM_DIA)),
+        sem_data=Count("id", filter=Q(status_requalificacao=STATUS_PENDENTE)),
+    )
+
+
+def proximas_requalificacoes(hoje=None, limite=LIMITE_PROXIMAS):
+    """Os `limite` botijões que vencem primeiro dentro da janela de alerta."""
+    hoje = hoje or timezone.localdate()
+    return list(
+        Botijao.objects.filter(
+            deletado=False,
+            data_proxima_requalificacao__gt=hoje,
+            data_proxima_requalificacao__lte=hoje
+            + timedelta(days=DIAS_ALERTA_REQUALIFICACAO),
+        ).order_by("data_proxima_requalificacao", "id")[:limite]
+    )
+
+
+def ultimos_registros(limite=10):
+    """Tabelas da página: últimos botijões RFID cadastrados e últimas leituras."""
+    return {
+        "botijoes": list(
+            Botijao.objects.filter(deletado=False, tipo_identificador=TIPO_RFID)
+            .annotate(num_leituras=Count("leituras"))
+            .order_by("-id")[:limite]
+        ),
+        "ultimas_leituras": list(
+            LeituraRFID.objects.select_related("botijao")
+            .filter(botijao__tipo_identificador=TIPO_RFID)
+            .order_by("-data_hora")[:limite]
+        ),
+    }
+
+
+def resumo_dashboard(hoje=None, incluir_proximas=False, incluir_registros=False):
+    """
+    Todos os KPIs do dashboard em 2 queries (+1 com `incluir_proximas`,
+    +2 com `incluir_registros`).
+    """
+    inicio = time.monotonic()
+    hoje = hoje or timezone.localdate()
+
+    serie = leituras_por_dia(hoje)
+    requal = contagem_requalificacao()
+
+    resumo = {
+        "total_botijoes": requal["total"],
+        "botijoes_ativos": requal["ativos"],
+        "leituras_hoje": serie[-1]["total"],
+        "leituras_7_dias": [
+            {"data": ponto["data"], "total": ponto["total"]} for ponto in serie
+        ],
+        "qtd_requal_vencidas": requal["vencidas"],
+        "qtd_requal_proximas": requal["proximas"],
+        "qtd_requal_em_dia": requal["em_dia"],
+        "qtd_requal_sem_data": requal["sem_data"],
+    }
+    if incluir_proximas:
+        resumo["requal_proximas"] = proximas_requalificacoes(hoje)
+    if incluir_registros:
+        resumo.update(ultimos_registros())
+
+    metricas.registrar_tempo("dashboard.calculo", time.monotonic() - inicio)
+    return resumo
+
+
+def resumo_dashboard_em_cache(
+    incluir_proximas=False, incluir_registros=False, com_versao=False
+):
+    """
+    resumo_dashboard() via snapshot compartilhado (rfid/utils/cache_dashboard.py).
+    Com `com_versao`, devolve o Snapshot inteiro (versão, resumo, calculado_em).
+    """
+    hoje = timezone.localdate()
+    snapshot = obter_snapshot_versionado(
+        f"{hoje.isoformat()}:{int(incluir_proximas)}{int(incluir_registros)}",
+        lambda: resumo_dashboard(hoje, incluir_proximas, incluir_registros),
+    )
+    return snapshot if com_versao else snapshot.dados
@@ -0,0 +1,113 @@
+# rfid/utils/deduplicacao.py
+"""
+Supressão de leituras repetidas (mesma tag no mesmo leitor/antena).
+
+Leitores UHF reportam o mesmo EPC várias vezes por segundo enquanto o
+cilindro está no campo. Dentro da janela RFID_DEDUP_JANELA_SEGUNDOS as
+repetições são descartadas antes de qualquer escrita no banco. A janela é
+deslizante: cada repetição renova o prazo, então um cilindro parado no
+campo gera uma única leitura.
+
+Backends (RFID_DEDUP_BACKEND):
+  - "memoria": CacheLRU por processo, limitado a RFID_DEDUP_MAX_CHAVES
+  - "cache":   cache do Django (RFID_DEDUP_CACHE_ALIAS), compartilhado entre
+               workers quando o backend do cache é compartilhado
+Janela 0 desliga a deduplicação.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from rfid.utils import metricas
+from rfid.utils.lru import CacheLRU
+
+PREFIXO_CACHE = "rfid:dedup:"
+
+
+def chave_leitura(tag_rfid, leitor_id=None, antena=None, operador=None) -> str:
+    """Identidade do leitor: leitor_id (ou operador, quando o coletor não envia) + antena."""
+    leitor = leitor_id or operador or ""
+    return f"{tag_rfid}|{leitor}|{'' if antena is None else antena}"
+
+
+class DeduplicadorNulo:
+    janela = 0
+
+    def reservar(self, chave):
+        return True, None
+
+    def confirmar(self, chave, id_leitura):
+        pass
+
+    def liberar(self, chave):
+        pass
+
+
+class DeduplicadorMemoria:
+    def __init__(self, janela, max_chaves):
+        self.janela = janela
+        self._cache = CacheLRU(max_chaves, ttl=janela)
+
+    def reservar(self, chave):
+        """Retorna (nova, id_leitura_anterior). nova=False => repetição suprimida."""
+        return self._cache.add(chave, None, renovar=True)
+
+    def confirmar(self, chave, id_leitura):
+        self._cache.set(chave, id_leitura)
+
+    def liberar(self, chave):
+        self._cache.pop(chave)
+
+
+class DeduplicadorCache:
+    def __init__(self, janela, alias):
+        self.janela = janela
+        self._cache = caches[alias]
+
+    def reservar(self, chave):
+        chave = PREFIXO_CACHE + chave
+        # add() é atômico nos backends do Django: só um worker vence a corrida
+        if self._cache.add(chave, 0, timeout=self.janela):
+            return True, None
+        self._cache.touch(chave, timeout=self.janela)
+        return False, (self._cache.get(chave) or None)
+
+    def confirmar(self, chave, id_leitura):
+        self._cache.set(PREFIXO_CACHE + chave, id_leitura, timeout=self.janela)
+
+    def liberar(self, chave):
+        self._cache.delete(PREFIXO_CACHE + chave)
+
+
+_deduplicador = None
+
+
+def obter_deduplicador():
+    global _deduplicador
+    if _deduplicador is None:
+        janela = float(getattr(settings, "RFID_DEDUP_JANELA_SEGUNDOS", 0) or 0)
+        backend = getattr(settings, "RFID_DEDUP_BACKEND", "memoria")
+
+        if janela <= 0:
+            _deduplicador = DeduplicadorNulo()
+        elif backend == "cache":
+            _deduplicador = DeduplicadorCache(
+                janela, getattr(settings, "RFID_DEDUP_CACHE_ALIAS", "default")
+            )
+        else:
+            _deduplicador = DeduplicadorMemoria(
+                janela, getattr(settings, "RFID_DEDUP_MAX_CHAVES", 50000)
+            )
+    return _deduplicador
+
+
+def reiniciar_deduplicador():
+    """Descarta a instância atual (ex.: após mudar settings em testes)."""
+    global _deduplicador
+    _deduplicador = None
+
+
+def reservar_leitura(chave):
+    """Atalho usado pelas views: reserva a chave e contabiliza métricas."""
+    nova, id_anterior = obter_deduplicador().reservar(chave)
+    metricas.incrementar("dedup.aceitas" if nova else "dedup.suprimidas")
+    return nova, id_anterior
@@ -0,0 +1,286 @@
+# rfid/utils/eventos.py
+"""
+Eventos incrementais (deltas) para as telas ao vivo via Server-Sent Events.
+
+Cada processo ASGI mantém um `Transmissor` por canal ("dashboard" e "barcode").
+Enquanto houver alguém conectado, uma única tarefa por canal confere a versão
+do cache do dashboard (rfid/utils/cache_dashboard.py) a cada
+RFID_SSE_INTERVALO_MS. Quando chega leitura nova, calcula os deltas uma vez
+e repassa a todas as conexões do processo — o custo acompanha o ritmo das
+leituras, não (telas abertas × frequência de refresh).
+
+Eventos:
+  dashboard: leitura {id, data_hora, botijao{...}}
+             contadores {total_botijoes, leituras_hoje, botijoes_ativos, leituras_7_dias}
+             requalificacao {vencidas, proximas, em_dia, sem_data}
+  barcode:   codigo {codigo, origem, operador, observacao, data_hora}
+             contadores {total_hoje}
+
+Só são enviados os contadores/faixas que mudaram; ao conectar, o cliente
+recebe o estado atual.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+from django.utils import timezone
+
+from rfid.models import LeituraCodigoBarra, LeituraRFID, ResumoLeituraDiaria
+from rfid.utils import metricas
+from rfid.utils.cache_dashboard import versao_atual
+from rfid.utils.dashboard import resumo_dashboard_em_cache
+from rfid.utils.resumo_diario import totais_por_dia
+
+logger = logging.getLogger("rfid")
+
+# eventos de leitura por rodada (o resto chega no próximo tique)
+MAX_LEITURAS_POR_RODADA = 50
+MAX_EVENTOS_NA_FILA = 200
+
+CAMPOS_CONTADORES = ("total_botijoes", "leituras_hoje", "botijoes_ativos")
+FAIXAS_REQUALIFICACAO = ("vencidas", "proximas", "em_dia", "sem_data")
+
+
+def _intervalo() -> float:
+    return int(getattr(settings, "RFID_SSE_INTERVALO_MS", 1000)) / 1000
+
+
+def _data(valor, formato="%d/%m/%Y"):
+    return valor.strftime(formato) if valor else "-"
+
+
+def formatar_sse(evento, dados) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, default=str)}\n\n"
+
+
+# ============================================================
+# CÁLCULO DOS DELTAS (síncrono, roda em thread)
+# ============================================================
+class CanalDashboard:
+    """Estado já publicado do dashboard e cálculo do que mudou desde então."""
+
+    def __init__(self):
+        self.versao = None
+        self.ultima_leitura_id = 0
+        self.contadores = {}
+        self.requalificacao = {}
+
+    def iniciar(self):
+        self.ultima_leitura_id = (
+            LeituraRFID.objects.aggregate(ultimo=Max("id"))["ultimo"] or 0
+        )
+        snapshot = resumo_dashboard_em_cache(com_versao=True)
+        self.versao = snapshot.versao
+        self._estado(snapshot.dados)
+
+    def _estado(self, resumo):
+        contadores = {campo: resumo[campo] for campo in CAMPOS_CONTADORES}
+        contadores["leituras_7_dias"] = resumo["leituras_7_dias"]
+        requalificacao = {
+            faixa: resumo[f"qtd_requal_{faixa}"] for faixa in FAIXAS_REQUALIFICACAO
+        }
+        mudou = {}
+        if contadores != self.contadores:
+            mudou["contadores"] = contadores
+        if requalificacao != self.requalificacao:
+            mudou["requalificacao"] = requalificacao
+        self.contadores, self.requalificacao = contadores, requalificacao
+        return mudou
+
+    def estado_inicial(self):
+        return [
+            ("contadores", self.contadores),
+            ("requalificacao", self.requalificacao),
+        ]
+
+    def atualizar(self):
+        if versao_atual() == self.versao:
+            return []
+
+        eventos = []
+        leituras = list(
+            LeituraRFID.objects.select_related("botijao")
+            .filter(id__gt=self.ultima_leitura_id)
+            .order_by("id")[:MAX_LEITURAS_POR_RODADA]
+        )
+        for leitura in leituras:
+            eventos.append(("leitura", self._leitura(leitura)))
+        if leituras:
+            self.ultima_leitura_id = leituras[-1].id
+
+        # snapshot ainda antigo (dentro do intervalo do cache): a versão não é
+        # marcada como publicada e o próximo tique tenta de novo
+        snapshot = resumo_dashboard_em_cache(com_versao=True)
+        self.versao = snapshot.versao
+        eventos.extend(self._estado(snapshot.dados).items())
+        if len(leituras) == MAX_LEITURAS_POR_RODADA:
+            # ainda há leituras: força nova rodada no próximo tique
+            self.versao = None
+        return eventos
+
+    @staticmethod
+    def _leitura(leitura):
+        b = leitura.botijao
+        return {
+            "id": leitura.id,
+            "data_hora": _data(timezone.localtime(leitura.data_hora), "%d/%m/%Y %H:%M"),
+            "operador": leitura.operador or "-",
+            "botijao": {
+                "id": b.id,
+                "tag_rfid": b.tag_rfid,
+                "numero_serie": b.numero_serie or "-",
+                "tara": str(b.tara) if b.tara is not None else "-",
+                "fabricante": b.fabricante or "-",
+                "data_ultima_requalificacao": _data(b.data_ultima_requalificacao),
+                "data_proxima_requalificacao": _data(b.data_proxima_requalificacao),
+                "penultima_envasadora": b.penultima_envasadora or "-",
+                "data_penultimo_envasamento": _data(b.data_penultimo_envasamento),
+                "ultima_envasadora": b.ultima_envasadora or "-",
+                "data_ultimo_envasamento": _data(b.data_ultimo_envasamento),
+                "total_leituras": b.total_leituras,
+            },
+        }
+
+
+class CanalBarcode:
+    """Leituras de código de barras/QR novas e o total do dia."""
+
+    def __init__(self):
+        self.versao = None
+        self.ultima_leitura_id = 0
+        self.total_hoje = None
+
+    def _total_hoje(self):
+        hoje = timezone.localdate()
+        return totais_por_dia(ResumoLeituraDiaria.TIPO_CODIGO, hoje, hoje).get(hoje, 0)
+
+    def iniciar(self):
+        self.ultima_leitura_id = (
+            LeituraCodigoBarra.objects.aggregate(ultimo=Max("id"))["ultimo"] or 0
+        )
+        self.versao = versao_atual()
+        self.total_hoje = self._total_hoje()
+
+    def estado_inicial(self):
+        return [("contadores", {"total_hoje": self.total_hoje})]
+
+    def atualizar(self):
+        versao = versao_atual()
+        if versao == self.versao:
+            return []
+        self.versao = versao
+
+        eventos = []
+        leituras = list(
+            LeituraCodigoBarra.objects.filter(id__gt=self.ultima_leitura_id).order_by(
+                "id"
+            )[:MAX_LEITURAS_POR_RODADA]
+        )
+        for leitura in leituras:
+            eventos.append(
+                (
+                    "codigo",
+                    {
+                        "codigo": leitura.codigo,
+                        "origem": leitura.origem,
+                        "operador": leitura.operador or "-",
+                        "observacao": leitura.observacao or "-",
+                        "data_hora": _data(
+                            timezone.localtime(leitura.data_hora), "%d/%m/%Y %H:%M:%S"
+                        ),
+                    },
+                )
+            )
+        if leituras:
+            self.ultima_leitura_id = leituras[-1].id
+            if len(leituras) == MAX_LEITURAS_POR_RODADA:
+                # ainda há leituras: força nova rodada no próximo tique
+                self.versao = None
+
+        total = self._total_hoje()
+        if total != self.total_hoje:
+            self.total_hoje = total
+            eventos.append(("contadores", {"total_hoje": total}))
+        return eventos
+
+
+CANAIS = {"dashboard": CanalDashboard, "barcode": CanalBarcode}
+
+
+def _executar(funcao):
+    """Roda em thread: conexão de banco própria, descartada a cada rodada."""
+    close_old_connections()
+    try:
+        return funcao()
+    finally:
+        close_old_connections()
+
+
+# ============================================================
+# DISTRIBUIÇÃO (asyncio, uma tarefa por canal por processo)
+# ============================================================
+class Transmissor:
+    def __init__(self, nome):
+        self.nome = nome
+        self.canal = None
+        self.assinantes = set()
+        self.tarefa = None
+
+    async def assinar(self):
+        """Nova conexão: devolve a fila de eventos, já com o estado atual."""
+        if self.canal is None or self.tarefa is None or self.tarefa.done():
+            canal = CANAIS[self.nome]()
+            await sync_to_async(_executar)(canal.iniciar)
+            self.canal = canal
+
+        fila = asyncio.Queue(MAX_EVENTOS_NA_FILA)
+        for evento in self.canal.estado_inicial():
+            fila.put_nowait(evento)
+        self.assinantes.add(fila)
+        metricas.definir(f"sse.{self.nome}.conexoes", len(self.assinantes))
+
+        if self.tarefa is None or self.tarefa.done():
+            self.tarefa = asyncio.create_task(self._rodar())
+        return fila
+
+    def cancelar(self, fila):
+        self.assinantes.discard(fila)
+        metricas.definir(f"sse.{self.nome}.conexoes", len(self.assinantes))
+
+    def publicar(self, eventos):
+        for fila in list(self.assinantes):
+            for evento in eventos:
+                try:
+                    fila.put_nowait(evento)
+                except asyncio.QueueFull:
+                    # cliente lento: perde eventos, o próximo "contadores" corrige
+                    metricas.incrementar("sse.eventos_descartados")
+                    break
+
+    async def _rodar(self):
+        while self.assinantes:
+            await asyncio.sleep(_intervalo())
+            try:
+                eventos = await sync_to_async(_executar)(self.canal.atualizar)
+            except Exception:
+                logger.exception("Erro ao calcular eventos SSE (%s)", self.nome)
+                continue
+            if eventos:
+                metricas.incrementar(f"sse.{self.nome}.eventos", len(eventos))
+                self.publicar(eventos)
+
+
+_transmissores = {}
+
+
+def obter_transmissor(nome) -> Transmissor:
+    """Um transmissor por canal e por event loop."""
+    loop = asyncio.get_running_loop()
+    transmissor = _transmissores.get((nome, loop))
+    if transmissor is None:
+        transmissor = _transmissores[(nome, loop)] = Transmissor(nome)
+    return transmissor
@@ -5,8 +5,8 @@ from django.conf import settings
 from django.utils import timezone
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 
-# ✅ Mesmo padrão que você usou no dashboard: EPC RFID em HEX longo
-RFID_TAG_REGEX = r"^[0-9A-Fa-f]{24}$|^[0-9A-Fa-f]{32}$"
+from rfid.utils.identificadores import TIPO_RFID
+from rfid.utils.periodo import filtro_periodo
 
 
 def _apply_column_widths(ws, column_widths):
@@ -26,17 +26,15 @@ def _aplicar_filtro_tipo(qs, tipo, field_name):
       - "" / None -> não filtra (exporta tudo)
       - "rfid" -> somente EPC RFID (hex longo)
       - "barcode" -> tudo que NÃO for EPC RFID (códigos de barras)
-    field_name: nome do campo onde está o "código" (ex: "tag_rfid")
+    field_name: campo com o tipo já classificado (ex: "tipo_identificador")
     """
     if not tipo:
         return qs
 
-    lookup = f"{field_name}__regex"
-
     if tipo == "rfid":
-        return qs.filter(**{lookup: RFID_TAG_REGEX})
+        return qs.filter(**{field_name: TIPO_RFID})
     elif tipo == "barcode":
-        return qs.exclude(**{lookup: RFID_TAG_REGEX})
+        return qs.exclude(**{field_name: TIPO_RFID})
 
     # Qualquer valor inesperado: não filtra (modo seguro)
     return qs
@@ -110,15 +108,10 @@ def gerar_excel_botijoes(
     if status:
         botijoes = botijoes.filter(status=status)
 
-    if data_inicio:
-        # aceita string YYYY-MM-DD ou datetime (Django lida bem)
-        botijoes = botijoes.filter(data_cadastro__date__gte=data_inicio)
-
-    if data_fim:
-        botijoes = botijoes.filter(data_cadastro__date__lte=data_fim)
+    botijoes = botijoes.filter(**filtro_periodo("data_cadastro", data_inicio, data_fim))
 
     # ✅ filtro tipo (rfid / barcode / todos)
-    botijoes = _aplicar_filtro_tipo(botijoes, tipo, "tag_rfid")
+    botijoes = _aplicar_filtro_tipo(botijoes, tipo, "tipo_identificador")
 
     # ordenação mantida
     botijoes = botijoes.order_by("-data_cadastro")
@@ -140,9 +133,9 @@ def gerar_excel_botijoes(
         else:
             ws.cell(row, 7, "-").border = border
 
-        if botijao.ultima_leitura:
+        if botijao.ultima_leitura_em:
             ws.cell(
-                row, 8, botijao.ultima_leitura.strftime("%d/%m/%Y %H:%M")
+                row, 8, botijao.ultima_leitura_em.strftime("%d/%m/%Y %H:%M")
             ).border = border
         else:
             ws.cell(row, 8, "-").border = border
@@ -224,8 +217,8 @@ def gerar_excel_leituras(data_inicio=None, data_fim=None, filepath=None, tipo=No
     if data_fim:
         leituras = leituras.filter(data_hora__lte=data_fim)
 
-    # ✅ filtro tipo (rfid / barcode / todos) baseado em leitura.tag_rfid
-    leituras = _aplicar_filtro_tipo(leituras, tipo, "tag_rfid")
+    # ✅ filtro tipo (rfid / barcode / todos) baseado no botijão da leitura
+    leituras = _aplicar_filtro_tipo(leituras, tipo, "botijao__tipo_identificador")
 
     # Dados
     for row, leitura in enumerate(leituras, 2):
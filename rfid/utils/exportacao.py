@@ -0,0 +1,200 @@
+# rfid/utils/exportacao.py
+"""
+Exportação dos relatórios em CSV / NDJSON para cargas grandes (BI):
+`/exportar-excel/?formato=csv|ndjson[&gzip=1]`, com os mesmos filtros da tela.
+
+Cada modo do relatório sai da consulta do motor (rfid/utils/relatorios.py):
+
+  consolidado          -> botijões (consulta_botijoes)
+  detalhado RFID       -> trocas de envasadora (LogAuditoria, consulta_eventos)
+  detalhado QR/barcode -> leituras de código (LeituraCodigoBarra, consulta_leituras_codigo)
+
+As linhas vêm de `values_list(...).iterator(chunk_size=RFID_EXPORTACAO_CHUNK)`
+(tuplas, sem instanciar modelos; cursor no servidor no PostgreSQL) e são
+agrupadas em blocos de ~64 KB enviados direto no StreamingHttpResponse —
+opcionalmente comprimidos em gzip no caminho. Valores crus (códigos de status,
+datas ISO 8601 no fuso local, JSON dos logs), sem formatação de planilha.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from rfid.utils.planilhas import acompanhar, nome_arquivo, tamanho_lote
+from rfid.utils.relatorios import (
+    DETALHE_BARCODE_QR,
+    DETALHE_RFID_TROCA,
+    FiltroRelatorio,
+    consulta_botijoes,
+    consulta_eventos,
+    consulta_leituras_codigo,
+)
+
+FORMATO_XLSX = "xlsx"
+FORMATO_CSV = "csv"
+FORMATO_NDJSON = "ndjson"
+FORMATOS = (FORMATO_XLSX, FORMATO_CSV, FORMATO_NDJSON)
+
+TAMANHO_BLOCO = 64 * 1024
+
+CONTENT_TYPES = {
+    FORMATO_CSV: "text/csv; charset=utf-8",
+    FORMATO_NDJSON: "application/x-ndjson",
+}
+
+# (nome da coluna no arquivo, caminho no values_list)
+COLUNAS_BOTIJOES = (
+    ("id", "id"),
+    ("tag_rfid", "tag_rfid"),
+    ("tipo_identificador", "tipo_identificador"),
+    ("numero_serie", "numero_serie"),
+    ("fabricante", "fabricante"),
+    ("tara", "tara"),
+    ("status", "status"),
+    ("status_requalificacao", "status_requalificacao"),
+    ("data_ultima_requalificacao", "data_ultima_requalificacao"),
+    ("data_proxima_requalificacao", "data_proxima_requalificacao"),
+    ("penultima_envasadora", "penultima_envasadora"),
+    ("data_penultimo_envasamento", "data_penultimo_envasamento"),
+    ("ultima_envasadora", "ultima_envasadora"),
+    ("data_ultimo_envasamento", "data_ultimo_envasamento"),
+    ("total_leituras", "num_leituras"),
+    ("ultima_leitura_em", "ultima_leitura_em"),
+    ("ultimo_leitor_id", "ultimo_leitor_id"),
+    ("data_cadastro", "data_cadastro"),
+)
+COLUNAS_EVENTOS = (
+    ("id", "id"),
+    ("data_hora", "data_hora"),
+    ("botijao_id", "botijao_id"),
+    ("tag_rfid", "botijao__tag_rfid"),
+    ("numero_serie", "botijao__numero_serie"),
+    ("status", "botijao__status"),
+    ("status_requalificacao", "botijao__status_requalificacao"),
+    ("descricao", "descricao"),
+    ("dados_anteriores", "dados_anteriores"),
+    ("dados_novos", "dados_novos"),
+)
+COLUNAS_LEITURAS_CODIGO = (
+    ("id", "id"),
+    ("data_hora", "data_hora"),
+    ("codigo", "codigo"),
+    ("tipo_identificador", "tipo_identificador"),
+    ("origem", "origem"),
+    ("operador", "operador"),
+    ("observacao", "observacao"),
+)
+
+
+def consulta_exportacao(filtro: FiltroRelatorio):
+    """(nome do conjunto, queryset, colunas) do modo pedido."""
+    if filtro.detalhe == DETALHE_RFID_TROCA:
+        return "eventos", consulta_eventos(filtro), COLUNAS_EVENTOS
+    if filtro.detalhe == DETALHE_BARCODE_QR:
+        return (
+            "leituras_codigo",
+            consulta_leituras_codigo(filtro),
+            COLUNAS_LEITURAS_CODIGO,
+        )
+    return (
+        "botijoes",
+        consulta_botijoes(filtro, ordem=("id",)),
+        COLUNAS_BOTIJOES,
+    )
+
+
+def _tuplas(qs, colunas, ao_avancar=None):
+    caminhos = [caminho for _, caminho in colunas]
+    tuplas = qs.values_list(*caminhos).iterator(chunk_size=tamanho_lote())
+    return acompanhar(tuplas, ao_avancar)
+
+
+# ============================================================
+# SERIALIZAÇÃO
+# ============================================================
+def _valor_json(valor):
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f"{type(valor).__name__} não serializável")
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date, Decimal)):
+        return _valor_json(valor)
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def blocos_csv(qs, colunas, ao_avancar=None):
+    """Cabeçalho + linhas CSV em blocos de ~TAMANHO_BLOCO bytes."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow([nome for nome, _ in colunas])
+    for linha in _tuplas(qs, colunas, ao_avancar):
+        escritor.writerow([_valor_csv(valor) for valor in linha])
+        if buffer.tell() >= TAMANHO_BLOCO:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def blocos_ndjson(qs, colunas, ao_avancar=None):
+    """Um objeto JSON por linha, em blocos de ~TAMANHO_BLOCO bytes."""
+    nomes = [nome for nome, _ in colunas]
+    codificador = json.JSONEncoder(ensure_ascii=False, default=_valor_json)
+    partes, tamanho = [], 0
+    for linha in _tuplas(qs, colunas, ao_avancar):
+        texto = codificador.encode(dict(zip(nomes, linha)))
+        partes.append(texto)
+        tamanho += len(texto) + 1
+        if tamanho >= TAMANHO_BLOCO:
+            yield ("\n".join(partes) + "\n").encode()
+            partes, tamanho = [], 0
+    if partes:
+        yield ("\n".join(partes) + "\n").encode()
+
+
+def comprimir_gzip(blocos):
+    """Comprime o fluxo em gzip conforme os blocos são gerados."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloco in blocos:
+        dados = compressor.compress(bloco)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+def gerar_texto(filtro: FiltroRelatorio, formato, gzip=False, ao_avancar=None):
+    """(blocos de bytes, content type, nome do arquivo) do CSV/NDJSON."""
+    nome, qs, colunas = consulta_exportacao(filtro)
+    gerar = blocos_csv if formato == FORMATO_CSV else blocos_ndjson
+    blocos = gerar(qs, colunas, ao_avancar)
+    content_type = CONTENT_TYPES[formato]
+    arquivo = nome_arquivo(f"relatorio_{nome}", formato)
+    if gzip:
+        blocos = comprimir_gzip(blocos)
+        content_type = "application/gzip"
+        arquivo += ".gz"
+    return blocos, content_type, arquivo
+
+
+def resposta_texto(filtro: FiltroRelatorio, formato, gzip=False):
+    """Download CSV/NDJSON do relatório em streaming."""
+    blocos, content_type, arquivo = gerar_texto(filtro, formato, gzip)
+    resposta = StreamingHttpResponse(blocos, content_type=content_type)
+    resposta["Content-Disposition"] = f'attachment; filename="{arquivo}"'
+    resposta["X-Accel-Buffering"] = "no"
+    return resposta
@@ -0,0 +1,101 @@
+# rfid/utils/idempotencia.py
+"""
+Idempotência da ingestão: o coletor pode enviar `seq` (sequencial por
+`leitor_id`) ou `id_cliente` (UUID) em cada leitura.
+
+A chave fica gravada em LeituraRFID.chave_idempotencia (índice único) e as
+chaves recentes ficam em um LRU por processo. Um retry após falha de rede
+devolve o `id_leitura` original sem nenhuma escrita (e, se a chave ainda
+estiver no LRU, sem nenhuma query).
+"""
+import uuid
+from typing import Optional
+
+from django.conf import settings
+
+from rfid.models import LeituraRFID
+from rfid.utils import metricas
+from rfid.utils.lru import CacheLRU
+
+_recentes = None
+
+
+def _obter_recentes():
+    global _recentes
+    if _recentes is None:
+        _recentes = CacheLRU(getattr(settings, "RFID_IDEMPOTENCIA_MAX_CHAVES", 100000))
+    return _recentes
+
+
+def montar_chave(leitor_id=None, seq=None, id_cliente=None) -> Optional[str]:
+    """
+    "uuid:<id_cliente>" ou "<leitor_id>#<seq>"; None quando o coletor não
+    enviou identificador. Levanta ValueError se o identificador for inválido.
+    """
+    if id_cliente not in (None, ""):
+        try:
+            return f"uuid:{uuid.UUID(str(id_cliente))}"
+        except ValueError:
+            raise ValueError("Campo 'id_cliente' inválido")
+
+    if seq in (None, ""):
+        return None
+    if not leitor_id:
+        raise ValueError("Campo 'seq' exige 'leitor_id'")
+    try:
+        seq = int(seq)
+    except (TypeError, ValueError):
+        raise ValueError("Campo 'seq' inválido")
+    if seq < 0:
+        raise ValueError("Campo 'seq' inválido")
+    return f"{leitor_id}#{seq}"
+
+
+def leitura_recente(chave) -> Optional[int]:
+    """id_leitura de uma chave vista recentemente neste processo (sem query)."""
+    if not chave:
+        return None
+    id_leitura = _obter_recentes().get(chave)
+    if id_leitura is not None:
+        metricas.incrementar("idempotencia.repetidas")
+    return id_leitura
+
+
+def buscar_leituras(chaves) -> dict:
+    """{chave: id_leitura} das chaves já gravadas (LRU primeiro, depois o banco)."""
+    recentes = _obter_recentes()
+    encontradas = {}
+    faltantes = set()
+    for chave in chaves:
+        id_leitura = recentes.get(chave)
+        if id_leitura is None:
+            faltantes.add(chave)
+        else:
+            encontradas[chave] = id_leitura
+
+    if faltantes:
+        for chave, id_leitura in LeituraRFID.objects.filter(
+            chave_idempotencia__in=faltantes
+        ).values_list("chave_idempotencia", "id"):
+            recentes.set(chave, id_leitura)
+            encontradas[chave] = id_leitura
+
+    if encontradas:
+        metricas.incrementar("idempotencia.repetidas", len(encontradas))
+    return encontradas
+
+
+def buscar_leitura(chave) -> Optional[int]:
+    if not chave:
+        return None
+    return buscar_leituras([chave]).get(chave)
+
+
+def lembrar(chave, id_leitura) -> None:
+    if chave:
+        _obter_recentes().set(chave, id_leitura)
+
+
+def limpar_chaves_recentes() -> None:
+    if _recentes is not None:
+        _recentes.clear()
@@ -0,0 +1,56 @@
+# rfid/utils/identificadores.py
+"""
+Regras sobre os identificadores lidos (tag_rfid / código).
+
+"Lixo" são textos que alguns coletores enviam por engano (rótulos da tela,
+barra de endereço do navegador, BOM).
+
+`classificar_identificador` grava o tipo uma vez (Botijao/LeituraCodigoBarra
+.tipo_identificador), para os relatórios filtrarem por igualdade indexada em
+vez de regex/icontains sobre a tabela inteira.
+"""
+import re
+
+TEXTOS_LIXO_EXATOS = ("última leitura:",)
+TRECHOS_LIXO = ("Pesquisar ou digitar URL", "\ufeff")
+
+# ordem de precedência igual à dos relatórios: rfid > qr > barcode
+RFID_TAG_RE = re.compile(r"[0-9A-Fa-f]{24}|[0-9A-Fa-f]{32}|E200[0-9A-Fa-f]+")
+QR_DECODED_RE = re.compile(r"[0-9]{9}-[0-9]{3}")
+BARCODE_RE = re.compile(r"[0-9]{8,14}")
+
+TIPO_RFID = "rfid"
+TIPO_QR = "qr"
+TIPO_BARCODE = "barcode"
+TIPO_LIXO = "lixo"
+TIPO_OUTRO = "outro"
+
+TIPO_IDENTIFICADOR_CHOICES = [
+    (TIPO_RFID, "RFID"),
+    (TIPO_QR, "QR Code"),
+    (TIPO_BARCODE, "Código de Barras"),
+    (TIPO_LIXO, "Lixo"),
+    (TIPO_OUTRO, "Outro"),
+]
+
+
+def eh_lixo(valor: str) -> bool:
+    if not valor:
+        return False
+    if valor.lower() in TEXTOS_LIXO_EXATOS:
+        return True
+    return any(trecho.lower() in valor.lower() for trecho in TRECHOS_LIXO)
+
+
+def classificar_identificador(valor: str) -> str:
+    """rfid | qr | barcode | lixo | outro"""
+    if eh_lixo(valor):
+        return TIPO_LIXO
+    valor = valor or ""
+    if RFID_TAG_RE.fullmatch(valor):
+        return TIPO_RFID
+    if QR_DECODED_RE.fullmatch(valor):
+        return TIPO_QR
+    if BARCODE_RE.fullmatch(valor):
+        return TIPO_BARCODE
+    return TIPO_OUTRO
@@ -0,0 +1,573 @@
+# rfid/utils/ingestao.py
+"""
+Ingestão de leituras RFID em lote.
+
+Aplica as mesmas regras de `LeituraRFID.save()` (contador, ciclo de
+envasadoras e auditoria), mas para N leituras com poucas queries:
+
+  1. resolve todas as tags em uma única consulta (com lock)
+  2. cria botijões faltantes e leituras via bulk_create (+ upsert do resumo diário)
+  3. avança o ciclo em memória, grava com bulk_update e gera os logs via bulk_create
+
+Tudo dentro de uma única transação.
+
+Também abriga a fila assíncrona (LeituraPendente): a API apenas enfileira e o
+comando `processar_leituras_pendentes` drena a fila usando o mesmo lote.
+
+`ingerir_lote` junta tudo (tag-lixo, deduplicação, fila ou gravação) e é a
+porta de entrada comum da API de lote e do WebSocket.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from rfid.models import (
+    Botijao,
+    LeituraPendente,
+    LeituraRFID,
+    LogAuditoria,
+    ResumoLeituraDiaria,
+)
+from rfid.utils import idempotencia, metricas
+from rfid.utils.cache_tags import verificar_tag
+from rfid.utils.identificadores import classificar_identificador
+from rfid.utils.deduplicacao import chave_leitura, obter_deduplicador, reservar_leitura
+from rfid.utils.resumo_diario import contabilizar_leituras
+
+logger = logging.getLogger("rfid")
+
+OPERADOR_PADRAO = "PDA_C72"
+OBSERVACAO_PADRAO = "Leitura Mobile"
+
+# relógio do coletor pode estar um pouco adiantado; além disso, rejeita
+TOLERANCIA_FUTURO = timedelta(minutes=5)
+
+
+def max_itens_lote() -> int:
+    return int(getattr(settings, "RFID_LOTE_MAX_ITENS", 1000))
+
+
+def ingestao_assincrona() -> bool:
+    return bool(getattr(settings, "RFID_INGESTAO_ASSINCRONA", False))
+
+
+def _data_ciclo(data_hora):
+    """Data gravada no ciclo de envasadoras (mesma regra do fluxo unitário: dia local)."""
+    return timezone.localdate(data_hora)
+
+
+class ItemLeitura(NamedTuple):
+    tag_rfid: str
+    operador: str = OPERADOR_PADRAO
+    observacao: str = OBSERVACAO_PADRAO
+    rssi: Optional[int] = None
+    antena: Optional[int] = None
+    leitor_id: Optional[str] = None
+    data_hora: Optional[datetime] = None
+    chave_idempotencia: Optional[str] = None
+
+
+def _int_ou_none(valor, campo):
+    if valor in (None, ""):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Campo '{campo}' inválido")
+
+
+def _data_hora_ou_none(valor):
+    """ISO 8601 (sem fuso = fuso do projeto) ou epoch em segundos."""
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        try:
+            data_hora = datetime.fromtimestamp(valor, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError("Campo 'data_hora' inválido")
+    else:
+        try:
+            data_hora = parse_datetime(str(valor))
+        except ValueError:
+            data_hora = None
+        if data_hora is None:
+            raise ValueError("Campo 'data_hora' inválido")
+        if timezone.is_naive(data_hora):
+            data_hora = timezone.make_aware(data_hora)
+
+    if data_hora > timezone.now() + TOLERANCIA_FUTURO:
+        raise ValueError("Campo 'data_hora' no futuro")
+    return data_hora
+
+
+def item_de_dict(data, padrao=None) -> ItemLeitura:
+    """
+    Converte um objeto JSON de leitura em ItemLeitura.
+
+    `padrao` (opcional) traz valores do cabeçalho do lote (operador, observacao, leitor_id).
+    `data_hora` (opcional) é o horário da leitura no coletor (backfill offline).
+    `seq` (com `leitor_id`) ou `id_cliente` (UUID) tornam o envio idempotente.
+    Levanta ValueError com mensagem amigável se o item for inválido.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Item deve ser um objeto JSON")
+
+    padrao = padrao or {}
+
+    tag_rfid = str(data.get("tag_rfid") or "").strip()
+    if not tag_rfid:
+        raise ValueError("Tag RFID faltando")
+
+    operador = str(
+        data.get("operador") or padrao.get("operador") or OPERADOR_PADRAO
+    ).strip()
+    observacao = str(
+        data.get("observacao") or padrao.get("observacao") or OBSERVACAO_PADRAO
+    ).strip()
+    leitor_id = str(data.get("leitor_id") or padrao.get("leitor_id") or "").strip()
+
+    return ItemLeitura(
+        tag_rfid=tag_rfid,
+        operador=operador,
+        observacao=observacao,
+        rssi=_int_ou_none(data.get("rssi"), "rssi"),
+        antena=_int_ou_none(data.get("antena"), "antena"),
+        leitor_id=leitor_id or None,
+        data_hora=_data_hora_ou_none(data.get("data_hora")),
+        chave_idempotencia=idempotencia.montar_chave(
+            leitor_id, data.get("seq"), data.get("id_cliente")
+        ),
+    )
+
+
+def registrar_leituras_em_lote(
+    itens, usuario=None, descricao_origem="Leitura API (lote)"
+):
+    """
+    Registra uma lista de ItemLeitura em uma única transação.
+
+    `item.data_hora` (opcional) é gravado em LeituraRFID.data_hora; sem ele,
+    vale o horário do processamento.
+
+    Itens cuja `chave_idempotencia` já foi gravada (ou se repete no próprio
+    lote) não geram escrita: voltam como "duplicada" com o id original.
+
+    Retorna uma lista de resultados na mesma ordem de `itens`:
+      {"tag_rfid", "status": "ok", "id_leitura", "criado"}
+      {"tag_rfid", "status": "duplicada", "id_leitura"}
+      {"tag_rfid", "status": "erro", "error"}
+    """
+    if not itens:
+        return []
+
+    tags = {item.tag_rfid for item in itens}
+    agora = timezone.now()
+
+    with transaction.atomic():
+        # 1) Resolve todas as tags com uma query (lock em ordem de id evita deadlock)
+        botijoes = {
+            b.tag_rfid: b
+            for b in Botijao.all_objects.select_for_update()
+            .filter(tag_rfid__in=tags)
+            .only(*Botijao.CAMPOS_CICLO, *Botijao.CAMPOS_LEITURA, "deletado")
+            .order_by("id")
+        }
+
+        # 2) Cria botijões faltantes (ignore_conflicts tolera criação concorrente)
+        novas_tags = tags - botijoes.keys()
+        if novas_tags:
+            Botijao.all_objects.bulk_create(
+                [
+                    Botijao(
+                        tag_rfid=tag, tipo_identificador=classificar_identificador(tag)
+                    )
+                    for tag in sorted(novas_tags)
+                ],
+                ignore_conflicts=True,
+            )
+            botijoes.update(
+                {
+                    b.tag_rfid: b
+                    for b in Botijao.all_objects.select_for_update()
+                    .filter(tag_rfid__in=novas_tags)
+                    .only(*Botijao.CAMPOS_CICLO, *Botijao.CAMPOS_LEITURA, "deletado")
+                    .order_by("id")
+                }
+            )
+
+        # Reenvios (retry do coletor): chaves já gravadas não geram escrita
+        chaves = {item.chave_idempotencia for item in itens if item.chave_idempotencia}
+        gravadas = idempotencia.buscar_leituras(chaves) if chaves else {}
+        vistas = {}
+
+        resultados = []
+        aceitos = []
+        for item in itens:
+            chave = item.chave_idempotencia
+            if chave in gravadas:
+                resultados.append(
+                    {
+                        "tag_rfid": item.tag_rfid,
+                        "status": "duplicada",
+                        "id_leitura": gravadas[chave],
+                    }
+                )
+                continue
+            if chave in vistas:
+                resultados.append(
+                    {
+                        "tag_rfid": item.tag_rfid,
+                        "status": "duplicada",
+                        "leitura": vistas[chave],
+                    }
+                )
+                continue
+
+            botijao = botijoes.get(item.tag_rfid)
+            if botijao is None or botijao.deletado:
+                resultados.append(
+                    {
+                        "tag_rfid": item.tag_rfid,
+                        "status": "erro",
+                        "error": "Botijão deletado",
+                    }
+                )
+                continue
+
+            leitura = LeituraRFID(
+                botijao_id=botijao.id,
+                operador=item.operador,
+                observacao=item.observacao,
+                rssi=item.rssi,
+                antena=item.antena,
+                leitor_id=item.leitor_id,
+                data_hora=item.data_hora or agora,
+                chave_idempotencia=chave,
+            )
+            if chave:
+                vistas[chave] = leitura
+            aceitos.append((item, botijao, leitura))
+            resultados.append(
+                {
+                    "tag_rfid": item.tag_rfid,
+                    "status": "ok",
+                    "criado": item.tag_rfid in novas_tags,
+                    "leitura": leitura,
+                }
+            )
+
+        # leituras com horário do coletor (backfill) avançam o ciclo na ordem
+        # cronológica; sort estável mantém a ordem de chegada nos empates
+        aceitos.sort(key=lambda aceito: aceito[2].data_hora)
+
+        # 3) Insere leituras (bulk_create não passa por LeituraRFID.save())
+        LeituraRFID.objects.bulk_create([leitura for _, _, leitura in aceitos])
+        contabilizar_leituras(
+            ResumoLeituraDiaria.TIPO_RFID, [leitura for _, _, leitura in aceitos]
+        )
+
+        # 4) Contador + ciclo em memória (uma leitura = um avanço, como no fluxo unitário).
+        # A ordenação acima vale só para este lote: leitura mais antiga que a
+        # última já aplicada ao botijão (backfill em outro lote/bloco) é gravada
+        # e contada, mas não avança o ciclo.
+        logs = []
+        alterados = {}
+        for item, botijao, leitura in aceitos:
+            if botijao._leitura_em_ordem(leitura.data_hora):
+                antes = botijao._snapshot_ciclo()
+                botijao._aplicar_proximo_ciclo(_data_ciclo(leitura.data_hora))
+                depois = botijao._snapshot_ciclo()
+                logs.append(
+                    LogAuditoria(
+                        botijao_id=botijao.id,
+                        acao="leitura",
+                        usuario=None,
+                        descricao=Botijao._descricao_troca_envasadora(antes, depois),
+                        dados_anteriores=antes,
+                        dados_novos=depois,
+                    )
+                )
+            botijao.total_leituras += 1
+            botijao._registrar_ultima_leitura(leitura.data_hora, leitura.leitor_id)
+            alterados[botijao.id] = botijao
+
+            logs.append(
+                LogAuditoria(
+                    botijao_id=botijao.id,
+                    acao="leitura",
+                    usuario=usuario,
+                    descricao=f"{descricao_origem}. Op: {item.operador}",
+                    dados_anteriores=None,
+                    dados_novos={"leitura_id": leitura.id},
+                )
+            )
+
+        if alterados:
+            Botijao.all_objects.bulk_update(
+                list(alterados.values()),
+                fields=[*Botijao.CAMPOS_CICLO[2:], *Botijao.CAMPOS_LEITURA],
+            )
+        LogAuditoria.objects.bulk_create(logs)
+
+    for resultado in resultados:
+        leitura = resultado.pop("leitura", None)
+        if leitura is not None:
+            resultado["id_leitura"] = leitura.id
+    for leitura in vistas.values():
+        idempotencia.lembrar(leitura.chave_idempotencia, leitura.id)
+
+    logger.info(
+        "Lote RFID registrado | itens=%s | aceitos=%s | novos_botijoes=%s",
+        len(itens),
+        len(aceitos),
+        len(novas_tags),
+    )
+    return resultados
+
+
+def ingerir_lote(itens, usuario=None, descricao_origem="Leitura API (lote)"):
+    """
+    Fluxo completo de ingestão de N leituras já validadas (ItemLeitura):
+
+      0. devolve o id original de reenvios recentes (chave de idempotência)
+      1. rejeita tags-lixo (RFID_REJEITAR_TAGS_LIXO)
+      2. descarta repetições dentro da janela de deduplicação
+      3. modo assíncrono: enfileira; senão registra com `registrar_leituras_em_lote`
+
+    Retorna um resultado por item, na mesma ordem, com "status" em
+    ok | duplicada | pendente | erro. Se a gravação falhar, as chaves de
+    deduplicação reservadas são liberadas e a exceção é propagada.
+    """
+    resultados = [None] * len(itens)
+
+    # repetições (no lote ou em envios recentes) são descartadas antes da transação
+    reservados = []
+    for indice, item in enumerate(itens):
+        # retry de uma leitura recente: devolve o id original sem query
+        id_original = idempotencia.leitura_recente(item.chave_idempotencia)
+        if id_original is not None:
+            resultados[indice] = {
+                "tag_rfid": item.tag_rfid,
+                "status": "duplicada",
+                "id_leitura": id_original,
+            }
+            continue
+
+        try:
+            verificar_tag(item.tag_rfid)
+        except ValueError as e:
+            resultados[indice] = {
+                "tag_rfid": item.tag_rfid,
+                "status": "erro",
+                "error": str(e),
+            }
+            continue
+
+        chave = chave_leitura(item.tag_rfid, item.leitor_id, item.antena, item.operador)
+        nova, id_anterior = reservar_leitura(chave)
+        if nova:
+            reservados.append((indice, item, chave))
+        else:
+            resultados[indice] = {
+                "tag_rfid": item.tag_rfid,
+                "status": "duplicada",
+                "id_leitura": id_anterior,
+            }
+
+    deduplicador = obter_deduplicador()
+    aceitos = [item for _, item, _ in reservados]
+
+    try:
+        if ingestao_assincrona():
+            gravados = [
+                {"tag_rfid": item.tag_rfid, "status": "pendente", "id_pendente": id_}
+                for item, id_ in zip(aceitos, enfileirar_leituras(aceitos))
+            ]
+        else:
+            gravados = registrar_leituras_em_lote(
+                aceitos, usuario=usuario, descricao_origem=descricao_origem
+            )
+    except Exception:
+        for _, _, chave in reservados:
+            deduplicador.liberar(chave)
+        raise
+
+    for (indice, _, chave), resultado in zip(reservados, gravados):
+        resultados[indice] = resultado
+        if resultado["status"] in ("ok", "duplicada"):
+            deduplicador.confirmar(chave, resultado["id_leitura"])
+        elif resultado["status"] == "erro":
+            deduplicador.liberar(chave)
+
+    return resultados
+
+
+# ============================================================
+# FILA ASSÍNCRONA
+# ============================================================
+def enfileirar_leituras(itens):
+    """Grava os itens na fila (LeituraPendente) com um único INSERT. Retorna os ids."""
+    agora = timezone.now()
+    pendentes = LeituraPendente.objects.bulk_create(
+        [
+            LeituraPendente(
+                tag_rfid=item.tag_rfid,
+                operador=item.operador,
+                observacao=item.observacao,
+                rssi=item.rssi,
+                antena=item.antena,
+                leitor_id=item.leitor_id,
+                chave_idempotencia=item.chave_idempotencia,
+                recebida_em=item.data_hora or agora,
+            )
+            for item in itens
+        ]
+    )
+    metricas.incrementar("fila.enfileiradas", len(pendentes))
+    return [p.id for p in pendentes]
+
+
+def max_tentativas_fila() -> int:
+    return max(1, int(getattr(settings, "RFID_FILA_MAX_TENTATIVAS", 3)))
+
+
+def _aplicar_pendentes(pendentes) -> list:
+    itens = [
+        ItemLeitura(
+            tag_rfid=p.tag_rfid,
+            operador=p.operador,
+            observacao=p.observacao,
+            rssi=p.rssi,
+            antena=p.antena,
+            leitor_id=p.leitor_id,
+            data_hora=p.recebida_em,
+            chave_idempotencia=p.chave_idempotencia,
+        )
+        for p in pendentes
+    ]
+    resultados = registrar_leituras_em_lote(
+        itens, descricao_origem="Leitura API (assíncrona)"
+    )
+    LeituraPendente.objects.filter(id__in=[p.id for p in pendentes]).delete()
+    return resultados
+
+
+def _aplicar_uma_a_uma(pendentes):
+    """
+    Reprocessa um lote que falhou, cada linha no próprio savepoint: as boas são
+    aplicadas e removidas; as que falham ganham +1 tentativa e o erro, e deixam
+    de ser reservadas ao chegar em RFID_FILA_MAX_TENTATIVAS.
+    """
+    resultados, falhas = [], []
+    for pendente in pendentes:
+        try:
+            with transaction.atomic():
+                resultados.extend(_aplicar_pendentes([pendente]))
+        except Exception as erro:
+            logger.exception(
+                "Leitura pendente falhou | id=%s | tag=%s | tentativa=%s",
+                pendente.id,
+                pendente.tag_rfid,
+                pendente.tentativas + 1,
+            )
+            pendente.tentativas += 1
+            pendente.erro = f"{type(erro).__name__}: {erro}"
+            pendente.save(update_fields=["tentativas", "erro"])
+            falhas.append(pendente)
+    return resultados, falhas
+
+
+def processar_leituras_pendentes(tamanho_lote=500) -> dict:
+    """
+    Drena um lote da fila: trava as linhas com SKIP LOCKED (vários workers podem
+    rodar em paralelo sem disputar as mesmas linhas), aplica o fluxo de lote e
+    remove as pendentes processadas — tudo na mesma transação.
+
+    Se o lote inteiro falhar, as linhas são reprocessadas uma a uma (ver
+    `_aplicar_uma_a_uma`): uma linha com defeito não trava o resto da fila.
+
+    Retorna {"processadas", "registradas", "erros", "falhas", "lag_segundos",
+    "duracao_segundos"}.
+    """
+    inicio = time.monotonic()
+
+    with transaction.atomic():
+        pendentes = list(
+            LeituraPendente.objects.select_for_update(skip_locked=True)
+            .filter(tentativas__lt=max_tentativas_fila())
+            .order_by("id")[:tamanho_lote]
+        )
+        if not pendentes:
+            return {
+                "processadas": 0,
+                "registradas": 0,
+                "erros": 0,
+                "falhas": 0,
+                "lag_segundos": 0.0,
+                "duracao_segundos": 0.0,
+            }
+
+        try:
+            with transaction.atomic():
+                resultados, falhas = _aplicar_pendentes(pendentes), []
+        except Exception:
+            logger.exception(
+                "Lote da fila falhou; reprocessando %s linhas uma a uma",
+                len(pendentes),
+            )
+            resultados, falhas = _aplicar_uma_a_uma(pendentes)
+
+    erros = [r for r in resultados if r["status"] == "erro"]
+    for r in erros:
+        logger.warning(
+            "Leitura pendente descartada | tag=%s | erro=%s", r["tag_rfid"], r["error"]
+        )
+
+    lag = (timezone.now() - pendentes[0].recebida_em).total_seconds()
+    duracao = time.monotonic() - inicio
+
+    # valores deste worker; o lag visto pela web vem de estado_fila()
+    metricas.incrementar("fila.processadas", len(pendentes) - len(falhas))
+    metricas.incrementar("fila.erros", len(erros))
+    metricas.incrementar("fila.falhas", len(falhas))
+    metricas.definir("fila.lag_segundos", lag)
+    metricas.registrar_tempo("fila.lote", duracao)
+
+    return {
+        "processadas": len(pendentes) - len(falhas),
+        "registradas": sum(1 for r in resultados if r["status"] == "ok"),
+        "erros": len(erros),
+        "falhas": len(falhas),
+        "lag_segundos": lag,
+        "duracao_segundos": duracao,
+    }
+
+
+def estado_fila() -> dict:
+    """
+    Estado da fila lido do banco (o mesmo em qualquer processo, ao contrário
+    de `metricas`, que é da memória de cada worker):
+
+      pendentes     — linhas ainda a processar
+      lag_segundos  — idade da pendente mais antiga (0 com a fila vazia)
+      descartadas   — linhas que esgotaram RFID_FILA_MAX_TENTATIVAS
+    """
+    limite = max_tentativas_fila()
+    ativas = LeituraPendente.objects.filter(tentativas__lt=limite).aggregate(
+        pendentes=Count("id"), mais_antiga=Min("recebida_em")
+    )
+    mais_antiga = ativas["mais_antiga"]
+    return {
+        "pendentes": ativas["pendentes"],
+        "lag_segundos": (
+            (timezone.now() - mais_antiga).total_seconds() if mais_antiga else 0.0
+        ),
+        "descartadas": LeituraPendente.objects.filter(tentativas__gte=limite).count(),
+    }
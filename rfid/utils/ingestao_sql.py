@@ -0,0 +1,327 @@
+# rfid/utils/ingestao_sql.py
+"""
+Motor de ingestão "set-based" para uma leitura RFID.
+
+O fluxo ORM (`LeituraRFID.save()` + `Botijao.avancar_envasadora_por_leitura`)
+faz ~7 idas ao banco e mantém o lock da linha enquanto o Python monta os
+snapshots de auditoria. Aqui o mesmo resultado sai de poucas instruções:
+
+  PostgreSQL:
+    1) INSERT ... ON CONFLICT DO NOTHING (upsert do botijão, devolve id)
+    2) um único WITH: lock + UPDATE do contador/ciclo + INSERT da leitura,
+       devolvendo os valores antes/depois via RETURNING
+    3) INSERT dos logs de auditoria montados a partir do RETURNING
+
+  SQLite (fallback, requer RETURNING — 3.35+):
+    mesmas regras, em instruções separadas dentro da transação
+    (o SQLite já serializa escritores).
+
+Outros bancos caem no fluxo ORM (`_registrar_leitura_orm`), com o mesmo
+retorno e as mesmas regras.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from rfid.models import Botijao, LeituraRFID, LogAuditoria, ResumoLeituraDiaria
+from rfid.utils.identificadores import classificar_identificador
+from rfid.utils.resumo_diario import contabilizar_leituras
+
+logger = logging.getLogger("rfid")
+
+CAMPOS_RETORNO = (
+    "indice_distribuidora",
+    "ultima_envasadora",
+    "penultima_envasadora",
+    "data_ultimo_envasamento",
+    "data_penultimo_envasamento",
+)
+
+
+def _q(nome):
+    return connection.ops.quote_name(nome)
+
+
+def _colunas_e_valores(obj):
+    """Colunas/valores de INSERT (sem pk), aplicando defaults e auto_now_add como o ORM."""
+    campos = [f for f in obj._meta.concrete_fields if not f.primary_key]
+    colunas = [_q(f.column) for f in campos]
+    valores = [
+        f.get_db_prep_save(f.pre_save(obj, add=True), connection=connection)
+        for f in campos
+    ]
+    return colunas, valores
+
+
+def _set_ciclo(prefixo, hoje, leitura):
+    """
+    Expressões SET (e parâmetros) do avanço de ciclo (mesmas regras de
+    Botijao._aplicar_proximo_ciclo) e da última leitura.
+    `prefixo` indica de onde vêm os valores "antes" ("" = a própria linha).
+
+    Tudo atrás do mesmo CASE de Botijao.atualizacao_ultima_leitura: leitura
+    mais antiga que a última já aplicada (backfill fora de ordem) só conta,
+    sem avançar o ciclo (Botijao._leitura_em_ordem).
+    """
+    data_hora = LeituraRFID._meta.get_field("data_hora").get_db_prep_save(
+        leitura.data_hora, connection=connection
+    )
+    idx = f"{prefixo}{_q('indice_distribuidora')}"
+    proximo = f"(COALESCE({idx} + 1, 0)) %% 4"
+    ultima = _q("ultima_leitura_em")
+    mais_recente = f"({ultima} IS NULL OR {ultima} <= %s)"
+
+    ciclo = (
+        ("indice_distribuidora", proximo, []),
+        (
+            "penultima_envasadora",
+            f"CASE WHEN {idx} IS NULL THEN {prefixo}{_q('penultima_envasadora')} "
+            f"ELSE {prefixo}{_q('ultima_envasadora')} END",
+            [],
+        ),
+        (
+            "data_penultimo_envasamento",
+            f"CASE WHEN {idx} IS NULL THEN {prefixo}{_q('data_penultimo_envasamento')} "
+            f"ELSE {prefixo}{_q('data_ultimo_envasamento')} END",
+            [],
+        ),
+        ("ultima_envasadora", f"'Distribuidora ' || ({proximo} + 1)", []),
+        ("data_ultimo_envasamento", "%s", [hoje]),
+    )
+    sets = [f"{_q('total_leituras')} = {_q('total_leituras')} + 1"]
+    params = []
+    for coluna, valor, valores in ciclo:
+        sets.append(
+            f"{_q(coluna)} = CASE WHEN {mais_recente} THEN {valor} "
+            f"ELSE {prefixo}{_q(coluna)} END"
+        )
+        params += [data_hora, *valores]
+    for coluna, valor in (
+        ("ultima_leitura_em", data_hora),
+        ("ultimo_leitor_id", leitura.leitor_id),
+    ):
+        sets.append(
+            f"{_q(coluna)} = CASE WHEN {mais_recente} THEN %s ELSE {_q(coluna)} END"
+        )
+        params += [data_hora, valor]
+    return ",\n            ".join(sets), params
+
+
+def _botijao_de_linha(linha):
+    """Converte valores crus (RETURNING) em um Botijao só com os campos do ciclo."""
+    valores = {
+        nome: Botijao._meta.get_field(nome).to_python(valor)
+        for nome, valor in zip(CAMPOS_RETORNO, linha)
+    }
+    return Botijao(**valores)
+
+
+def motor_disponivel() -> bool:
+    if connection.vendor == "postgresql":
+        return True
+    return (
+        connection.vendor == "sqlite"
+        and connection.features.can_return_columns_from_insert
+    )
+
+
+def motor_sql_ativo() -> bool:
+    """True quando RFID_INGESTAO_MOTOR="sql" e o banco suporta o motor."""
+    return (
+        getattr(settings, "RFID_INGESTAO_MOTOR", "orm") == "sql" and motor_disponivel()
+    )
+
+
+def _upsert_botijao(cursor, tag_rfid):
+    """Retorna (botijao_id, deletado, criado)."""
+    tabela = _q(Botijao._meta.db_table)
+    colunas, valores = _colunas_e_valores(
+        Botijao(
+            tag_rfid=tag_rfid, tipo_identificador=classificar_identificador(tag_rfid)
+        )
+    )
+    placeholders = ", ".join(["%s"] * len(valores))
+
+    cursor.execute(
+        f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({_q('tag_rfid')}) DO NOTHING "
+        f"RETURNING {_q('id')}, {_q('deletado')}",
+        valores,
+    )
+    linha = cursor.fetchone()
+    if linha:
+        return linha[0], bool(linha[1]), True
+
+    cursor.execute(
+        f"SELECT {_q('id')}, {_q('deletado')} FROM {tabela} WHERE {_q('tag_rfid')} = %s",
+        [tag_rfid],
+    )
+    linha = cursor.fetchone()
+    return linha[0], bool(linha[1]), False
+
+
+def _avancar_postgres(cursor, botijao_id, hoje, leitura):
+    """Lock + UPDATE do ciclo + INSERT da leitura em uma instrução. Retorna (antes, depois, id)."""
+    tabela = _q(Botijao._meta.db_table)
+    colunas, valores = _colunas_e_valores(leitura)
+    campos = ", ".join(_q(c) for c in CAMPOS_RETORNO)
+    placeholders = ", ".join(["%s"] * len(valores))
+    set_ciclo, params_ciclo = _set_ciclo("antes.", hoje, leitura)
+
+    cursor.execute(
+        f"""
+        WITH antes AS (
+            SELECT {_q('id')}, {campos}
+            FROM {tabela} WHERE {_q('id')} = %s
+            FOR UPDATE
+        ),
+        depois AS (
+            UPDATE {tabela} AS b SET {set_ciclo}
+            FROM antes WHERE b.{_q('id')} = antes.{_q('id')}
+            RETURNING {", ".join(f"antes.{_q(c)} AS antes_{c}" for c in CAMPOS_RETORNO)},
+                      {", ".join(f"b.{_q(c)} AS depois_{c}" for c in CAMPOS_RETORNO)}
+        ),
+        nova_leitura AS (
+            INSERT INTO {_q(LeituraRFID._meta.db_table)} ({", ".join(colunas)})
+            VALUES ({placeholders})
+            RETURNING {_q('id')}
+        )
+        SELECT depois.*, nova_leitura.{_q('id')} FROM depois CROSS JOIN nova_leitura
+        """,
+        [botijao_id, *params_ciclo, *valores],
+    )
+    linha = cursor.fetchone()
+    if linha is None:  # removido entre o upsert e o lock
+        raise ValueError("Botijão deletado")
+    n = len(CAMPOS_RETORNO)
+    return linha[:n], linha[n : 2 * n], linha[-1]
+
+
+def _avancar_sqlite(cursor, botijao_id, hoje, leitura):
+    tabela = _q(Botijao._meta.db_table)
+    campos = ", ".join(_q(c) for c in CAMPOS_RETORNO)
+
+    cursor.execute(f"SELECT {campos} FROM {tabela} WHERE {_q('id')} = %s", [botijao_id])
+    antes = cursor.fetchone()
+    if antes is None:  # removido entre o upsert e a leitura
+        raise ValueError("Botijão deletado")
+
+    set_ciclo, params_ciclo = _set_ciclo("", hoje, leitura)
+    cursor.execute(
+        f"UPDATE {tabela} SET {set_ciclo} WHERE {_q('id')} = %s RETURNING {campos}",
+        [*params_ciclo, botijao_id],
+    )
+    depois = cursor.fetchone()
+
+    colunas, valores = _colunas_e_valores(leitura)
+    cursor.execute(
+        f"INSERT INTO {_q(LeituraRFID._meta.db_table)} ({', '.join(colunas)}) "
+        f"VALUES ({', '.join(['%s'] * len(valores))}) RETURNING {_q('id')}",
+        valores,
+    )
+    return antes, depois, cursor.fetchone()[0]
+
+
+def _registrar_leitura_orm(item, usuario=None, descricao_log=None):
+    """Mesmo contrato de registrar_leitura_sql pelo fluxo ORM (LeituraRFID.save)."""
+    with transaction.atomic():
+        botijao, criado = Botijao.all_objects.get_or_create(tag_rfid=item.tag_rfid)
+        if botijao.deletado:
+            raise ValueError("Botijão deletado")
+
+        leitura = LeituraRFID.objects.create(
+            botijao=botijao,
+            operador=item.operador,
+            observacao=item.observacao,
+            rssi=item.rssi,
+            antena=item.antena,
+            leitor_id=item.leitor_id,
+            data_hora=item.data_hora or timezone.now(),
+            chave_idempotencia=item.chave_idempotencia,
+        )
+        if descricao_log:
+            LogAuditoria.objects.create(
+                botijao=botijao,
+                acao="leitura",
+                usuario=usuario,
+                descricao=descricao_log,
+                dados_anteriores=None,
+                dados_novos={"leitura_id": leitura.id},
+            )
+
+    return {"id_leitura": leitura.id, "botijao_id": botijao.id, "criado": criado}
+
+
+def registrar_leitura_sql(item, usuario=None, descricao_log=None):
+    """
+    Registra um ItemLeitura com o motor set-based.
+
+    Produz os mesmos dados do fluxo ORM: leitura, contador, ciclo de envasadoras
+    e o log "Envasadora atualizada automaticamente..." (+ log de origem, se
+    `descricao_log` for informado).
+
+    Retorna {"id_leitura", "botijao_id", "criado"}.
+    Levanta ValueError se o botijão estiver deletado.
+    Em bancos sem o motor, grava pelo fluxo ORM.
+    """
+    if not motor_disponivel():
+        return _registrar_leitura_orm(item, usuario, descricao_log)
+
+    data_hora = item.data_hora or timezone.now()
+    hoje = connection.ops.adapt_datefield_value(timezone.localdate(data_hora))
+    avancar = (
+        _avancar_postgres if connection.vendor == "postgresql" else _avancar_sqlite
+    )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        botijao_id, deletado, criado = _upsert_botijao(cursor, item.tag_rfid)
+        if deletado:
+            raise ValueError("Botijão deletado")
+
+        leitura = LeituraRFID(
+            botijao_id=botijao_id,
+            operador=item.operador,
+            observacao=item.observacao,
+            rssi=item.rssi,
+            antena=item.antena,
+            leitor_id=item.leitor_id,
+            data_hora=data_hora,
+            chave_idempotencia=item.chave_idempotencia,
+        )
+        linha_antes, linha_depois, leitura_id = avancar(
+            cursor, botijao_id, hoje, leitura
+        )
+        contabilizar_leituras(ResumoLeituraDiaria.TIPO_RFID, [leitura])
+
+        antes = _botijao_de_linha(linha_antes)._snapshot_ciclo()
+        depois = _botijao_de_linha(linha_depois)._snapshot_ciclo()
+
+        # leitura fora de ordem não mexe no ciclo: sem log de troca (como no ORM)
+        logs = []
+        if depois != antes:
+            logs.append(
+                LogAuditoria(
+                    botijao_id=botijao_id,
+                    acao="leitura",
+                    usuario=None,
+                    descricao=Botijao._descricao_troca_envasadora(antes, depois),
+                    dados_anteriores=antes,
+                    dados_novos=depois,
+                )
+            )
+        if descricao_log:
+            logs.append(
+                LogAuditoria(
+                    botijao_id=botijao_id,
+                    acao="leitura",
+                    usuario=usuario,
+                    descricao=descricao_log,
+                    dados_anteriores=None,
+                    dados_novos={"leitura_id": leitura_id},
+                )
+            )
+        LogAuditoria.objects.bulk_create(logs)
+
+    return {"id_leitura": leitura_id, "botijao_id": botijao_id, "criado": criado}
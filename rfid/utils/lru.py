@@ -0,0 +1,97 @@
+# rfid/utils/lru.py
+"""
+Cache LRU em memória (por processo), thread-safe, com TTL opcional.
+
+Usado nos caminhos quentes de ingestão (deduplicação, resolução de tags,
+chaves de idempotência). Cada worker do gunicorn tem a sua instância.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    def __init__(self, max_itens: int, ttl: float = None):
+        self.max_itens = max(1, int(max_itens))
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._dados = OrderedDict()  # chave -> (expira_em | None, valor)
+        self._lock = threading.Lock()
+
+    def _expira_em(self):
+        return time.monotonic() + self.ttl if self.ttl else None
+
+    def _vivo(self, chave):
+        """Retorna o par (expira_em, valor) se a chave existir e não tiver expirado."""
+        par = self._dados.get(chave)
+        if par is None:
+            return None
+        expira_em = par[0]
+        if expira_em is not None and expira_em <= time.monotonic():
+            del self._dados[chave]
+            return None
+        return par
+
+    def _gravar(self, chave, valor):
+        self._dados[chave] = (self._expira_em(), valor)
+        self._dados.move_to_end(chave)
+        while len(self._dados) > self.max_itens:
+            self._dados.popitem(last=False)
+
+    def get(self, chave, default=None):
+        with self._lock:
+            par = self._vivo(chave)
+            if par is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._dados.move_to_end(chave)
+            return par[1]
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._gravar(chave, valor)
+
+    def add(self, chave, valor, renovar=False):
+        """
+        Grava somente se a chave estiver ausente/expirada (operação atômica).
+        Retorna (gravou, valor_atual). Com `renovar=True` a chave existente
+        tem o TTL reiniciado (janela deslizante).
+        """
+        with self._lock:
+            par = self._vivo(chave)
+            if par is None:
+                self._gravar(chave, valor)
+                return True, valor
+            if renovar:
+                self._gravar(chave, par[1])
+            else:
+                self._dados.move_to_end(chave)
+            return False, par[1]
+
+    def pop(self, chave, default=None):
+        with self._lock:
+            par = self._dados.pop(chave, _AUSENTE)
+            return default if par is _AUSENTE else par[1]
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+    def __contains__(self, chave):
+        with self._lock:
+            return self._vivo(chave) is not None
+
+    def stats(self) -> dict:
+        return {
+            "itens": len(self._dados),
+            "max_itens": self.max_itens,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
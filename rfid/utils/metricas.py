@@ -0,0 +1,58 @@
+# rfid/utils/metricas.py
+"""
+Métricas simples em memória (por processo).
+
+- contadores: incrementar("dedup.suprimidas")
+- tempos: registrar_tempo("dashboard.calculo", 0.123)  -> qtd/total/max
+- valores: definir("fila.lag_segundos", 4.2)
+
+Expostas em /api/metricas/. Cada worker do gunicorn mantém os próprios números.
+"""
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_contadores = defaultdict(int)
+_tempos = {}
+_valores = {}
+
+
+def incrementar(nome: str, n: int = 1) -> None:
+    with _lock:
+        _contadores[nome] += n
+
+
+def registrar_tempo(nome: str, segundos: float) -> None:
+    with _lock:
+        atual = _tempos.setdefault(nome, {"qtd": 0, "total": 0.0, "max": 0.0})
+        atual["qtd"] += 1
+        atual["total"] += segundos
+        atual["max"] = max(atual["max"], segundos)
+
+
+def definir(nome: str, valor) -> None:
+    with _lock:
+        _valores[nome] = valor
+
+
+def snapshot() -> dict:
+    with _lock:
+        tempos = {
+            nome: {
+                **t,
+                "medio": (t["total"] / t["qtd"]) if t["qtd"] else 0.0,
+            }
+            for nome, t in _tempos.items()
+        }
+        return {
+            "contadores": dict(_contadores),
+            "tempos": tempos,
+            "valores": dict(_valores),
+        }
+
+
+def zerar() -> None:
+    with _lock:
+        _contadores.clear()
+        _tempos.clear()
+        _valores.clear()
@@ -0,0 +1,212 @@
+# rfid/utils/paginacao.py
+"""
+Paginação por cursor (keyset) para as listas grandes: relatórios, busca de
+histórico, histórico do botijão e /api/relatorios/.
+
+Em vez de OFFSET (que lê e descarta todas as linhas anteriores), a página
+seguinte começa depois da chave da última linha mostrada:
+
+    WHERE (data_cadastro, id) < (:ultima_data, :ultimo_id)
+    ORDER BY data_cadastro DESC, id DESC LIMIT :tamanho + 1
+
+O custo de qualquer página é o de ler `tamanho` linhas do índice. A ordem
+precisa terminar num campo único (id) e os campos não podem ser nulos.
+
+Totais: `contar` faz um COUNT limitado a RFID_CONTAGEM_LIMITE linhas; acima
+disso devolve a estimativa do planejador (PostgreSQL) ou "limite+".
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import NamedTuple, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+
+PARAMETRO_CURSOR = "cursor"
+MAX_POR_PAGINA = 500
+
+
+class Pagina(NamedTuple):
+    itens: list
+    proximo: Optional[str]  # cursor da próxima página (None = última)
+    anterior: Optional[str]  # cursor da página anterior (None = primeira)
+
+
+class Contagem(NamedTuple):
+    total: int
+    exato: bool
+
+    def __str__(self):
+        return str(self.total) if self.exato else f"{self.total}+"
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def tamanho_pagina(request=None) -> int:
+    """RFID_PAGINA_TAMANHO, ou ?por_pagina= (até MAX_POR_PAGINA)."""
+    padrao = int(getattr(settings, "RFID_PAGINA_TAMANHO", 100))
+    if request is None:
+        return padrao
+    try:
+        pedido = int(request.GET.get("por_pagina") or padrao)
+    except ValueError:
+        return padrao
+    return max(1, min(pedido, MAX_POR_PAGINA))
+
+
+# ============================================================
+# CURSOR
+# ============================================================
+def _serializar(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _codificar(direcao, valores) -> str:
+    bruto = json.dumps({"d": direcao, "v": [_serializar(v) for v in valores]})
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def _decodificar(cursor, modelo, campos):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        direcao, valores = dados["d"], dados["v"]
+        if direcao not in ("p", "a") or len(valores) != len(campos):
+            raise ValueError(cursor)
+        return direcao, [
+            modelo._meta.get_field(nome).to_python(valor)
+            for (nome, _), valor in zip(campos, valores)
+        ]
+    except Exception as exc:
+        raise CursorInvalido(cursor) from exc
+
+
+def _campos(ordem):
+    return [(campo.lstrip("-"), campo.startswith("-")) for campo in ordem]
+
+
+def _chave(item, campos):
+    if isinstance(item, dict):
+        return [item[nome] for nome, _ in campos]
+    return [getattr(item, nome) for nome, _ in campos]
+
+
+def _depois_de(campos, valores, para_tras):
+    """(c1, c2, ...) depois de (v1, v2, ...) na ordem pedida (ou antes, `para_tras`)."""
+    condicao = Q()
+    iguais = {}
+    for (nome, decrescente), valor in zip(campos, valores):
+        operador = "lt" if decrescente != para_tras else "gt"
+        condicao |= Q(**iguais, **{f"{nome}__{operador}": valor})
+        iguais[nome] = valor
+    return condicao
+
+
+# ============================================================
+# PAGINAÇÃO
+# ============================================================
+def paginar(qs, ordem, cursor=None, tamanho=None) -> Pagina:
+    """
+    Uma página de `qs` na `ordem` (ex.: ("-data_cadastro", "-id")) a partir
+    do `cursor` recebido. Levanta CursorInvalido se o cursor não decodificar.
+    """
+    tamanho = tamanho or tamanho_pagina()
+    campos = _campos(ordem)
+    direcao = "p"
+
+    if cursor:
+        direcao, valores = _decodificar(cursor, qs.model, campos)
+        qs = qs.filter(_depois_de(campos, valores, para_tras=direcao == "a"))
+
+    if direcao == "a":
+        # página anterior: lê na ordem inversa e desinverte
+        inversa = [
+            campo[1:] if campo.startswith("-") else f"-{campo}" for campo in ordem
+        ]
+        itens = list(qs.order_by(*inversa)[: tamanho + 1])
+        tem_mais = len(itens) > tamanho
+        itens = itens[:tamanho][::-1]
+        return Pagina(
+            itens,
+            _codificar("p", _chave(itens[-1], campos)) if itens else None,
+            _codificar("a", _chave(itens[0], campos)) if tem_mais else None,
+        )
+
+    itens = list(qs.order_by(*ordem)[: tamanho + 1])
+    tem_mais = len(itens) > tamanho
+    itens = itens[:tamanho]
+    return Pagina(
+        itens,
+        _codificar("p", _chave(itens[-1], campos)) if tem_mais else None,
+        _codificar("a", _chave(itens[0], campos)) if cursor and itens else None,
+    )
+
+
+def paginar_requisicao(request, qs, ordem) -> Pagina:
+    """paginar() com cursor/tamanho da querystring; cursor inválido = 1ª página."""
+    try:
+        return paginar(
+            qs, ordem, request.GET.get(PARAMETRO_CURSOR), tamanho_pagina(request)
+        )
+    except CursorInvalido:
+        return paginar(qs, ordem, None, tamanho_pagina(request))
+
+
+def links(request, pagina: Pagina) -> dict:
+    """URLs (mesma querystring, outro cursor) para o template de navegação."""
+    parametros = request.GET.copy()
+    parametros.pop(PARAMETRO_CURSOR, None)
+
+    def url(cursor):
+        if cursor is None:
+            return None
+        return "?" + urlencode({**parametros.dict(), PARAMETRO_CURSOR: cursor})
+
+    primeira = "?" + urlencode(parametros.dict()) if pagina.anterior else None
+    return {
+        "anterior": url(pagina.anterior),
+        "proxima": url(pagina.proximo),
+        "primeira": primeira,
+    }
+
+
+# ============================================================
+# TOTAIS
+# ============================================================
+def _estimativa_postgres(qs) -> Optional[int]:
+    """Linhas estimadas pelo planejador (EXPLAIN sem executar a consulta)."""
+    sql, params = qs.query.sql_with_params()
+    try:
+        # savepoint: um erro no EXPLAIN não invalida a transação da requisição
+        with transaction.atomic(using=qs.db), connections[qs.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plano = cursor.fetchone()[0]
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return int(plano[0]["Plan"]["Plan Rows"])
+    except Exception:
+        return None
+
+
+def contar(qs, limite=None) -> Contagem:
+    """COUNT de no máximo `limite` + 1 linhas; acima disso, estimativa."""
+    limite = limite or int(getattr(settings, "RFID_CONTAGEM_LIMITE", 10000))
+    total = qs.order_by().values("pk")[: limite + 1].count()
+    if total <= limite:
+        return Contagem(total, True)
+
+    if connections[qs.db].vendor == "postgresql":
+        estimativa = _estimativa_postgres(qs.order_by().values("pk"))
+        if estimativa and estimativa > limite:
+            return Contagem(estimativa, False)
+    return Contagem(limite, False)
@@ -0,0 +1,71 @@
+# rfid/utils/periodo.py
+"""
+Filtros de data (dia local, America/Sao_Paulo) convertidos em intervalos
+semiabertos de datetimes com fuso: [00:00 do início, 00:00 do dia seguinte ao fim).
+
+`campo__date__gte=...` obriga o banco a converter o fuso de cada linha antes
+de comparar (nenhum índice em data_hora é usado); `campo__gte` / `campo__lt`
+com os limites já calculados caem direto no índice.
+
+    qs.filter(**filtro_periodo("data_hora", data_inicio, data_fim))
+
+Datas aceitas: date ou "AAAA-MM-DD"; vazio/inválido = sem limite.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def para_data(valor):
+    """date, datetime (dia local) ou "AAAA-MM-DD" -> date; vazio/inválido -> None."""
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return timezone.localdate(valor) if timezone.is_aware(valor) else valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(str(valor).strip())
+    except ValueError:
+        return None
+
+
+def inicio_do_dia(dia) -> datetime:
+    """00:00 de `dia` no fuso local, com fuso."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def limites(data_inicio=None, data_fim=None):
+    """
+    (início, fim_exclusivo) dos dias locais [data_inicio, data_fim].
+    Qualquer lado pode ser None (sem limite).
+    """
+    inicio = para_data(data_inicio)
+    fim = para_data(data_fim)
+    return (
+        inicio_do_dia(inicio) if inicio else None,
+        inicio_do_dia(fim + timedelta(days=1)) if fim else None,
+    )
+
+
+def limites_do_dia(dia=None):
+    """Intervalo do dia local `dia` (padrão: hoje)."""
+    dia = para_data(dia) or timezone.localdate()
+    return limites(dia, dia)
+
+
+def filtro_periodo(campo, data_inicio=None, data_fim=None) -> dict:
+    """
+    kwargs de filter() para `campo` (DateTimeField, aceita lookups através de
+    relações: "leituras__data_hora") entre os dias locais informados.
+
+    Use num único .filter(**...) em relações multivaloradas: os dois limites
+    valem para a mesma linha relacionada (um JOIN só).
+    """
+    inicio, fim = limites(data_inicio, data_fim)
+    filtro = {}
+    if inicio:
+        filtro[f"{campo}__gte"] = inicio
+    if fim:
+        filtro[f"{campo}__lt"] = fim
+    return filtro
@@ -0,0 +1,280 @@
+# rfid/utils/planilhas.py
+"""
+Exportação XLSX dos relatórios em memória constante (`exportar_excel` e
+`enviar_email_view`).
+
+O Workbook "normal" do openpyxl guarda um objeto Cell por célula e a largura
+automática percorria a planilha inteira de novo: a memória crescia com o
+número de linhas. Aqui:
+
+  - Workbook(write_only=True): cada linha é serializada ao ser anexada;
+  - linhas lidas com `.iterator(chunk_size=RFID_EXPORTACAO_CHUNK)` (cursor no
+    servidor no PostgreSQL), sem cache do queryset;
+  - largura das colunas estimada pelas primeiras AMOSTRA_LARGURA linhas (no
+    modo write-only as larguras precisam ser definidas antes das linhas);
+  - o arquivo vai para um arquivo temporário e é enviado em blocos
+    (FileResponse), sem montar a planilha inteira em memória.
+
+A memória fica limitada ao lote do iterator + amostra, seja qual for o
+número de linhas (scripts/benchmark_exportacao.py mede o pico de RSS).
+
+Download e e-mail passam pelo cache de arquivos (rfid/utils/cache_relatorios.py):
+o mesmo relatório, sem leituras novas, não é gerado de novo.
+"""
+import tempfile
+from itertools import chain, islice
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from rfid.utils import cache_relatorios
+from rfid.utils.relatorios import (
+    MODO_DETALHADO,
+    FiltroRelatorio,
+    consulta_botijoes,
+    consulta_eventos,
+)
+
+AMOSTRA_LARGURA = 1000
+LARGURA_MAXIMA = 50
+
+CONTENT_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+CABECALHO_CONSOLIDADO = [
+    "Última Leitura",
+    "Tag",
+    "Nº Série",
+    "Fabricante",
+    "Tara",
+    "Últ. Requalificação",
+    "Próx. Requalificação",
+    "Penúlt. Envasadora",
+    "Data Penúltimo Env.",
+    "Últ. Envasadora",
+    "Data Último Env.",
+    "Status",
+    "Status Requalificação",
+    "Total Leituras",
+    "Data Cadastro",
+]
+CABECALHO_DETALHADO = (
+    CABECALHO_CONSOLIDADO[:11] + ["Troca Distribuidora"] + CABECALHO_CONSOLIDADO[11:]
+)
+
+
+def tamanho_lote() -> int:
+    return int(getattr(settings, "RFID_EXPORTACAO_CHUNK", 2000))
+
+
+def acompanhar(linhas, ao_avancar=None, a_cada=None):
+    """Repassa as linhas chamando ao_avancar(n) a cada `a_cada` (e no fim)."""
+    if ao_avancar is None:
+        yield from linhas
+        return
+    a_cada = a_cada or tamanho_lote()
+    n = 0
+    for linha in linhas:
+        yield linha
+        n += 1
+        if n % a_cada == 0:
+            ao_avancar(n)
+    ao_avancar(n)
+
+
+# ============================================================
+# FORMATAÇÃO
+# ============================================================
+def _fmt_date(d):
+    return d.strftime("%d/%m/%Y") if d else "-"
+
+
+def _fmt_dt(dt):
+    if not dt:
+        return "-"
+    return timezone.localtime(dt).strftime("%d/%m/%Y %H:%M")
+
+
+def _fmt_iso_date(s):
+    # datas no LogAuditoria (dados_novos/anteriores) às vezes vêm "YYYY-MM-DD"
+    if not s:
+        return "-"
+    if isinstance(s, str):
+        try:
+            y, m, d = s.split("-")
+            if len(y) == 4 and len(m) == 2 and len(d) == 2:
+                return f"{d}/{m}/{y}"
+        except Exception:
+            pass
+    return str(s)
+
+
+# ============================================================
+# LINHAS
+# ============================================================
+def linhas_consolidado(qs):
+    """1 linha = 1 botijão (consulta_botijoes)."""
+    for c in qs.iterator(chunk_size=tamanho_lote()):
+        yield [
+            _fmt_dt(c.ultima_leitura_em),
+            c.tag_rfid,
+            c.numero_serie or "-",
+            c.fabricante or "-",
+            float(c.tara) if c.tara is not None else "-",
+            _fmt_date(c.data_ultima_requalificacao),
+            _fmt_date(c.data_proxima_requalificacao),
+            c.penultima_envasadora or "-",
+            _fmt_date(c.data_penultimo_envasamento),
+            c.ultima_envasadora or "-",
+            _fmt_date(c.data_ultimo_envasamento),
+            c.get_status_display(),
+            c.get_status_requalificacao_display(),
+            c.num_leituras,
+            _fmt_dt(c.data_cadastro),
+        ]
+
+
+def linhas_detalhado(qs):
+    """1 linha = 1 troca de envasadora (consulta_eventos)."""
+    for e in qs.iterator(chunk_size=tamanho_lote()):
+        b = e.botijao
+        antes = e.dados_anteriores or {}
+        depois = e.dados_novos or {}
+        troca = (
+            f"{antes.get('ultima_envasadora') or '-'} → "
+            f"{depois.get('ultima_envasadora') or '-'}"
+        )
+        yield [
+            _fmt_dt(e.data_hora),
+            b.tag_rfid,
+            b.numero_serie or "-",
+            b.fabricante or "-",
+            float(b.tara) if b.tara is not None else "-",
+            _fmt_date(b.data_ultima_requalificacao),
+            _fmt_date(b.data_proxima_requalificacao),
+            depois.get("penultima_envasadora") or (b.penultima_envasadora or "-"),
+            (
+                _fmt_iso_date(depois.get("data_penultimo_envasamento"))
+                if depois.get("data_penultimo_envasamento")
+                else _fmt_date(b.data_penultimo_envasamento)
+            ),
+            depois.get("ultima_envasadora") or (b.ultima_envasadora or "-"),
+            (
+                _fmt_iso_date(depois.get("data_ultimo_envasamento"))
+                if depois.get("data_ultimo_envasamento")
+                else _fmt_date(b.data_ultimo_envasamento)
+            ),
+            troca,
+            b.get_status_display(),
+            b.get_status_requalificacao_display(),
+            1,
+            _fmt_dt(b.data_cadastro),
+        ]
+
+
+def planilha_relatorio(filtro: FiltroRelatorio):
+    """(título da aba, cabeçalho, linhas, prefixo do arquivo) do modo pedido."""
+    if filtro.modo == MODO_DETALHADO:
+        return (
+            "Relatório Detalhado",
+            CABECALHO_DETALHADO,
+            linhas_detalhado(consulta_eventos(filtro)),
+            "relatorio_detalhado",
+        )
+    return (
+        "Relatório Consolidado",
+        CABECALHO_CONSOLIDADO,
+        linhas_consolidado(consulta_botijoes(filtro, ordem=("tag_rfid",))),
+        "relatorio_consolidado",
+    )
+
+
+# ============================================================
+# ESCRITA
+# ============================================================
+def larguras(cabecalho, amostra) -> list:
+    """Largura de cada coluna pelo maior texto do cabeçalho + amostra."""
+    maiores = [len(str(titulo)) for titulo in cabecalho]
+    for linha in amostra:
+        for i, valor in enumerate(linha):
+            maiores[i] = max(maiores[i], len(str(valor)))
+    return [min(maior + 2, LARGURA_MAXIMA) for maior in maiores]
+
+
+def escrever_xlsx(destino, titulo, cabecalho, linhas) -> int:
+    """
+    Grava a planilha (modo write-only) em `destino` (caminho ou arquivo
+    binário) e devolve o número de linhas de dados.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(titulo)
+
+    linhas = iter(linhas)
+    amostra = list(islice(linhas, AMOSTRA_LARGURA))
+    for i, largura in enumerate(larguras(cabecalho, amostra), 1):
+        ws.column_dimensions[get_column_letter(i)].width = largura
+
+    preenchimento = PatternFill(
+        start_color="00D4FF", end_color="00D4FF", fill_type="solid"
+    )
+    fonte = Font(bold=True, color="FFFFFF", size=12)
+    alinhamento = Alignment(horizontal="center", vertical="center")
+    celulas = []
+    for titulo_coluna in cabecalho:
+        celula = WriteOnlyCell(ws, value=titulo_coluna)
+        celula.fill, celula.font, celula.alignment = preenchimento, fonte, alinhamento
+        celulas.append(celula)
+    ws.append(celulas)
+
+    total = 0
+    for linha in chain(amostra, linhas):
+        ws.append(linha)
+        total += 1
+
+    wb.save(destino)
+    return total
+
+
+def arquivo_xlsx(titulo, cabecalho, linhas):
+    """Planilha num arquivo temporário (apagado ao fechar), já no início."""
+    arquivo = tempfile.TemporaryFile()
+    escrever_xlsx(arquivo, titulo, cabecalho, linhas)
+    arquivo.seek(0)
+    return arquivo
+
+
+def nome_arquivo(prefixo, extensao="xlsx") -> str:
+    return f"{prefixo}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+
+
+def planilha_em_cache(filtro: FiltroRelatorio, ao_avancar=None):
+    """
+    (arquivo aberto no início, nome do arquivo) da planilha do relatório,
+    reaproveitada do cache de arquivos (cache_relatorios) se os dados não
+    mudaram desde a última geração.
+    """
+    titulo, cabecalho, linhas, prefixo = planilha_relatorio(filtro)
+    arquivo = cache_relatorios.abrir(
+        filtro,
+        "xlsx",
+        False,
+        lambda destino: escrever_xlsx(
+            destino, titulo, cabecalho, acompanhar(linhas, ao_avancar)
+        ),
+    )
+    return arquivo, nome_arquivo(prefixo)
+
+
+def resposta_xlsx(filtro: FiltroRelatorio) -> FileResponse:
+    """Download do relatório, enviado em blocos a partir do arquivo em disco."""
+    arquivo, nome = planilha_em_cache(filtro)
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=nome,
+        content_type=CONTENT_TYPE_XLSX,
+    )
@@ -0,0 +1,222 @@
+# rfid/utils/protocolo_binario.py
+"""
+Formato binário compacto para envio de leituras (coletores em rede móvel).
+
+No JSON, cada leitura repete chaves e valores ("operador": "PDA_C72", ...).
+Aqui operador/observacao/leitor_id vão uma vez no cabeçalho, o EPC vai como
+bytes crus (96 bits = 12 bytes) e o horário como delta em ms da leitura anterior.
+
+Content-Type: application/vnd.rfid-leituras (endpoints de leitura unitária e lote)
+
+Versão 1 (inteiros big-endian):
+
+  cabeçalho
+    2s  "RF"
+    B   versão (1)
+    B   reservado (0)
+    q   horário base, ms desde epoch (0 se nenhuma leitura traz horário)
+    I   quantidade de leituras
+    3x  texto: B tamanho + UTF-8 — operador, observacao, leitor_id (0 = padrão)
+
+  leitura
+    B   flags (ver F_*)
+    B   tamanho da tag em bytes
+    ..  tag: bytes do EPC (vira hex maiúsculo) ou UTF-8 com F_TEXTO
+    i   delta em ms da leitura anterior (ou do horário base)  [F_DATA]
+    B   antena                                                [F_ANTENA]
+    b   rssi                                                  [F_RSSI]
+    I   seq (idempotência, exige leitor_id)                   [F_SEQ]
+
+O decodificador lê direto do buffer (struct + memoryview) e monta
+ItemLeitura sem dicionários intermediários. Qualquer erro invalida o envio
+inteiro (ValueError).
+"""
+import re
+import struct
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+from rfid.utils.idempotencia import montar_chave
+from rfid.utils.ingestao import (
+    OBSERVACAO_PADRAO,
+    OPERADOR_PADRAO,
+    TOLERANCIA_FUTURO,
+    ItemLeitura,
+)
+
+CONTENT_TYPE = "application/vnd.rfid-leituras"
+MAGICO = b"RF"
+VERSAO = 1
+
+F_DATA = 0x01
+F_ANTENA = 0x02
+F_RSSI = 0x04
+F_SEQ = 0x08
+F_TEXTO = 0x10
+
+_CABECALHO = struct.Struct("!2sBBqI")
+_REGISTRO = struct.Struct("!BB")
+_DELTA = struct.Struct("!i")
+_ANTENA = struct.Struct("!B")
+_RSSI = struct.Struct("!b")
+_SEQ = struct.Struct("!I")
+
+_EPC_HEX = re.compile(r"^(?:[0-9A-F]{2})+$")
+
+
+# ============================================================
+# DECODIFICAÇÃO (servidor)
+# ============================================================
+def _ler_texto(buf, pos):
+    tamanho = buf[pos]
+    fim = pos + 1 + tamanho
+    if fim > len(buf):
+        raise struct.error("texto truncado")
+    return bytes(buf[pos + 1 : fim]).decode("utf-8").strip(), fim
+
+
+def quantidade_declarada(dados) -> int:
+    """Quantidade de leituras do cabeçalho (para checar limites antes de decodificar)."""
+    try:
+        magico, _, _, _, quantidade = _CABECALHO.unpack_from(dados, 0)
+    except struct.error:
+        raise ValueError("Formato binário inválido (cabeçalho)")
+    if magico != MAGICO:
+        raise ValueError("Formato binário inválido (assinatura)")
+    return quantidade
+
+
+def decodificar_lote(dados):
+    """bytes -> lista de ItemLeitura. Levanta ValueError se o envio for inválido."""
+    buf = memoryview(dados)
+    quantidade = quantidade_declarada(buf)
+    versao = buf[2]
+    if versao != VERSAO:
+        raise ValueError(f"Versão {versao} do formato binário não suportada")
+
+    try:
+        _, _, _, instante_ms, _ = _CABECALHO.unpack_from(buf, 0)
+        pos = _CABECALHO.size
+        operador, pos = _ler_texto(buf, pos)
+        observacao, pos = _ler_texto(buf, pos)
+        leitor_id, pos = _ler_texto(buf, pos)
+        operador = operador or OPERADOR_PADRAO
+        observacao = observacao or OBSERVACAO_PADRAO
+        leitor_id = leitor_id or None
+
+        limite_ms = int((timezone.now() + TOLERANCIA_FUTURO).timestamp() * 1000)
+        itens = []
+        for _ in range(quantidade):
+            flags, tamanho = _REGISTRO.unpack_from(buf, pos)
+            pos += _REGISTRO.size
+            bruto = buf[pos : pos + tamanho]
+            if len(bruto) != tamanho:
+                raise struct.error("tag truncada")
+            pos += tamanho
+            if flags & F_TEXTO:
+                tag_rfid = bytes(bruto).decode("utf-8").strip()
+            else:
+                tag_rfid = bruto.hex().upper()
+            if not tag_rfid:
+                raise ValueError("Tag RFID faltando")
+
+            data_hora = None
+            if flags & F_DATA:
+                instante_ms += _DELTA.unpack_from(buf, pos)[0]
+                pos += _DELTA.size
+                if instante_ms > limite_ms:
+                    raise ValueError("Campo 'data_hora' no futuro")
+                data_hora = datetime.fromtimestamp(
+                    instante_ms / 1000, tz=dt_timezone.utc
+                )
+
+            antena = rssi = chave = None
+            if flags & F_ANTENA:
+                antena = buf[pos]
+                pos += _ANTENA.size
+            if flags & F_RSSI:
+                rssi = _RSSI.unpack_from(buf, pos)[0]
+                pos += _RSSI.size
+            if flags & F_SEQ:
+                chave = montar_chave(leitor_id, _SEQ.unpack_from(buf, pos)[0])
+                pos += _SEQ.size
+
+            itens.append(
+                ItemLeitura(
+                    tag_rfid,
+                    operador,
+                    observacao,
+                    rssi,
+                    antena,
+                    leitor_id,
+                    data_hora,
+                    chave,
+                )
+            )
+    except (struct.error, IndexError, UnicodeDecodeError, OverflowError, OSError):
+        raise ValueError("Formato binário inválido (conteúdo truncado ou corrompido)")
+
+    if pos != len(buf):
+        raise ValueError("Formato binário inválido (bytes sobrando)")
+    return itens
+
+
+# ============================================================
+# CODIFICAÇÃO (coletor / testes / benchmark)
+# ============================================================
+def _texto(valor):
+    dados = (valor or "").encode("utf-8")
+    if len(dados) > 255:
+        raise ValueError("Texto do cabeçalho excede 255 bytes")
+    return bytes([len(dados)]) + dados
+
+
+def _em_ms(data_hora):
+    return int(round(data_hora.timestamp() * 1000))
+
+
+def codificar_lote(leituras, operador="", observacao="", leitor_id=""):
+    """
+    Lista de dicts no formato da API JSON (tag_rfid, data_hora [datetime],
+    antena, rssi, seq) -> bytes no formato binário v1.
+    """
+    horarios = [_em_ms(lt["data_hora"]) for lt in leituras if lt.get("data_hora")]
+    instante_ms = horarios[0] if horarios else 0
+
+    partes = [
+        _CABECALHO.pack(MAGICO, VERSAO, 0, instante_ms, len(leituras)),
+        _texto(operador),
+        _texto(observacao),
+        _texto(leitor_id),
+    ]
+    for leitura in leituras:
+        tag = leitura["tag_rfid"]
+        flags = 0
+        if _EPC_HEX.match(tag):
+            bruto = bytes.fromhex(tag)
+        else:
+            flags |= F_TEXTO
+            bruto = tag.encode("utf-8")
+
+        extras = []
+        if leitura.get("data_hora"):
+            flags |= F_DATA
+            atual = _em_ms(leitura["data_hora"])
+            extras.append(_DELTA.pack(atual - instante_ms))
+            instante_ms = atual
+        if leitura.get("antena") is not None:
+            flags |= F_ANTENA
+            extras.append(_ANTENA.pack(leitura["antena"]))
+        if leitura.get("rssi") is not None:
+            flags |= F_RSSI
+            extras.append(_RSSI.pack(leitura["rssi"]))
+        if leitura.get("seq") is not None:
+            flags |= F_SEQ
+            extras.append(_SEQ.pack(leitura["seq"]))
+
+        partes.append(_REGISTRO.pack(flags, len(bruto)))
+        partes.append(bruto)
+        partes.extend(extras)
+
+    return b"".join(partes)
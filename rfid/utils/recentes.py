@@ -0,0 +1,75 @@
+# rfid/utils/recentes.py
+"""
+"Últimos N filhos de cada pai" numa query só (ex.: as 10 leituras mais
+recentes de cada botijão da página de busca).
+
+Com window functions (PostgreSQL, SQLite >= 3.25):
+
+    SELECT * FROM (
+        SELECT ..., ROW_NUMBER() OVER (PARTITION BY botijao_id
+                                       ORDER BY data_hora DESC, id DESC) AS posicao
+        FROM rfid_leiturarfid WHERE botijao_id IN (...)
+    ) WHERE posicao <= 10
+
+Sem window functions: subquery correlacionada com LIMIT
+(`id IN (SELECT id ... WHERE botijao_id = externo.botijao_id ORDER BY ... LIMIT 10)`).
+
+Nos dois casos cada pai lê só as N primeiras entradas do índice
+(botijao, data_hora), em vez de carregar o histórico inteiro.
+"""
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import F, OuterRef, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from rfid.models import LeituraRFID
+
+LEITURAS_POR_BOTIJAO = 10
+
+
+def _expressao(campo):
+    return F(campo[1:]).desc() if campo.startswith("-") else F(campo).asc()
+
+
+def ultimas_por_pai(qs, campo_pai, ids_pais, n, ordem=("-data_hora", "-id")):
+    """
+    {id_pai: [até n objetos de `qs`, na `ordem`]} para os `ids_pais`.
+    `campo_pai` é a coluna da FK (ex.: "botijao_id").
+    """
+    ids_pais = list(ids_pais)
+    if not ids_pais:
+        return {}
+
+    qs = qs.filter(**{f"{campo_pai}__in": ids_pais})
+    if connections[qs.db].features.supports_over_clause:
+        qs = qs.annotate(
+            posicao=Window(
+                RowNumber(),
+                partition_by=[F(campo_pai)],
+                order_by=[_expressao(campo) for campo in ordem],
+            )
+        ).filter(posicao__lte=n)
+    else:
+        primeiras = (
+            qs.model._default_manager.filter(**{campo_pai: OuterRef(campo_pai)})
+            .order_by(*ordem)
+            .values("pk")[:n]
+        )
+        qs = qs.filter(pk__in=Subquery(primeiras))
+
+    por_pai = defaultdict(list)
+    for item in qs.order_by(campo_pai, *ordem):
+        por_pai[getattr(item, campo_pai)].append(item)
+    return por_pai
+
+
+def ultimas_leituras_por_botijao(botijao_ids, n=LEITURAS_POR_BOTIJAO, campos=None):
+    """
+    {botijao_id: [últimas n LeituraRFID]} — timelines por botijão.
+    `campos` limita as colunas carregadas (além de id/botijao_id).
+    """
+    qs = LeituraRFID.objects.all()
+    if campos:
+        qs = qs.only("id", "botijao_id", *campos)
+    return ultimas_por_pai(qs, "botijao_id", botijao_ids, n)
@@ -0,0 +1,288 @@
+# rfid/utils/relatorios.py
+"""
+Motor de consultas dos relatórios (tela `relatorios`, `exportar_excel` e
+`enviar_email_view`).
+
+Os filtros da requisição viram um `FiltroRelatorio` validado (valores fora das
+opções são ignorados) e cada modo do relatório sai de uma única função:
+
+  consolidado            -> consulta_botijoes       (1 linha = 1 botijão)
+  detalhado RFID         -> consulta_eventos        (trocas de envasadora, LogAuditoria)
+  detalhado QR/barcode   -> consulta_leituras_codigo (LeituraCodigoBarra)
+
+Otimizações em relação às cópias que existiam em cada view:
+  - filtro por data de leitura com EXISTS (em vez de JOIN nas leituras + DISTINCT);
+  - total de leituras por subquery correlacionada (índice leitura_botijao_data_idx),
+    sem GROUP BY sobre todas as colunas do botijão;
+  - `.only()` com as colunas que as telas/planilhas usam;
+  - totais calculados por aggregate no banco.
+
+`FiltroRelatorio.chave()` é um hash estável dos filtros normalizados (chave de cache).
+As ordens terminam em id para servir de chave da paginação por cursor
+(rfid/utils/paginacao.py).
+"""
+import hashlib
+import json
+from datetime import date
+from typing import NamedTuple, Optional
+
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from rfid.models import Botijao, LeituraCodigoBarra, LeituraRFID, LogAuditoria
+from rfid.utils.identificadores import TIPO_BARCODE, TIPO_LIXO, TIPO_QR, TIPO_RFID
+from rfid.utils.periodo import filtro_periodo, para_data
+
+MODO_CONSOLIDADO = "consolidado"
+MODO_DETALHADO = "detalhado"
+MODOS = (MODO_CONSOLIDADO, MODO_DETALHADO)
+
+DATA_CADASTRO = "cadastro"
+DATA_LEITURA = "leitura"
+TIPOS_DATA = (DATA_CADASTRO, DATA_LEITURA)
+
+# valores do filtro "tipo" (= Botijao.tipo_identificador); "" = todos
+TIPOS_FILTRAVEIS = (TIPO_RFID, TIPO_QR, TIPO_BARCODE)
+
+# detalhado da tela
+DETALHE_BARCODE_QR = "barcode_qr"
+DETALHE_RFID_TROCA = "rfid_troca"
+
+# LogAuditoria gravado pelo ciclo de envasadoras (Botijao.avancar_envasadora_por_leitura)
+DESCRICAO_TROCA = "Envasadora atualizada automaticamente"
+
+ORDEM_BOTIJOES = ("-data_cadastro", "-id")
+ORDEM_DETALHE = ("-data_hora", "-id")
+
+CAMPOS_BOTIJAO = (
+    "id",
+    "tag_rfid",
+    "numero_serie",
+    "fabricante",
+    "tara",
+    "status",
+    "status_requalificacao",
+    "data_ultima_requalificacao",
+    "data_proxima_requalificacao",
+    "penultima_envasadora",
+    "data_penultimo_envasamento",
+    "ultima_envasadora",
+    "data_ultimo_envasamento",
+    "data_cadastro",
+    "ultima_leitura_em",
+)
+
+
+class FiltroRelatorio(NamedTuple):
+    modo: str = MODO_CONSOLIDADO
+    tipo: str = ""
+    status: str = ""
+    data_tipo: str = DATA_CADASTRO
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+
+    @classmethod
+    def de_parametros(cls, dados) -> "FiltroRelatorio":
+        """QueryDict/dict da requisição -> filtro validado."""
+
+        def valor(nome):
+            return (dados.get(nome) or "").strip()
+
+        modo = valor("modo")
+        tipo = valor("tipo")
+        status = valor("status")
+        data_tipo = valor("data_tipo")
+        return cls(
+            modo=modo if modo in MODOS else MODO_CONSOLIDADO,
+            tipo=tipo if tipo in TIPOS_FILTRAVEIS else "",
+            status=status if status in dict(Botijao.STATUS_CHOICES) else "",
+            data_tipo=data_tipo if data_tipo in TIPOS_DATA else DATA_CADASTRO,
+            data_inicio=para_data(valor("data_inicio")),
+            data_fim=para_data(valor("data_fim")),
+        )
+
+    def parametros(self) -> dict:
+        """Filtros como strings (contexto dos templates, querystring, hash)."""
+        return {
+            "modo": self.modo,
+            "tipo": self.tipo,
+            "status": self.status,
+            "data_tipo": self.data_tipo,
+            "data_inicio": self.data_inicio.isoformat() if self.data_inicio else "",
+            "data_fim": self.data_fim.isoformat() if self.data_fim else "",
+        }
+
+    def chave(self) -> str:
+        """Hash estável dos filtros normalizados."""
+        canonico = json.dumps(self.parametros(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonico.encode()).hexdigest()[:32]
+
+    def resumo(self) -> str:
+        """Filtros em texto (tela e corpo do e-mail)."""
+        tipo = {
+            TIPO_RFID: "Somente RFID",
+            TIPO_BARCODE: "Somente Código de Barras",
+            TIPO_QR: "Somente Código QR",
+        }.get(self.tipo, "Todos")
+        parametros = self.parametros()
+        periodo = (
+            f"{parametros['data_inicio'] or '—'} até {parametros['data_fim'] or '—'}"
+            if self.tem_periodo
+            else "Todos"
+        )
+        data = (
+            "Data da Leitura" if self.data_tipo == DATA_LEITURA else "Data de Cadastro"
+        )
+        modo = (
+            "Detalhado (por leitura)"
+            if self.modo == MODO_DETALHADO
+            else "Consolidado (por botijão)"
+        )
+        return (
+            f"Tipo: {tipo} | "
+            f"Status: {self.status or 'Todos'} | "
+            f"Modo: {modo} | "
+            f"Data: {data} | "
+            f"Período: {periodo}"
+        )
+
+    @property
+    def tem_periodo(self) -> bool:
+        return bool(self.data_inicio or self.data_fim)
+
+    @property
+    def detalhe(self) -> Optional[str]:
+        """Qual detalhado a tela mostra (None no consolidado)."""
+        if self.modo != MODO_DETALHADO:
+            return None
+        return DETALHE_RFID_TROCA if self.tipo == TIPO_RFID else DETALHE_BARCODE_QR
+
+
+# ============================================================
+# CONSOLIDADO
+# ============================================================
+def total_leituras_por_botijao():
+    """Anotação: COUNT das leituras do botijão (subquery correlacionada)."""
+    por_botijao = (
+        LeituraRFID.objects.filter(botijao=OuterRef("pk"))
+        .order_by()
+        .values("botijao")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(por_botijao, output_field=IntegerField()), 0)
+
+
+def consulta_botijoes(filtro: FiltroRelatorio, ordem=ORDEM_BOTIJOES):
+    """Botijões (sem lixo) com `num_leituras` anotado."""
+    # Botijao.objects já exclui os deletados
+    qs = Botijao.objects.exclude(tipo_identificador=TIPO_LIXO)
+
+    if filtro.status:
+        qs = qs.filter(status=filtro.status)
+
+    if filtro.tem_periodo:
+        if filtro.data_tipo == DATA_LEITURA:
+            # EXISTS: para no primeiro match e não duplica o botijão
+            leituras_no_periodo = LeituraRFID.objects.filter(
+                botijao=OuterRef("pk"),
+                **filtro_periodo("data_hora", filtro.data_inicio, filtro.data_fim),
+            )
+            qs = qs.filter(Exists(leituras_no_periodo))
+        else:
+            qs = qs.filter(
+                **filtro_periodo("data_cadastro", filtro.data_inicio, filtro.data_fim)
+            )
+
+    if filtro.tipo:
+        qs = qs.filter(tipo_identificador=filtro.tipo)
+
+    return (
+        qs.only(*CAMPOS_BOTIJAO)
+        .annotate(num_leituras=total_leituras_por_botijao())
+        .order_by(*ordem)
+    )
+
+
+def leituras_dos_botijoes(qs):
+    """
+    Leituras RFID dos botijões de uma consulta_botijoes (o que a soma de
+    num_leituras das linhas conta) numa consulta só, sem a subquery
+    correlacionada por botijão: a tela conta com paginacao.contar.
+    """
+    return LeituraRFID.objects.filter(botijao__in=qs.order_by().values("pk"))
+
+
+def totais_botijoes(qs) -> dict:
+    """{"itens", "leituras"} de uma consulta_botijoes, num aggregate só."""
+    return qs.order_by().aggregate(
+        itens=Count("id"), leituras=Coalesce(Sum("num_leituras"), 0)
+    )
+
+
+# ============================================================
+# DETALHADO
+# ============================================================
+def consulta_eventos(filtro: FiltroRelatorio):
+    """Trocas de envasadora (LogAuditoria) com o botijão, mais recentes primeiro."""
+    qs = (
+        LogAuditoria.objects.select_related("botijao")
+        .filter(
+            botijao__deletado=False,
+            acao="leitura",
+            descricao__startswith=DESCRICAO_TROCA,
+        )
+        .exclude(botijao__tipo_identificador=TIPO_LIXO)
+    )
+
+    if filtro.status:
+        qs = qs.filter(botijao__status=filtro.status)
+
+    if filtro.tem_periodo:
+        campo = (
+            "data_hora"
+            if filtro.data_tipo == DATA_LEITURA
+            else "botijao__data_cadastro"
+        )
+        qs = qs.filter(**filtro_periodo(campo, filtro.data_inicio, filtro.data_fim))
+
+    if filtro.tipo:
+        qs = qs.filter(botijao__tipo_identificador=filtro.tipo)
+
+    return qs.only(
+        "id",
+        "data_hora",
+        "dados_anteriores",
+        "dados_novos",
+        *(f"botijao__{campo}" for campo in CAMPOS_BOTIJAO),
+    ).order_by(*ORDEM_DETALHE)
+
+
+def consulta_leituras_codigo(filtro: FiltroRelatorio):
+    """
+    Leituras de código de barras/QR. Não há FK para o botijão: o status é
+    cruzado por Botijao.tag_rfid == codigo (subquery, sem trazer as tags).
+    """
+    qs = LeituraCodigoBarra.objects.all()
+
+    if filtro.tipo in (TIPO_QR, TIPO_BARCODE):
+        qs = qs.filter(tipo_identificador=filtro.tipo)
+
+    qs = qs.filter(**filtro_periodo("data_hora", filtro.data_inicio, filtro.data_fim))
+
+    if filtro.status:
+        tags = Botijao.objects.filter(status=filtro.status).values("tag_rfid")
+        qs = qs.filter(codigo__in=tags)
+
+    return qs.only("id", "codigo", "data_hora").order_by(*ORDEM_DETALHE)
+
+
+def botijoes_por_codigo(leituras) -> dict:
+    """{codigo: Botijao} das leituras de código já carregadas (uma página)."""
+    codigos = {leitura.codigo for leitura in leituras}
+    if not codigos:
+        return {}
+    return {
+        b.tag_rfid: b
+        for b in Botijao.objects.filter(tag_rfid__in=codigos).only(*CAMPOS_BOTIJAO)
+    }
@@ -0,0 +1,82 @@
+# rfid/utils/requalificacao.py
+"""
+Status da requalificação (Botijao.status_requalificacao) derivado da data da
+próxima requalificação:
+
+  pendente            sem data
+  vencida             data <= hoje
+  proximo_vencimento  hoje < data <= hoje + DIAS_ALERTA_REQUALIFICACAO
+  em_dia              data > hoje + DIAS_ALERTA_REQUALIFICACAO
+
+O campo é gravado no save() do botijão quando a data muda e recalculado para
+a frota inteira por `recalcular_status` (comando `recalcular_status_requalificacao`,
+agendado uma vez por dia logo após a meia-noite): um UPDATE por faixa de
+data, só nas linhas cujo status mudou. Dashboard e filtros contam/filtram
+direto na coluna.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# "próxima" = vence em até 90 dias
+DIAS_ALERTA_REQUALIFICACAO = 90
+
+STATUS_EM_DIA = "em_dia"
+STATUS_PROXIMO = "proximo_vencimento"
+STATUS_VENCIDA = "vencida"
+STATUS_PENDENTE = "pendente"
+
+
+def status_por_data(data_proxima, hoje=None) -> str:
+    if data_proxima is None:
+        return STATUS_PENDENTE
+    hoje = hoje or timezone.localdate()
+    if data_proxima <= hoje:
+        return STATUS_VENCIDA
+    if data_proxima <= hoje + timedelta(days=DIAS_ALERTA_REQUALIFICACAO):
+        return STATUS_PROXIMO
+    return STATUS_EM_DIA
+
+
+def faixas(hoje=None):
+    """[(status, Q da faixa de data_proxima_requalificacao), ...] — mesma regra de status_por_data."""
+    hoje = hoje or timezone.localdate()
+    limite = hoje + timedelta(days=DIAS_ALERTA_REQUALIFICACAO)
+    return [
+        (STATUS_PENDENTE, Q(data_proxima_requalificacao__isnull=True)),
+        (STATUS_VENCIDA, Q(data_proxima_requalificacao__lte=hoje)),
+        (
+            STATUS_PROXIMO,
+            Q(data_proxima_requalificacao__gt=hoje)
+            & Q(data_proxima_requalificacao__lte=limite),
+        ),
+        (STATUS_EM_DIA, Q(data_proxima_requalificacao__gt=limite)),
+    ]
+
+
+def recalcular_status(hoje=None) -> dict:
+    """
+    Regrava status_requalificacao de todos os botijões (inclusive deletados).
+    Retorna {status: linhas alteradas}.
+    """
+    from rfid.models import Botijao
+    from rfid.utils.cache_dashboard import marcar_alteracao
+
+    # update() não passa pelo auto_now: atualizado_em vai explícito para o
+    # ETag dos relatórios (rfid/utils/validadores.py) mudar
+    agora = timezone.now()
+    alterados = {}
+    with transaction.atomic():
+        for status, faixa in faixas(hoje):
+            mudaram = Botijao.all_objects.filter(faixa).exclude(
+                status_requalificacao=status
+            )
+            alterados[status] = mudaram.update(
+                status_requalificacao=status, atualizado_em=agora
+            )
+
+    if any(alterados.values()):
+        transaction.on_commit(marcar_alteracao)
+    return alterados
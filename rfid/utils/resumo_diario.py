@@ -0,0 +1,174 @@
+# rfid/utils/resumo_diario.py
+"""
+Manutenção e leitura do resumo diário de leituras (ResumoLeituraDiaria).
+
+- Ingestão: `contabilizar_leituras` agrupa as leituras gravadas por chave
+  (dia local, tipo, operador, leitor_id, antena) e soma os totais com um
+  único INSERT ... ON CONFLICT DO UPDATE (PostgreSQL / SQLite). Roda na
+  mesma transação da gravação das leituras.
+- Reconstrução: `reconstruir` apaga e recalcula um intervalo de dias a partir
+  das tabelas de leitura (comando `reconstruir_resumo_diario`).
+- Consulta: `totais_por_dia` devolve {dia: total} sem tocar nas leituras,
+  então o custo dos gráficos não cresce com o histórico.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from rfid.models import LeituraCodigoBarra, LeituraRFID, ResumoLeituraDiaria
+from rfid.utils.cache_dashboard import marcar_alteracao
+from rfid.utils.periodo import filtro_periodo
+
+CAMPOS_CHAVE = ("dia", "tipo", "operador", "leitor_id", "antena")
+
+
+def _q(nome):
+    return connection.ops.quote_name(nome)
+
+
+def chave_da_leitura(tipo, leitura):
+    """Chave do resumo para uma LeituraRFID / LeituraCodigoBarra já gravada."""
+    return (
+        timezone.localdate(leitura.data_hora),
+        tipo,
+        leitura.operador or "",
+        getattr(leitura, "leitor_id", None) or "",
+        getattr(leitura, "antena", None) or 0,
+    )
+
+
+def contabilizar_leituras(tipo, leituras):
+    """
+    Soma as leituras recém-gravadas ao resumo diário e, após o commit,
+    avisa o cache do dashboard.
+    """
+    contagens = Counter(chave_da_leitura(tipo, leitura) for leitura in leituras)
+    if not contagens:
+        return
+    somar(contagens)
+    transaction.on_commit(marcar_alteracao)
+
+
+def somar(contagens):
+    """contagens: {(dia, tipo, operador, leitor_id, antena): quantidade}."""
+    if not contagens:
+        return
+
+    if connection.vendor not in ("postgresql", "sqlite"):
+        _somar_orm(contagens)
+        return
+
+    tabela = _q(ResumoLeituraDiaria._meta.db_table)
+    chave = ", ".join(_q(campo) for campo in CAMPOS_CHAVE)
+    total = _q("total")
+    linhas = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(contagens))
+    parametros = []
+    for (dia, tipo, operador, leitor_id, antena), quantidade in contagens.items():
+        parametros += [
+            connection.ops.adapt_datefield_value(dia),
+            tipo,
+            operador,
+            leitor_id,
+            antena,
+            quantidade,
+        ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {tabela} ({chave}, {total}) VALUES {linhas} "
+            f"ON CONFLICT ({chave}) "
+            f"DO UPDATE SET {total} = {tabela}.{total} + EXCLUDED.{total}",
+            parametros,
+        )
+
+
+def _somar_orm(contagens):
+    with transaction.atomic():
+        for valores, quantidade in contagens.items():
+            filtro = dict(zip(CAMPOS_CHAVE, valores))
+            atualizados = ResumoLeituraDiaria.objects.filter(**filtro).update(
+                total=F("total") + quantidade
+            )
+            if not atualizados:
+                ResumoLeituraDiaria.objects.create(total=quantidade, **filtro)
+
+
+# ============================================================
+# RECONSTRUÇÃO A PARTIR DAS LEITURAS
+# ============================================================
+def _agrupar(qs, tipo, extras):
+    """GROUP BY (dia local, operador, leitor_id, antena) -> ResumoLeituraDiaria."""
+    anotacoes = {
+        "dia_local": TruncDate("data_hora"),
+        "operador_chave": Coalesce("operador", Value("")),
+        **extras,
+    }
+    grupos = (
+        qs.order_by().annotate(**anotacoes).values(*anotacoes).annotate(qtd=Count("id"))
+    )
+    for grupo in grupos.iterator():
+        yield ResumoLeituraDiaria(
+            dia=grupo["dia_local"],
+            tipo=tipo,
+            operador=grupo["operador_chave"],
+            leitor_id=grupo["leitor_id_chave"],
+            antena=grupo["antena_chave"],
+            total=grupo["qtd"],
+        )
+
+
+def reconstruir(inicio=None, fim=None, lote=1000):
+    """
+    Recalcula o resumo dos dias [inicio, fim] (datas locais; None = sem limite).
+    Retorna a quantidade de linhas de resumo gravadas.
+    """
+    filtro_resumo = {}
+    if inicio:
+        filtro_resumo["dia__gte"] = inicio
+    if fim:
+        filtro_resumo["dia__lte"] = fim
+    filtro_leituras = filtro_periodo("data_hora", inicio, fim)
+
+    fontes = (
+        (
+            ResumoLeituraDiaria.TIPO_RFID,
+            LeituraRFID.objects.filter(**filtro_leituras),
+            {
+                "leitor_id_chave": Coalesce("leitor_id", Value("")),
+                "antena_chave": Coalesce("antena", Value(0)),
+            },
+        ),
+        (
+            ResumoLeituraDiaria.TIPO_CODIGO,
+            LeituraCodigoBarra.objects.filter(**filtro_leituras),
+            # leitura de código não tem leitor/antena
+            {"leitor_id_chave": Value(""), "antena_chave": Value(0)},
+        ),
+    )
+
+    gravadas = 0
+    with transaction.atomic():
+        ResumoLeituraDiaria.objects.filter(**filtro_resumo).delete()
+        for tipo, qs, extras in fontes:
+            linhas = list(_agrupar(qs, tipo, extras))
+            ResumoLeituraDiaria.objects.bulk_create(linhas, batch_size=lote)
+            gravadas += len(linhas)
+    return gravadas
+
+
+# ============================================================
+# CONSULTA
+# ============================================================
+def totais_por_dia(tipo, primeiro, ultimo):
+    """{dia: total} do tipo entre as datas locais [primeiro, ultimo]."""
+    return dict(
+        ResumoLeituraDiaria.objects.filter(
+            tipo=tipo, dia__gte=primeiro, dia__lte=ultimo
+        )
+        .values("dia")
+        .annotate(soma=Sum("total"))
+        .values_list("dia", "soma")
+    )
@@ -94,3 +94,73 @@ Sistema de Rastreamento RFID
             arquivo_excel,
         )
         return False
+
+
+def _remetente():
+    # FROM: DEFAULT_FROM_EMAIL sem "Nome <...>" (SendGrid exige o e-mail puro)
+    raw_from = (getattr(settings, "DEFAULT_FROM_EMAIL", "") or "").strip()
+    safe_from = raw_from
+    if "<" in safe_from and ">" in safe_from:
+        safe_from = safe_from.split("<", 1)[1].split(">", 1)[0].strip()
+    return raw_from, safe_from
+
+
+def email_relatorio(filtro, destinatario, nome_arquivo, conteudo, content_type):
+    """
+    EmailMessage (HTML + planilha anexa) do relatório com os `filtro` dados.
+    Usada pela tela de envio e pelas tarefas em segundo plano.
+    """
+    from rfid.utils.relatorios import (
+        MODO_DETALHADO,
+        consulta_botijoes,
+        consulta_eventos,
+        totais_botijoes,
+    )
+
+    if filtro.modo == MODO_DETALHADO:
+        total_itens = consulta_eventos(filtro).count()
+        total_leituras = total_itens
+    else:
+        totais = totais_botijoes(consulta_botijoes(filtro))
+        total_itens = totais["itens"]
+        total_leituras = totais["leituras"]
+
+    data_hora_str = timezone.localtime(timezone.now()).strftime("%d/%m/%Y às %H:%M")
+
+    corpo_html = f"""
+    <!DOCTYPE html>
+    <html lang="pt-BR">
+    <head><meta charset="UTF-8"></head>
+    <body>
+        <div style="font-family:Segoe UI, Tahoma, Geneva, Verdana, sans-serif;">
+            <h2>RFID FLOW - Relatório</h2>
+            <p>Relatório gerado em <strong>{data_hora_str}</strong>.</p>
+            <p><strong>Filtros aplicados:</strong> {filtro.resumo()}</p>
+            <p><strong>Total de itens no relatório:</strong> {total_itens}</p>
+            <p><strong>Total de leituras (conforme filtros):</strong> {total_leituras}</p>
+            <p>Segue anexo o arquivo Excel.</p>
+        </div>
+    </body>
+    </html>
+    """
+
+    raw_from, safe_from = _remetente()
+    logger.warning(
+        "EMAIL SEND ATTEMPT | raw_from=%r | safe_from=%r | to=%r | filename=%r | modo=%r | tipo=%r",
+        raw_from,
+        safe_from,
+        destinatario,
+        nome_arquivo,
+        filtro.modo,
+        filtro.tipo,
+    )
+
+    email = EmailMessage(
+        subject=f"Relatório RFID Flow - {data_hora_str}",
+        body=corpo_html,
+        from_email=safe_from,
+        to=[destinatario],
+    )
+    email.content_subtype = "html"
+    email.attach(nome_arquivo, conteudo, content_type)
+    return email
@@ -0,0 +1,339 @@
+# rfid/utils/tarefas_relatorio.py
+"""
+Relatórios gerados fora da requisição HTTP (TarefaRelatorio).
+
+Com RFID_RELATORIOS_ASSINCRONOS ligado, `exportar_excel` e `enviar_email_view`
+só gravam a tarefa e redirecionam para /relatorios/tarefas/<id>/, que acompanha
+o progresso e oferece o download. O comando `processar_tarefas_relatorio`:
+
+  1. reserva a próxima tarefa liberada com SELECT ... FOR UPDATE SKIP LOCKED
+     (vários workers em paralelo não pegam a mesma tarefa);
+  2. gera o arquivo (mesmos motores e mesmo cache de arquivos do download
+     direto: planilhas.py / exportacao.py / cache_relatorios.py) e salva no
+     storage (MEDIA_ROOT), gravando o progresso a cada RFID_EXPORTACAO_CHUNK
+     linhas;
+  3. se for e-mail, envia com o arquivo anexo. Falhas voltam a tarefa para a
+     fila com backoff exponencial (RFID_RELATORIOS_BACKOFF_SEGUNDOS * 2^(n-1))
+     até RFID_RELATORIOS_MAX_TENTATIVAS; o arquivo já gerado é reaproveitado.
+
+Tempos de fila, geração e envio ficam na própria tarefa; /api/metricas/
+agrega essas colunas do banco (`estado_tarefas`), porque o worker é outro
+processo e suas métricas em memória nunca chegariam à web.
+"""
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max
+from django.utils import timezone
+
+from rfid.models import TarefaRelatorio
+from rfid.utils import cache_relatorios, metricas
+from rfid.utils.exportacao import (
+    CONTENT_TYPES,
+    FORMATO_XLSX,
+    consulta_exportacao,
+    gerar_texto,
+)
+from rfid.utils.paginacao import contar
+from rfid.utils.planilhas import CONTENT_TYPE_XLSX, planilha_em_cache
+from rfid.utils.relatorios import (
+    MODO_DETALHADO,
+    FiltroRelatorio,
+    consulta_botijoes,
+    consulta_eventos,
+)
+from rfid.utils.send_email import email_relatorio
+
+logger = logging.getLogger("rfid")
+
+
+def relatorios_assincronos() -> bool:
+    return bool(getattr(settings, "RFID_RELATORIOS_ASSINCRONOS", False))
+
+
+def max_tentativas() -> int:
+    return max(1, int(getattr(settings, "RFID_RELATORIOS_MAX_TENTATIVAS", 3)))
+
+
+def espera_nova_tentativa(tentativas: int) -> timedelta:
+    base = float(getattr(settings, "RFID_RELATORIOS_BACKOFF_SEGUNDOS", 30))
+    return timedelta(seconds=base * 2 ** max(0, tentativas - 1))
+
+
+# janela dos tempos agregados em /api/metricas/ (estado_tarefas)
+JANELA_METRICAS = timedelta(hours=24)
+
+
+def tempo_limite() -> timedelta:
+    return timedelta(
+        seconds=int(getattr(settings, "RFID_RELATORIOS_TEMPO_LIMITE", 1800))
+    )
+
+
+# ============================================================
+# FILA
+# ============================================================
+def enfileirar(
+    tipo,
+    filtro: FiltroRelatorio,
+    usuario=None,
+    formato=FORMATO_XLSX,
+    gzip=False,
+    destinatario="",
+) -> TarefaRelatorio:
+    tarefa = TarefaRelatorio.objects.create(
+        tipo=tipo,
+        usuario=usuario if usuario is not None and usuario.is_authenticated else None,
+        filtros=filtro.parametros(),
+        formato=formato,
+        gzip=bool(gzip) and formato != FORMATO_XLSX,
+        destinatario=destinatario,
+    )
+    metricas.incrementar(f"relatorios.{tipo}.enfileiradas")
+    return tarefa
+
+
+def reservar_proxima():
+    """Trava a próxima tarefa liberada (SKIP LOCKED) e a marca como processando."""
+    agora = timezone.now()
+    with transaction.atomic():
+        tarefa = (
+            TarefaRelatorio.objects.select_for_update(skip_locked=True)
+            .filter(status=TarefaRelatorio.STATUS_PENDENTE, disponivel_em__lte=agora)
+            .order_by("disponivel_em", "id")
+            .first()
+        )
+        if tarefa is None:
+            return None
+        tarefa.status = TarefaRelatorio.STATUS_PROCESSANDO
+        tarefa.tentativas += 1
+        tarefa.iniciada_em = agora
+        tarefa.save(update_fields=["status", "tentativas", "iniciada_em"])
+    return tarefa
+
+
+def liberar_travadas() -> int:
+    """
+    Tarefas "processando" há mais de RFID_RELATORIOS_TEMPO_LIMITE (worker
+    reiniciado no meio) voltam para a fila, ou viram erro se esgotaram as
+    tentativas.
+    """
+    agora = timezone.now()
+    travadas = TarefaRelatorio.objects.filter(
+        status=TarefaRelatorio.STATUS_PROCESSANDO,
+        iniciada_em__lt=agora - tempo_limite(),
+    )
+    esgotadas = travadas.filter(tentativas__gte=max_tentativas()).update(
+        status=TarefaRelatorio.STATUS_ERRO,
+        erro="Tempo limite de processamento excedido.",
+        concluida_em=agora,
+    )
+    liberadas = travadas.update(
+        status=TarefaRelatorio.STATUS_PENDENTE, disponivel_em=agora
+    )
+    return esgotadas + liberadas
+
+
+def limpar_antigas(dias=None) -> int:
+    """Apaga tarefas finalizadas (e seus arquivos) com mais de `dias` dias."""
+    if dias is None:
+        dias = getattr(settings, "RFID_RELATORIOS_RETENCAO_DIAS", 7)
+    antigas = TarefaRelatorio.objects.filter(
+        status__in=(TarefaRelatorio.STATUS_CONCLUIDA, TarefaRelatorio.STATUS_ERRO),
+        criada_em__lt=timezone.now() - timedelta(days=int(dias)),
+    )
+    total = 0
+    for tarefa in antigas.iterator():
+        if tarefa.arquivo:
+            tarefa.arquivo.delete(save=False)
+        tarefa.delete()
+        total += 1
+    return total
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+def tipo_conteudo(tarefa: TarefaRelatorio) -> str:
+    if tarefa.formato == FORMATO_XLSX:
+        return CONTENT_TYPE_XLSX
+    if tarefa.gzip:
+        return "application/gzip"
+    return CONTENT_TYPES[tarefa.formato]
+
+
+def _total_linhas(filtro: FiltroRelatorio, formato):
+    if formato == FORMATO_XLSX:
+        if filtro.modo == MODO_DETALHADO:
+            qs = consulta_eventos(filtro)
+        else:
+            qs = consulta_botijoes(filtro)
+    else:
+        _, qs, _ = consulta_exportacao(filtro)
+    return contar(qs).total
+
+
+def _gerar_arquivo(tarefa: TarefaRelatorio, filtro: FiltroRelatorio) -> None:
+    def ao_avancar(linhas):
+        tarefa.progresso = linhas
+        TarefaRelatorio.objects.filter(pk=tarefa.pk).update(progresso=linhas)
+
+    # mesmo cache de arquivos do download direto: relatório repetido sem
+    # leituras novas não é gerado de novo
+    if tarefa.formato == FORMATO_XLSX:
+        arquivo, nome = planilha_em_cache(filtro, ao_avancar)
+    else:
+        blocos, _, nome = gerar_texto(filtro, tarefa.formato, tarefa.gzip, ao_avancar)
+        arquivo = cache_relatorios.abrir(
+            filtro,
+            tarefa.formato,
+            tarefa.gzip,
+            lambda destino: destino.writelines(blocos),
+        )
+    with arquivo:
+        tarefa.tamanho_bytes = os.fstat(arquivo.fileno()).st_size
+        tarefa.arquivo.save(nome, File(arquivo), save=False)
+    if not tarefa.progresso:  # acerto no cache: nenhuma linha percorrida
+        tarefa.progresso = tarefa.total or 0
+
+
+def _enviar_email(tarefa: TarefaRelatorio, filtro: FiltroRelatorio) -> None:
+    with tarefa.arquivo.open("rb") as arquivo:
+        conteudo = arquivo.read()
+    email = email_relatorio(
+        filtro,
+        tarefa.destinatario,
+        os.path.basename(tarefa.arquivo.name),
+        conteudo,
+        tipo_conteudo(tarefa),
+    )
+    email.send(fail_silently=False)
+
+
+def _registrar_falha(tarefa: TarefaRelatorio, erro: Exception) -> None:
+    logger.exception(
+        "Tarefa de relatório falhou | id=%s | tentativa=%s",
+        tarefa.pk,
+        tarefa.tentativas,
+    )
+    tarefa.erro = f"{type(erro).__name__}: {erro}"
+    if tarefa.tentativas < max_tentativas():
+        tarefa.status = TarefaRelatorio.STATUS_PENDENTE
+        tarefa.disponivel_em = timezone.now() + espera_nova_tentativa(tarefa.tentativas)
+    else:
+        tarefa.status = TarefaRelatorio.STATUS_ERRO
+        tarefa.concluida_em = timezone.now()
+    tarefa.save(update_fields=["status", "erro", "disponivel_em", "concluida_em"])
+
+
+def executar(tarefa: TarefaRelatorio) -> TarefaRelatorio:
+    """Gera (se ainda não gerado) e, se for o caso, envia. Nunca levanta."""
+    filtro = FiltroRelatorio.de_parametros(tarefa.filtros)
+    try:
+        if not tarefa.arquivo:
+            tarefa.progresso = 0
+            tarefa.total = _total_linhas(filtro, tarefa.formato)
+            tarefa.save(update_fields=["progresso", "total"])
+
+            inicio = time.monotonic()
+            _gerar_arquivo(tarefa, filtro)
+            tarefa.duracao_geracao = time.monotonic() - inicio
+            # arquivo gravado: uma nova tentativa de envio não gera de novo
+            tarefa.save(
+                update_fields=[
+                    "arquivo",
+                    "tamanho_bytes",
+                    "progresso",
+                    "duracao_geracao",
+                ]
+            )
+
+        if tarefa.tipo == TarefaRelatorio.TIPO_EMAIL:
+            inicio = time.monotonic()
+            _enviar_email(tarefa, filtro)
+            tarefa.duracao_envio = time.monotonic() - inicio
+    except Exception as erro:
+        _registrar_falha(tarefa, erro)
+        return tarefa
+
+    tarefa.status = TarefaRelatorio.STATUS_CONCLUIDA
+    tarefa.erro = ""
+    tarefa.concluida_em = timezone.now()
+    tarefa.save(update_fields=["status", "erro", "duracao_envio", "concluida_em"])
+    return tarefa
+
+
+def processar_proxima():
+    """Processa uma tarefa da fila; None se não havia nenhuma liberada."""
+    liberar_travadas()
+    tarefa = reservar_proxima()
+    if tarefa is not None:
+        executar(tarefa)
+    return tarefa
+
+
+# ============================================================
+# MÉTRICAS
+# ============================================================
+def _segundos(valor):
+    if isinstance(valor, timedelta):
+        return valor.total_seconds()
+    return valor or 0.0
+
+
+def estado_tarefas() -> dict:
+    """
+    Agregados das tarefas lidos do banco (os mesmos em qualquer processo):
+
+      por_status — quantidade de tarefas em cada status
+      concluidas — concluídas nas últimas JANELA_METRICAS
+      tempos     — {"medio", "max"} em segundos dessas concluídas:
+                   espera_fila (criada -> última reserva), geracao, envio
+                   (só e-mail) e total (criada -> concluída)
+    """
+    espera_fila = ExpressionWrapper(
+        F("iniciada_em") - F("criada_em"), output_field=DurationField()
+    )
+    total = ExpressionWrapper(
+        F("concluida_em") - F("criada_em"), output_field=DurationField()
+    )
+    tempos = {
+        "espera_fila": espera_fila,
+        "geracao": F("duracao_geracao"),
+        "envio": F("duracao_envio"),
+        "total": total,
+    }
+
+    concluidas = TarefaRelatorio.objects.filter(
+        status=TarefaRelatorio.STATUS_CONCLUIDA,
+        concluida_em__gte=timezone.now() - JANELA_METRICAS,
+    ).order_by()
+    agregados = concluidas.aggregate(
+        quantidade=Count("id"),
+        **{f"{nome}_medio": Avg(expressao) for nome, expressao in tempos.items()},
+        **{f"{nome}_max": Max(expressao) for nome, expressao in tempos.items()},
+    )
+    por_status = dict(
+        TarefaRelatorio.objects.order_by()
+        .values_list("status")
+        .annotate(quantidade=Count("id"))
+    )
+    return {
+        "por_status": {
+            status: por_status.get(status, 0)
+            for status, _ in TarefaRelatorio.STATUS_CHOICES
+        },
+        "concluidas": agregados["quantidade"],
+        "tempos": {
+            nome: {
+                "medio": _segundos(agregados[f"{nome}_medio"]),
+                "max": _segundos(agregados[f"{nome}_max"]),
+            }
+            for nome in tempos
+        },
+    }
@@ -0,0 +1,106 @@
+# rfid/utils/validadores.py
+"""
+GET condicional (ETag) para os endpoints JSON consultados em polling.
+
+O ETag é uma "marca d'água" das tabelas que alimentam a resposta: MAX(id) /
+MAX(atualizado_em), que o banco resolve lendo a ponta do índice. Se o
+cliente reenviar o mesmo ETag (If-None-Match), a view nem roda — resposta
+304 sem nenhuma query de agregação.
+
+O dashboard é exceção: o corpo vem do snapshot em cache, então o ETag é o
+do snapshot (versão + horário do cálculo).
+
+Métricas (/api/metricas/): condicional.<nome>.304 e condicional.<nome>.completa
+(taxa de 304 = 304 / (304 + completa)).
+"""
+from functools import wraps
+
+from django.db.models import Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from rfid.models import Botijao, LeituraCodigoBarra, LeituraRFID, LogAuditoria
+from rfid.utils import metricas
+from rfid.utils.cache_dashboard import cache_ativo
+from rfid.utils.dashboard import resumo_dashboard_em_cache
+
+
+def _etag(*partes) -> str:
+    return "-".join("0" if parte is None else str(parte) for parte in partes)
+
+
+def _max(qs, campo):
+    valor = qs.aggregate(maximo=Max(campo))["maximo"]
+    if hasattr(valor, "timestamp"):
+        return int(valor.timestamp() * 1_000_000)
+    return valor
+
+
+def marca_botijoes_e_leituras():
+    """Cadastro/edição/exclusão lógica de botijões + leituras RFID novas."""
+    return _etag(
+        _max(Botijao.all_objects.all(), "atualizado_em"),
+        _max(LeituraRFID.objects.all(), "id"),
+    )
+
+
+def marca_dados_relatorios():
+    """
+    Tudo o que os arquivos de relatório leem: botijões, leituras RFID, trocas
+    de envasadora (auditoria) e leituras de código — mais a data, porque o
+    status de requalificação muda com o dia.
+    """
+    return _etag(
+        timezone.localdate().isoformat(),
+        marca_botijoes_e_leituras(),
+        _max(LogAuditoria.objects.all(), "id"),
+        _max(LeituraCodigoBarra.objects.all(), "id"),
+    )
+
+
+def marca_dashboard(request):
+    # as faixas de requalificação e "hoje" mudam com a data
+    hoje = timezone.localdate().isoformat()
+    if not cache_ativo():
+        return _etag(hoje, marca_botijoes_e_leituras())
+
+    # o corpo sai do snapshot em cache, que pode estar alguns segundos atrás
+    # das tabelas: o ETag identifica o snapshot servido (sem query no acerto)
+    snapshot = resumo_dashboard_em_cache(incluir_proximas=True, com_versao=True)
+    return _etag(hoje, snapshot.versao, int(snapshot.calculado_em * 1000))
+
+
+def marca_relatorios(request):
+    return marca_botijoes_e_leituras()
+
+
+def marca_barcode_dashboard(request):
+    return _etag(
+        timezone.localdate().isoformat(),
+        _max(LeituraCodigoBarra.objects.all(), "id"),
+    )
+
+
+def _contar(nome, nao_modificado):
+    resultado = "304" if nao_modificado else "completa"
+    metricas.incrementar(f"condicional.{nome}.{resultado}")
+
+
+def com_etag(nome, marca):
+    """
+    Decora a view com `condition(etag_func=marca)` e conta 304 x respostas
+    completas em `nome`.
+    """
+
+    def decorador(view):
+        condicional = condition(etag_func=marca)(view)
+
+        @wraps(view)
+        def envolvida(request, *args, **kwargs):
+            resposta = condicional(request, *args, **kwargs)
+            _contar(nome, resposta.status_code == 304)
+            return resposta
+
+        return envolvida
+
+    return decorador
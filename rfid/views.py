@@ -1,7 +1,52 @@
 # rfid/views.py
 import json  # <--- Necessário para ler o corpo da requisição
 import logging
-from rfid.utils.send_email import enviar_relatorio_email
+from collections import Counter
+from rfid.utils.send_email import email_relatorio
+from rfid.utils.ingestao import (
+    ItemLeitura,
+    enfileirar_leituras,
+    estado_fila,
+    ingestao_assincrona,
+    ingerir_lote,
+    item_de_dict,
+    max_itens_lote,
+    registrar_leituras_em_lote,
+)
+from rfid.utils.ingestao_sql import motor_sql_ativo, registrar_leitura_sql
+from rfid.utils.deduplicacao import chave_leitura, obter_deduplicador, reservar_leitura
+from rfid.utils import idempotencia, metricas, protocolo_binario
+from rfid.utils.dashboard import resumo_dashboard_em_cache
+from rfid.utils.periodo import filtro_periodo
+from rfid.utils.exportacao import FORMATO_XLSX, FORMATOS, resposta_texto
+from rfid.utils.paginacao import contar, links, paginar_requisicao
+from rfid.utils.planilhas import CONTENT_TYPE_XLSX, planilha_em_cache, resposta_xlsx
+from rfid.utils.recentes import ultimas_leituras_por_botijao
+from rfid.utils.tarefas_relatorio import (
+    enfileirar,
+    estado_tarefas,
+    relatorios_assincronos,
+)
+from rfid.utils.relatorios import (
+    DETALHE_BARCODE_QR,
+    MODO_DETALHADO,
+    ORDEM_BOTIJOES,
+    ORDEM_DETALHE,
+    FiltroRelatorio,
+    botijoes_por_codigo,
+    consulta_botijoes,
+    consulta_eventos,
+    consulta_leituras_codigo,
+    leituras_dos_botijoes,
+    total_leituras_por_botijao,
+)
+from rfid.utils.validadores import com_etag, marca_dashboard, marca_relatorios
+from rfid.utils.cache_tags import (
+    TagRejeitada,
+    gravar_com_botijao,
+    invalidar_tag,
+    verificar_tag,
+)
 
 from rest_framework.decorators import api_view
 from rest_framework import serializers
@@ -9,18 +54,14 @@ from rest_framework import serializers
 from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiExample
 
 
-from .models import Botijao, LeituraRFID, LogAuditoria, LeituraCodigoBarra
+from .models import Botijao, LeituraRFID, LogAuditoria, LeituraCodigoBarra, TarefaRelatorio
 from .forms import BotijaoForm
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill
 from django.views.decorators.csrf import csrf_exempt 
-from datetime import timedelta
 from django.utils import timezone
 from django.shortcuts import get_object_or_404, redirect, render
 from django.http import JsonResponse  # <--- Necessário para a API
-from django.http import HttpResponse
-from django.core.mail import EmailMessage
-from django.db.models import Count, Q
+from django.db import IntegrityError
+from django.db.models import Q
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
@@ -29,26 +70,6 @@ from django.conf import settings
 
 logger = logging.getLogger("rfid")
 
-# -----------------------
-# Helpers de requalificação
-# -----------------------
-
-
-def _classificar_requal(botijao, hoje):
-    """
-    Retorna um rótulo simples para o status da requalificação:
-    vencida / proxima / em_dia / sem_data
-    """
-    proxima = botijao.data_proxima_requalificacao
-    if not proxima:
-        return "sem_data"
-    if proxima <= hoje:
-        return "vencida"
-    if hoje < proxima <= hoje + timedelta(days=90):
-        return "proxima"
-    return "em_dia"
-
-
 # -----------------------
 # Dashboard
 # -----------------------
@@ -56,121 +77,19 @@ def _classificar_requal(botijao, hoje):
 
 @login_required
 def dashboard(request):
-    hoje = timezone.now().date()
-
-    # Estatísticas principais
-    total_botijoes = Botijao.objects.filter(deletado=False).count()
-    leituras_hoje = LeituraRFID.objects.filter(data_hora__date=hoje).count()
-
-    # Botijões ativos = próximos da requalificação ou dentro da validade
-    botijoes_ativos = (
-        Botijao.objects.filter(deletado=False)
-        .exclude(status_requalificacao="vencida")
-        .count()
-    )
-
-    # --- Últimos botijões cadastrados + total de leituras ---
-
-    RFID_TAG_REGEX = r"^[0-9A-Fa-f]{24}$|^[0-9A-Fa-f]{32}$"
-
-    botijoes = (
-        Botijao.objects.filter(deletado=False, tag_rfid__regex=RFID_TAG_REGEX)
-        .annotate(num_leituras=Count("leituras"))
-        .order_by("-id")[:10]
-    )
-
-    # --- Leituras dos últimos 7 dias (gráfico e estatísticas futuras) ---
-    leituras_7_dias = []
-    for i in range(6, -1, -1):
-        dia = hoje - timedelta(days=i)
-        leituras_7_dias.append(
-            {
-                "data": dia.strftime("%d/%m"),
-                "total": LeituraRFID.objects.filter(data_hora__date=dia).count(),
-            }
-        )
-
-    # Requalificação
-    cilindros = Botijao.objects.filter(deletado=False)
-    requal_vencidas = []
-    requal_proximas = []
-    requal_em_dia = []
-    requal_sem_data = []
-
-    for c in cilindros:
-        status = _classificar_requal(c, hoje)
-        if status == "vencida":
-            requal_vencidas.append(c)
-        elif status == "proxima":
-            requal_proximas.append(c)
-        elif status == "em_dia":
-            requal_em_dia.append(c)
-        else:
-            requal_sem_data.append(c)
-
-    # Últimas leituras
-    ultimas_leituras = (
-        LeituraRFID.objects.select_related("botijao")
-        .filter(botijao__tag_rfid__regex=RFID_TAG_REGEX)
-        .order_by("-data_hora")[:10]
-    )
-
-    # CONTEXTO FINAL — **somente UM return**, no fim!
-    context = {
-        "total_botijoes": total_botijoes,
-        "leituras_hoje": leituras_hoje,
-        "botijoes_ativos": botijoes_ativos,
-        "botijoes": botijoes,
-        "ultimas_leituras": ultimas_leituras,
-        "leituras_7_dias": leituras_7_dias,
-        "qtd_requal_vencidas": len(requal_vencidas),
-        "qtd_requal_proximas": len(requal_proximas),
-        "qtd_requal_em_dia": len(requal_em_dia),
-        "qtd_requal_sem_data": len(requal_sem_data),
-    }
+    # KPIs, gráfico de 7 dias, faixas de requalificação e as tabelas de
+    # últimos botijões/leituras — servidos do snapshot em cache entre os
+    # refreshes da página (rfid/utils/cache_dashboard.py)
+    context = resumo_dashboard_em_cache(incluir_registros=True)
 
     return render(request, "rfid/dashboard.html", context)
 
 
 @login_required
+@com_etag("dashboard", marca_dashboard)
 def dashboard_api(request):
     """Versão JSON do dashboard para uso com AJAX, se necessário."""
-    hoje = timezone.now().date()
-
-    total_cilindros = Botijao.objects.filter(deletado=False).count()
-    total_leituras_hoje = LeituraRFID.objects.filter(data_hora__date=hoje).count()
-
-    leituras_7_dias = []
-    for i in range(6, -1, -1):
-        dia = hoje - timedelta(days=i)
-        count = LeituraRFID.objects.filter(data_hora__date=dia).count()
-        leituras_7_dias.append(
-            {
-                "data": dia.strftime("%d/%m"),
-                "total": count,
-            }
-        )
-
-    cilindros = list(Botijao.objects.filter(deletado=False))
-    requal_vencidas = []
-    requal_proximas = []
-    requal_em_dia = []
-    requal_sem_data = []
-
-    for c in cilindros:
-        status = _classificar_requal(c, hoje)
-        if status == "vencida":
-            requal_vencidas.append(c)
-        elif status == "proxima":
-            requal_proximas.append(c)
-        elif status == "em_dia":
-            requal_em_dia.append(c)
-        else:
-            requal_sem_data.append(c)
-
-    requal_proximas_ordenadas = sorted(
-        requal_proximas, key=lambda x: x.data_proxima_requalificacao or hoje
-    )[:10]
+    resumo = resumo_dashboard_em_cache(incluir_proximas=True)
 
     proximas_data = [
         {
@@ -188,23 +107,39 @@ def dashboard_api(request):
                 else "-"
             ),
         }
-        for c in requal_proximas_ordenadas
+        for c in resumo["requal_proximas"]
     ]
 
     return JsonResponse(
         {
-            "total_cilindros": total_cilindros,
-            "total_leituras_hoje": total_leituras_hoje,
-            "leituras_7_dias": leituras_7_dias,
-            "qtd_requal_vencidas": len(requal_vencidas),
-            "qtd_requal_proximas": len(requal_proximas),
-            "qtd_requal_em_dia": len(requal_em_dia),
-            "qtd_requal_sem_data": len(requal_sem_data),
+            "total_cilindros": resumo["total_botijoes"],
+            "total_leituras_hoje": resumo["leituras_hoje"],
+            "leituras_7_dias": resumo["leituras_7_dias"],
+            "qtd_requal_vencidas": resumo["qtd_requal_vencidas"],
+            "qtd_requal_proximas": resumo["qtd_requal_proximas"],
+            "qtd_requal_em_dia": resumo["qtd_requal_em_dia"],
+            "qtd_requal_sem_data": resumo["qtd_requal_sem_data"],
             "requal_proximas": proximas_data,
         }
     )
 
 
+@login_required
+def metricas_api(request):
+    """
+    contadores/tempos/valores: memória do processo que atendeu a requisição.
+    fila e relatorios: lidos do banco (LeituraPendente / TarefaRelatorio),
+    valem para todos os processos, inclusive os workers.
+    """
+    return JsonResponse(
+        {
+            **metricas.snapshot(),
+            "fila": estado_fila(),
+            "relatorios": estado_tarefas(),
+        }
+    )
+
+
 # -----------------------
 # Cadastro / edição de Botijão
 # -----------------------
@@ -260,17 +195,40 @@ def nova_leitura(request):
             messages.error(request, "Tag RFID é obrigatória.")
             return redirect("nova_leitura")
 
-        botijao, criado = Botijao.objects.get_or_create(tag_rfid=tag_rfid)
+        chave = chave_leitura(tag_rfid, operador=operador)
+        nova, _ = reservar_leitura(chave)
+        if not nova:
+            messages.info(
+                request,
+                f"Leitura repetida ignorada (mesma tag em menos de "
+                f"{obter_deduplicador().janela:g}s). Tag: {tag_rfid}",
+            )
+            return redirect("dashboard")
 
-        leitura = LeituraRFID.objects.create(
-            botijao=botijao,
-            operador=operador or None,
-            observacao=observacao or None,
-        )
+        def gravar(botijao_id, criado):
+            leitura = LeituraRFID(
+                botijao_id=botijao_id,
+                operador=operador or None,
+                observacao=observacao or None,
+            )
+            leitura.save(tag_rfid=tag_rfid)
+            return leitura, criado
+
+        try:
+            leitura, criado = gravar_com_botijao(tag_rfid, gravar)
+            botijao_id = leitura.botijao_id
+        except TagRejeitada:
+            obter_deduplicador().liberar(chave)
+            messages.error(request, f"Tag inválida: {tag_rfid}")
+            return redirect("nova_leitura")
+        except Exception:
+            obter_deduplicador().liberar(chave)
+            raise
+        obter_deduplicador().confirmar(chave, leitura.id)
 
         try:
             LogAuditoria.criar_log(
-                botijao=botijao,
+                botijao_id=botijao_id,
                 acao="leitura",
                 usuario=request.user if request.user.is_authenticated else None,
                 descricao=f"Leitura manual registrada. Observação: {observacao or '-'}",
@@ -297,216 +255,94 @@ def nova_leitura(request):
 # Relatórios de requalificação e leituras
 # -----------------------
 
-RFID_TAG_REGEX = r"^[0-9A-Fa-f]{24}$|^[0-9A-Fa-f]{32}$"
-
-
 @login_required
 def relatorios(request):
-    status = (request.GET.get("status") or "").strip()
-    data_inicio = (request.GET.get("data_inicio") or "").strip()
-    data_fim = (request.GET.get("data_fim") or "").strip()
-    data_tipo = (request.GET.get("data_tipo") or "cadastro").strip()  # cadastro | leitura
-    tipo = (request.GET.get("tipo") or "").strip()  # "" | rfid | barcode | qr
-    modo = (request.GET.get("modo") or "consolidado").strip()  # consolidado | detalhado
-
-    # Regras (sem campo novo) — baseadas no que existe no seu banco
-    RFID_TAG_REGEX = r"^[0-9A-Fa-f]{24}$|^[0-9A-Fa-f]{32}$|^E200[0-9A-Fa-f]+$"
-    QR_DECODED_REGEX = r"^\d{9}-\d{3}$"
-    BARCODE_REGEX = r"^\d{8,14}$"
-
-    def _lixo_q(prefix: str):
-        return (
-            Q(**{f"{prefix}tag_rfid__iexact": "Última leitura:"})
-            | Q(**{f"{prefix}tag_rfid__icontains": "Pesquisar ou digitar URL"})
-            | Q(**{f"{prefix}tag_rfid__icontains": "\ufeff"})
-        )
+    # filtros validados + consultas em rfid/utils/relatorios.py (mesmo motor
+    # da exportação e do e-mail)
+    filtro = FiltroRelatorio.de_parametros(request.GET)
+
+    context = {
+        "modo": filtro.modo,
+        "botijoes": None,
+        "eventos": None,
+        "leituras_barcode": None,
+        "detalhe_kind": filtro.detalhe,
+        "status_choices": Botijao.STATUS_CHOICES,
+        "data_inicio": filtro.parametros()["data_inicio"],
+        "data_fim": filtro.parametros()["data_fim"],
+        "data_tipo": filtro.data_tipo,
+        "status_selected": filtro.status,
+        "tipo_selected": filtro.tipo,
+    }
+
+    # páginas por cursor; totais por contagem limitada (rfid/utils/paginacao.py)
 
     # =====================================================
     # CONSOLIDADO
     # =====================================================
-    if modo != "detalhado":
-        botijoes = (
-            Botijao.objects.filter(deletado=False)
-            .exclude(_lixo_q(""))
-            .annotate(num_leituras=Count("leituras"))
-        )
-
-        if status:
-            botijoes = botijoes.filter(status=status)
-
-        if data_inicio or data_fim:
-            if data_tipo == "leitura":
-                if data_inicio:
-                    botijoes = botijoes.filter(leituras__data_hora__date__gte=data_inicio)
-                if data_fim:
-                    botijoes = botijoes.filter(leituras__data_hora__date__lte=data_fim)
-                botijoes = botijoes.distinct()
-            else:
-                if data_inicio:
-                    botijoes = botijoes.filter(data_cadastro__date__gte=data_inicio)
-                if data_fim:
-                    botijoes = botijoes.filter(data_cadastro__date__lte=data_fim)
-
-        # tipo
-        if tipo == "rfid":
-            botijoes = botijoes.filter(tag_rfid__regex=RFID_TAG_REGEX)
-        elif tipo == "qr":
-            botijoes = botijoes.exclude(tag_rfid__regex=RFID_TAG_REGEX).filter(tag_rfid__regex=QR_DECODED_REGEX)
-        elif tipo == "barcode":
-            botijoes = (
-                botijoes.exclude(tag_rfid__regex=RFID_TAG_REGEX)
-                .exclude(tag_rfid__regex=QR_DECODED_REGEX)
-                .filter(tag_rfid__regex=BARCODE_REGEX)
-            )
-
-        botijoes = botijoes.order_by("-data_cadastro")
-        total_leituras = sum(b.num_leituras for b in botijoes)
-
-        return render(
-            request,
-            "rfid/relatorios.html",
-            {
-                "modo": modo,
-                "botijoes": botijoes,
-                "eventos": None,
-                "leituras_barcode": None,
-                "detalhe_kind": None,
-                "total_filtrado": botijoes.count(),
-                "total_leituras": total_leituras,
-                "status_choices": Botijao.STATUS_CHOICES,
-                "data_inicio": data_inicio,
-                "data_fim": data_fim,
-                "data_tipo": data_tipo,
-                "status_selected": status,
-                "tipo_selected": tipo,
-            },
+    if filtro.modo != MODO_DETALHADO:
+        botijoes = consulta_botijoes(filtro)
+        pagina = paginar_requisicao(request, botijoes, ORDEM_BOTIJOES)
+        context.update(
+            botijoes=pagina.itens,
+            total_filtrado=contar(botijoes),
+            # leituras RFID dos botijões filtrados (= soma de num_leituras das
+            # linhas), num COUNT limitado como o total de botijões
+            total_leituras=contar(leituras_dos_botijoes(botijoes)),
+            paginacao=links(request, pagina),
         )
+        return render(request, "rfid/relatorios.html", context)
 
     # =====================================================
     # DETALHADO
-    # - RFID: mostra eventos de troca (LogAuditoria)
-    # - QR/BARCODE: mostra leituras reais (LeituraCodigoBarra)
+    # - QR/BARCODE (e "todos"): leituras reais (LeituraCodigoBarra)
+    # - RFID: eventos de troca de envasadora (LogAuditoria)
     # =====================================================
-
-    # Detalhado para QR/Barcode: usa LeituraCodigoBarra (é o que seu PDA grava)
-    if tipo in ("qr", "barcode") or tipo == "":
-        leituras = LeituraCodigoBarra.objects.all()
-
-        # filtrar QR vs barcode no campo "codigo" (que hoje está decodificado ou EAN)
-        if tipo == "qr":
-            leituras = leituras.filter(codigo__regex=QR_DECODED_REGEX)
-        elif tipo == "barcode":
-            leituras = leituras.filter(codigo__regex=BARCODE_REGEX)
-
-        # data filtro
-        if data_inicio:
-            leituras = leituras.filter(data_hora__date__gte=data_inicio)
-        if data_fim:
-            leituras = leituras.filter(data_hora__date__lte=data_fim)
-
-        # status não existe em LeituraCodigoBarra (sem FK)
-        # então só aplicamos status se conseguirmos mapear pelo Botijao.tag_rfid == leitura.codigo
-        # (isso funciona porque você cria Botijao(tag_rfid=codigo) no endpoint)
-        if status:
-            # pega tags de botijões com status e cruza com leituras
-            tags = Botijao.objects.filter(deletado=False, status=status).values_list("tag_rfid", flat=True)
-            leituras = leituras.filter(codigo__in=list(tags))
-
-        leituras = leituras.order_by("-data_hora")
-
-        return render(
-            request,
-            "rfid/relatorios.html",
-            {
-                "modo": modo,
-                "botijoes": None,
-                "eventos": None,
-                "leituras_barcode": leituras,
-                "detalhe_kind": "barcode_qr",
-                "total_filtrado": leituras.count(),
-                "total_leituras": leituras.count(),
-                "status_choices": Botijao.STATUS_CHOICES,
-                "data_inicio": data_inicio,
-                "data_fim": data_fim,
-                "data_tipo": data_tipo,
-                "status_selected": status,
-                "tipo_selected": tipo,
-            },
+    if filtro.detalhe == DETALHE_BARCODE_QR:
+        qs = consulta_leituras_codigo(filtro)
+        pagina = paginar_requisicao(request, qs, ORDEM_DETALHE)
+        context.update(
+            leituras_barcode=pagina.itens,
+            botijao_por_codigo=botijoes_por_codigo(pagina.itens),
         )
+    else:
+        qs = consulta_eventos(filtro)
+        pagina = paginar_requisicao(request, qs, ORDEM_DETALHE)
+        context.update(eventos=pagina.itens)
 
-    # Detalhado para RFID: mantém sua lógica de “troca distribuidora”
-    eventos = (
-        LogAuditoria.objects.select_related("botijao")
-        .filter(
-            botijao__deletado=False,
-            acao="leitura",
-            descricao__startswith="Envasadora atualizada automaticamente",
-        )
-        .exclude(_lixo_q("botijao__"))
+    total = contar(qs)
+    context.update(
+        total_filtrado=total, total_leituras=total, paginacao=links(request, pagina)
     )
 
-    if status:
-        eventos = eventos.filter(botijao__status=status)
-
-    if data_inicio or data_fim:
-        if data_tipo == "leitura":
-            if data_inicio:
-                eventos = eventos.filter(data_hora__date__gte=data_inicio)
-            if data_fim:
-                eventos = eventos.filter(data_hora__date__lte=data_fim)
-        else:
-            if data_inicio:
-                eventos = eventos.filter(botijao__data_cadastro__date__gte=data_inicio)
-            if data_fim:
-                eventos = eventos.filter(botijao__data_cadastro__date__lte=data_fim)
-
-    if tipo == "rfid":
-        eventos = eventos.filter(botijao__tag_rfid__regex=RFID_TAG_REGEX)
-
-    eventos = eventos.order_by("-data_hora")
-
-    return render(
-        request,
-        "rfid/relatorios.html",
-        {
-            "modo": modo,
-            "botijoes": None,
-            "eventos": eventos,
-            "leituras_barcode": None,
-            "detalhe_kind": "rfid_troca",
-            "total_filtrado": eventos.count(),
-            "total_leituras": eventos.count(),
-            "status_choices": Botijao.STATUS_CHOICES,
-            "data_inicio": data_inicio,
-            "data_fim": data_fim,
-            "data_tipo": data_tipo,
-            "status_selected": status,
-            "tipo_selected": tipo,
-        },
-    )
+    return render(request, "rfid/relatorios.html", context)
 
 
 @login_required
+@com_etag("relatorios", marca_relatorios)
 def relatorios_api(request):
     status = request.GET.get("status", "")
     data_inicio = request.GET.get("data_inicio", "")
     data_fim = request.GET.get("data_fim", "")
 
-    qs = Botijao.objects.filter(deletado=False).annotate(num_leituras=Count("leituras"))
+    qs = Botijao.objects.filter(deletado=False)
 
     if status:
         qs = qs.filter(status=status)
 
-    if data_inicio:
-        qs = qs.filter(data_cadastro__date__gte=data_inicio)
-
-    if data_fim:
-        qs = qs.filter(data_cadastro__date__lte=data_fim)
+    qs = qs.filter(**filtro_periodo("data_cadastro", data_inicio, data_fim))
 
-    qs = qs.order_by("-data_cadastro")
+    # página por cursor (?cursor=, ?por_pagina=); total de leituras por subquery
+    # só das linhas da página
+    pagina = paginar_requisicao(
+        request,
+        qs.annotate(num_leituras=total_leituras_por_botijao()),
+        ORDEM_BOTIJOES,
+    )
+    total = contar(qs)
 
     botijoes_data = []
-    for b in qs:
+    for b in pagina.itens:
         botijoes_data.append(
             {
                 "tag_rfid": b.tag_rfid,
@@ -519,7 +355,15 @@ def relatorios_api(request):
             }
         )
 
-    return JsonResponse({"botijoes": botijoes_data, "total_filtrado": qs.count()})
+    return JsonResponse(
+        {
+            "botijoes": botijoes_data,
+            "total_filtrado": total.total,
+            "total_exato": total.exato,
+            "proximo_cursor": pagina.proximo,
+            "cursor_anterior": pagina.anterior,
+        }
+    )
 
 
 # -----------------------
@@ -528,291 +372,30 @@ def relatorios_api(request):
 
 @login_required
 def exportar_excel(request):
-    hoje = timezone.now().date()
-
-    # filtros iguais ao relatório
-    data_tipo = (request.GET.get("data_tipo") or "cadastro").strip()  # cadastro | leitura
-    status = (request.GET.get("status") or "").strip()
-    data_inicio = (request.GET.get("data_inicio") or "").strip()
-    data_fim = (request.GET.get("data_fim") or "").strip()
-    tipo = (request.GET.get("tipo") or "").strip()  # "" | rfid | barcode | qr
-    modo = (request.GET.get("modo") or "consolidado").strip()  # consolidado | detalhado
-
-    # regras (sem campo novo) - MESMAS do relatorios()
-    RFID_TAG_REGEX = r"^[0-9A-Fa-f]{24}$|^[0-9A-Fa-f]{32}$|^E200[0-9A-Fa-f]+$"
-    QR_DECODED_REGEX = r"^\d{9}-\d{3}$"
-    BARCODE_REGEX = r"^\d{8,14}$"
-
-    def _lixo_q(prefix: str):
-        # prefix = "" (Botijao) ou "botijao__" (LogAuditoria)
-        return (
-            Q(**{f"{prefix}tag_rfid__iexact": "Última leitura:"})
-            | Q(**{f"{prefix}tag_rfid__icontains": "Pesquisar ou digitar URL"})
-            | Q(**{f"{prefix}tag_rfid__icontains": "\ufeff"})
-        )
-
-    def _fmt_date(d):
-        return d.strftime("%d/%m/%Y") if d else "-"
-
-    def _fmt_dt(dt):
-        if not dt:
-            return "-"
-        return timezone.localtime(dt).strftime("%d/%m/%Y %H:%M")
-
-    def _fmt_iso_date(s):
-        # datas no LogAuditoria (dados_novos/anteriores) às vezes vêm "YYYY-MM-DD"
-        if not s:
-            return "-"
-        if isinstance(s, str):
-            try:
-                y, m, d = s.split("-")
-                if len(y) == 4 and len(m) == 2 and len(d) == 2:
-                    return f"{d}/{m}/{y}"
-            except Exception:
-                pass
-        return str(s)
-
-    # ============================================================
-    # MODO DETALHADO (1 linha = 1 evento)
-    # ============================================================
-    if modo == "detalhado":
-        eventos = (
-            LogAuditoria.objects.select_related("botijao")
-            .filter(
-                botijao__deletado=False,
-                acao="leitura",
-                descricao__startswith="Envasadora atualizada automaticamente",
-            )
-            .exclude(_lixo_q("botijao__"))
-        )
-
-        if status:
-            eventos = eventos.filter(botijao__status=status)
-
-        # DATA (cadastro ou leitura)
-        if data_inicio or data_fim:
-            if data_tipo == "leitura":
-                if data_inicio:
-                    eventos = eventos.filter(data_hora__date__gte=data_inicio)
-                if data_fim:
-                    eventos = eventos.filter(data_hora__date__lte=data_fim)
-            else:
-                if data_inicio:
-                    eventos = eventos.filter(botijao__data_cadastro__date__gte=data_inicio)
-                if data_fim:
-                    eventos = eventos.filter(botijao__data_cadastro__date__lte=data_fim)
-
-        # TIPO (rfid / qr / barcode)
-        if tipo == "rfid":
-            eventos = eventos.filter(botijao__tag_rfid__regex=RFID_TAG_REGEX)
-        elif tipo == "qr":
-            eventos = eventos.exclude(botijao__tag_rfid__regex=RFID_TAG_REGEX).filter(
-                botijao__tag_rfid__regex=QR_DECODED_REGEX
-            )
-        elif tipo == "barcode":
-            eventos = (
-                eventos.exclude(botijao__tag_rfid__regex=RFID_TAG_REGEX)
-                .exclude(botijao__tag_rfid__regex=QR_DECODED_REGEX)
-                .filter(botijao__tag_rfid__regex=BARCODE_REGEX)
-            )
-
-        eventos = eventos.order_by("-data_hora")
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Relatório Detalhado"
-
-        headers = [
-            "Última Leitura",
-            "Tag",
-            "Nº Série",
-            "Fabricante",
-            "Tara",
-            "Últ. Requalificação",
-            "Próx. Requalificação",
-            "Penúlt. Envasadora",
-            "Data Penúltimo Env.",
-            "Últ. Envasadora",
-            "Data Último Env.",
-            "Troca Distribuidora",
-            "Status",
-            "Status Requalificação",
-            "Total Leituras",
-            "Data Cadastro",
-        ]
-        ws.append(headers)
-
-        header_fill = PatternFill(start_color="00D4FF", end_color="00D4FF", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        for e in eventos:
-            b = e.botijao
-            antes = e.dados_anteriores or {}
-            depois = e.dados_novos or {}
-
-            troca = f"{antes.get('ultima_envasadora') or '-'} → {depois.get('ultima_envasadora') or '-'}"
-
-            ws.append(
-                [
-                    _fmt_dt(e.data_hora),
-                    b.tag_rfid,
-                    b.numero_serie or "-",
-                    b.fabricante or "-",
-                    float(b.tara) if b.tara is not None else "-",
-                    _fmt_date(b.data_ultima_requalificacao),
-                    _fmt_date(b.data_proxima_requalificacao),
-                    depois.get("penultima_envasadora") or (b.penultima_envasadora or "-"),
-                    _fmt_iso_date(depois.get("data_penultimo_envasamento"))
-                    if depois.get("data_penultimo_envasamento")
-                    else _fmt_date(b.data_penultimo_envasamento),
-                    depois.get("ultima_envasadora") or (b.ultima_envasadora or "-"),
-                    _fmt_iso_date(depois.get("data_ultimo_envasamento"))
-                    if depois.get("data_ultimo_envasamento")
-                    else _fmt_date(b.data_ultimo_envasamento),
-                    troca,
-                    b.get_status_display(),
-                    b.get_status_requalificacao_display(),
-                    1,
-                    _fmt_dt(b.data_cadastro),
-                ]
-            )
-
-        # auto width
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    max_length = max(max_length, len(str(cell.value)))
-                except Exception:
-                    pass
-            ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    # filtros iguais ao relatório (mesmo motor de consultas)
+    filtro = FiltroRelatorio.de_parametros(request.GET)
+    formato = (request.GET.get("formato") or FORMATO_XLSX).strip().lower()
+    if formato not in FORMATOS:
+        return JsonResponse(
+            {"success": False, "error": f"Formato inválido: use {', '.join(FORMATOS)}"},
+            status=400,
         )
-        filename = f"relatorio_detalhado_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        wb.save(response)
-        return response
-
-    # ============================================================
-    # MODO CONSOLIDADO (1 linha = 1 botijão)
-    # ============================================================
-    qs = (
-        Botijao.objects.filter(deletado=False)
-        .exclude(_lixo_q(""))
-        .annotate(num_leituras=Count("leituras"))
-    )
 
-    if status:
-        qs = qs.filter(status=status)
+    gzip = request.GET.get("gzip", "").strip().lower() in ("1", "true", "sim")
 
-    # DATA (cadastro ou leitura)
-    if data_inicio or data_fim:
-        if data_tipo == "leitura":
-            if data_inicio:
-                qs = qs.filter(leituras__data_hora__date__gte=data_inicio)
-            if data_fim:
-                qs = qs.filter(leituras__data_hora__date__lte=data_fim)
-            qs = qs.distinct()
-        else:
-            if data_inicio:
-                qs = qs.filter(data_cadastro__date__gte=data_inicio)
-            if data_fim:
-                qs = qs.filter(data_cadastro__date__lte=data_fim)
-
-    # TIPO (rfid / qr / barcode)
-    if tipo == "rfid":
-        qs = qs.filter(tag_rfid__regex=RFID_TAG_REGEX)
-    elif tipo == "qr":
-        qs = qs.exclude(tag_rfid__regex=RFID_TAG_REGEX).filter(tag_rfid__regex=QR_DECODED_REGEX)
-    elif tipo == "barcode":
-        qs = (
-            qs.exclude(tag_rfid__regex=RFID_TAG_REGEX)
-            .exclude(tag_rfid__regex=QR_DECODED_REGEX)
-            .filter(tag_rfid__regex=BARCODE_REGEX)
+    if relatorios_assincronos():
+        # gerado pelo worker (processar_tarefas_relatorio); a página acompanha
+        tarefa = enfileirar(
+            TarefaRelatorio.TIPO_EXPORTACAO, filtro, request.user, formato, gzip
         )
+        return redirect("tarefa_relatorio", tarefa_id=tarefa.pk)
 
-    qs = qs.order_by("tag_rfid")
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Relatório Consolidado"
-
-    headers = [
-        "Última Leitura",
-        "Tag",
-        "Nº Série",
-        "Fabricante",
-        "Tara",
-        "Últ. Requalificação",
-        "Próx. Requalificação",
-        "Penúlt. Envasadora",
-        "Data Penúltimo Env.",
-        "Últ. Envasadora",
-        "Data Último Env.",
-        "Status",
-        "Status Requalificação",
-        "Total Leituras",
-        "Data Cadastro",
-    ]
-    ws.append(headers)
-
-    header_fill = PatternFill(start_color="00D4FF", end_color="00D4FF", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    for c in qs:
-        ws.append(
-            [
-                _fmt_dt(getattr(c, "ultima_leitura", None)),
-                c.tag_rfid,
-                c.numero_serie or "-",
-                c.fabricante or "-",
-                float(c.tara) if c.tara is not None else "-",
-                _fmt_date(c.data_ultima_requalificacao),
-                _fmt_date(c.data_proxima_requalificacao),
-                c.penultima_envasadora or "-",
-                _fmt_date(c.data_penultimo_envasamento),
-                c.ultima_envasadora or "-",
-                _fmt_date(c.data_ultimo_envasamento),
-                c.get_status_display(),
-                c.get_status_requalificacao_display(),
-                c.num_leituras,
-                _fmt_dt(c.data_cadastro),
-            ]
-        )
-
-    # auto width
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                max_length = max(max_length, len(str(cell.value)))
-            except Exception:
-                pass
-        ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    filename = f"relatorio_consolidado_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
-
+    if formato == FORMATO_XLSX:
+        # planilha em modo write-only num arquivo temporário, enviada em blocos
+        return resposta_xlsx(filtro)
 
+    # CSV/NDJSON: tuplas do banco direto para a resposta (gzip=1 comprime)
+    return resposta_texto(filtro, formato, gzip=gzip)
 
 
 # -----------------------
@@ -823,10 +406,14 @@ def exportar_excel(request):
 @login_required
 def historico_botijao(request, botijao_id):
     botijao = get_object_or_404(Botijao, id=botijao_id, deletado=False)
-    leituras = LeituraRFID.objects.filter(botijao=botijao).order_by("-data_hora")
+    leituras = LeituraRFID.objects.filter(botijao=botijao)
+    # índice leitura_botijao_data_idx: cada página lê só as suas linhas
+    pagina = paginar_requisicao(request, leituras, ("-data_hora", "-id"))
     context = {
         "botijao": botijao,
-        "leituras": leituras,
+        "leituras": pagina.itens,
+        "total_leituras": contar(leituras),
+        "paginacao": links(request, pagina),
     }
     return render(request, "historico_botijao.html", context)
 
@@ -844,11 +431,7 @@ def buscar_historico(request):
 
     resultados = []
 
-    qs = (
-        Botijao.objects.filter(deletado=False)
-        .annotate(num_leituras=Count("leituras"))
-        .prefetch_related("leituras")
-    )
+    qs = Botijao.objects.filter(deletado=False)
 
     # -------------------------
     # 🔍 Filtros Avançados
@@ -886,11 +469,22 @@ def buscar_historico(request):
         qs = qs.filter(leituras__operador__icontains=operador).distinct()
 
     # -------------------------
-    # 🔍 Montagem dos Resultados
+    # 🔍 Montagem dos Resultados (uma página por vez, por cursor)
     # -------------------------
+    pagina = paginar_requisicao(
+        request,
+        qs.annotate(num_leituras=total_leituras_por_botijao()),
+        ("-id",),
+    )
+
+    # últimas 10 leituras de cada botijão da página numa query só
+    ultimas = ultimas_leituras_por_botijao(
+        [b.id for b in pagina.itens],
+        campos=("data_hora", "operador", "observacao"),
+    )
 
-    for b in qs:
-        leituras = list(b.leituras.order_by("-data_hora")[:10])
+    for b in pagina.itens:
+        leituras = ultimas.get(b.id, [])
 
         leituras_data = [
             {
@@ -926,7 +520,8 @@ def buscar_historico(request):
     context = {
         "query": query,
         "resultados": resultados,
-        "total_encontrados": len(resultados),
+        "total_encontrados": contar(qs),
+        "paginacao": links(request, pagina),
         "status_choices": Botijao.STATUS_CHOICES,
         "status_requal_choices": Botijao.STATUS_REQUALIFICACAO_CHOICES,
     }
@@ -940,60 +535,25 @@ def buscar_historico(request):
 
 @login_required
 def enviar_email_view(request):
-    from io import BytesIO
     from urllib.parse import urlencode
 
-    # filtros (GET ou POST)
-    data_tipo = (request.POST.get("data_tipo") or request.GET.get("data_tipo") or "cadastro").strip()
-    tipo = (request.POST.get("tipo") or request.GET.get("tipo") or "").strip()  # "" | rfid | barcode | qr
-    status_filtro = (request.POST.get("status") or request.GET.get("status") or "").strip()
-    data_inicio = (request.POST.get("data_inicio") or request.GET.get("data_inicio") or "").strip()
-    data_fim = (request.POST.get("data_fim") or request.GET.get("data_fim") or "").strip()
-    modo = (request.POST.get("modo") or request.GET.get("modo") or "consolidado").strip()  # consolidado | detalhado
-
-    # regras (sem campo novo) - MESMAS do relatorios()
-    RFID_TAG_REGEX = r"^[0-9A-Fa-f]{24}$|^[0-9A-Fa-f]{32}$|^E200[0-9A-Fa-f]+$"
-    QR_DECODED_REGEX = r"^\d{9}-\d{3}$"
-    BARCODE_REGEX = r"^\d{8,14}$"
-
-    def _lixo_q(prefix: str):
-        return (
-            Q(**{f"{prefix}tag_rfid__iexact": "Última leitura:"})
-            | Q(**{f"{prefix}tag_rfid__icontains": "Pesquisar ou digitar URL"})
-            | Q(**{f"{prefix}tag_rfid__icontains": "\ufeff"})
-        )
-
-    # labels humanos
-    if tipo == "rfid":
-        tipo_label = "Somente RFID"
-    elif tipo == "barcode":
-        tipo_label = "Somente Código de Barras"
-    elif tipo == "qr":
-        tipo_label = "Somente Código QR"
-    else:
-        tipo_label = "Todos"
-
-    status_label = status_filtro if status_filtro else "Todos"
-    periodo_label = f"{data_inicio or '—'} até {data_fim or '—'}" if (data_inicio or data_fim) else "Todos"
-    data_tipo_label = "Data da Leitura" if data_tipo == "leitura" else "Data de Cadastro"
-    modo_label = "Detalhado (por leitura)" if modo == "detalhado" else "Consolidado (por botijão)"
-
-    filtro_resumo = (
-        f"Tipo: {tipo_label} | "
-        f"Status: {status_label} | "
-        f"Modo: {modo_label} | "
-        f"Data: {data_tipo_label} | "
-        f"Período: {periodo_label}"
+    # filtros (GET ou POST), validados pelo motor de consultas dos relatórios
+    filtro = FiltroRelatorio.de_parametros(
+        {
+            campo: request.POST.get(campo) or request.GET.get(campo)
+            for campo in FiltroRelatorio._fields
+        }
     )
+    filtros_qs = filtro.parametros()
+    tipo = filtro.tipo
+    status_filtro = filtro.status
+    data_inicio = filtros_qs["data_inicio"]
+    data_fim = filtros_qs["data_fim"]
+    data_tipo = filtro.data_tipo
+    modo = filtro.modo
+
+    filtro_resumo = filtro.resumo()
 
-    filtros_qs = {
-        "tipo": tipo,
-        "status": status_filtro,
-        "modo": modo,
-        "data_tipo": data_tipo,
-        "data_inicio": data_inicio,
-        "data_fim": data_fim,
-    }
     redirect_relatorios = f"/relatorios/?{urlencode(filtros_qs)}"
 
     def render_pagina(destinatario_value=""):
@@ -1020,292 +580,24 @@ def enviar_email_view(request):
         messages.error(request, "Email de destinatário é obrigatório.")
         return render_pagina(destinatario_value=destinatario)
 
-    def _fmt_date(d):
-        return d.strftime("%d/%m/%Y") if d else "-"
-
-    def _fmt_dt(dt):
-        if not dt:
-            return "-"
-        return timezone.localtime(dt).strftime("%d/%m/%Y %H:%M")
-
-    def _fmt_iso_date(s):
-        if not s:
-            return "-"
-        if isinstance(s, str):
-            try:
-                y, m, d = s.split("-")
-                if len(y) == 4 and len(m) == 2 and len(d) == 2:
-                    return f"{d}/{m}/{y}"
-            except Exception:
-                pass
-        return str(s)
+    if relatorios_assincronos():
+        # geração + envio (com novas tentativas) ficam com o worker
+        tarefa = enfileirar(
+            TarefaRelatorio.TIPO_EMAIL, filtro, request.user, destinatario=destinatario
+        )
+        messages.success(
+            request, f"Relatório na fila: será enviado para {destinatario}."
+        )
+        return redirect("tarefa_relatorio", tarefa_id=tarefa.pk)
 
     try:
-        wb = Workbook()
-        ws = wb.active
-
-        header_fill = PatternFill(start_color="00D4FF", end_color="00D4FF", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-
-        total_itens = 0
-        total_leituras_relatorio = 0
-
-        # ============================================================
-        # DETALHADO
-        # ============================================================
-        if modo == "detalhado":
-            ws.title = "Relatório Detalhado"
-
-            eventos = (
-                LogAuditoria.objects.select_related("botijao")
-                .filter(
-                    botijao__deletado=False,
-                    acao="leitura",
-                    descricao__startswith="Envasadora atualizada automaticamente",
-                )
-                .exclude(_lixo_q("botijao__"))
-            )
-
-            if status_filtro:
-                eventos = eventos.filter(botijao__status=status_filtro)
-
-            if data_inicio or data_fim:
-                if data_tipo == "leitura":
-                    if data_inicio:
-                        eventos = eventos.filter(data_hora__date__gte=data_inicio)
-                    if data_fim:
-                        eventos = eventos.filter(data_hora__date__lte=data_fim)
-                else:
-                    if data_inicio:
-                        eventos = eventos.filter(botijao__data_cadastro__date__gte=data_inicio)
-                    if data_fim:
-                        eventos = eventos.filter(botijao__data_cadastro__date__lte=data_fim)
-
-            if tipo == "rfid":
-                eventos = eventos.filter(botijao__tag_rfid__regex=RFID_TAG_REGEX)
-            elif tipo == "qr":
-                eventos = eventos.exclude(botijao__tag_rfid__regex=RFID_TAG_REGEX).filter(
-                    botijao__tag_rfid__regex=QR_DECODED_REGEX
-                )
-            elif tipo == "barcode":
-                eventos = (
-                    eventos.exclude(botijao__tag_rfid__regex=RFID_TAG_REGEX)
-                    .exclude(botijao__tag_rfid__regex=QR_DECODED_REGEX)
-                    .filter(botijao__tag_rfid__regex=BARCODE_REGEX)
-                )
+        # mesma planilha do download (rfid/utils/planilhas.py), do cache de arquivos
+        arquivo, filename = planilha_em_cache(filtro)
+        with arquivo:
+            conteudo_excel = arquivo.read()
 
-            eventos = eventos.order_by("-data_hora")
-
-            headers = [
-                "Última Leitura",
-                "Tag",
-                "Nº Série",
-                "Fabricante",
-                "Tara",
-                "Últ. Requalificação",
-                "Próx. Requalificação",
-                "Penúlt. Envasadora",
-                "Data Penúltimo Env.",
-                "Últ. Envasadora",
-                "Data Último Env.",
-                "Troca Distribuidora",
-                "Status",
-                "Status Requalificação",
-                "Total Leituras",
-                "Data Cadastro",
-            ]
-            ws.append(headers)
-
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-
-            for e in eventos:
-                b = e.botijao
-                antes = e.dados_anteriores or {}
-                depois = e.dados_novos or {}
-                troca = f"{antes.get('ultima_envasadora') or '-'} → {depois.get('ultima_envasadora') or '-'}"
-
-                ws.append(
-                    [
-                        _fmt_dt(e.data_hora),
-                        b.tag_rfid,
-                        b.numero_serie or "-",
-                        b.fabricante or "-",
-                        float(b.tara) if b.tara is not None else "-",
-                        _fmt_date(b.data_ultima_requalificacao),
-                        _fmt_date(b.data_proxima_requalificacao),
-                        depois.get("penultima_envasadora") or (b.penultima_envasadora or "-"),
-                        _fmt_iso_date(depois.get("data_penultimo_envasamento"))
-                        if depois.get("data_penultimo_envasamento")
-                        else _fmt_date(b.data_penultimo_envasamento),
-                        depois.get("ultima_envasadora") or (b.ultima_envasadora or "-"),
-                        _fmt_iso_date(depois.get("data_ultimo_envasamento"))
-                        if depois.get("data_ultimo_envasamento")
-                        else _fmt_date(b.data_ultimo_envasamento),
-                        troca,
-                        b.get_status_display(),
-                        b.get_status_requalificacao_display(),
-                        1,
-                        _fmt_dt(b.data_cadastro),
-                    ]
-                )
-
-            total_itens = eventos.count()
-            total_leituras_relatorio = total_itens
-            filename = f"relatorio_detalhado_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-
-        # ============================================================
-        # CONSOLIDADO
-        # ============================================================
-        else:
-            ws.title = "Relatório Consolidado"
-
-            qs = (
-                Botijao.objects.filter(deletado=False)
-                .exclude(_lixo_q(""))
-                .annotate(num_leituras=Count("leituras"))
-            )
-
-            if status_filtro:
-                qs = qs.filter(status=status_filtro)
-
-            if data_inicio or data_fim:
-                if data_tipo == "leitura":
-                    if data_inicio:
-                        qs = qs.filter(leituras__data_hora__date__gte=data_inicio)
-                    if data_fim:
-                        qs = qs.filter(leituras__data_hora__date__lte=data_fim)
-                    qs = qs.distinct()
-                else:
-                    if data_inicio:
-                        qs = qs.filter(data_cadastro__date__gte=data_inicio)
-                    if data_fim:
-                        qs = qs.filter(data_cadastro__date__lte=data_fim)
-
-            if tipo == "rfid":
-                qs = qs.filter(tag_rfid__regex=RFID_TAG_REGEX)
-            elif tipo == "qr":
-                qs = qs.exclude(tag_rfid__regex=RFID_TAG_REGEX).filter(tag_rfid__regex=QR_DECODED_REGEX)
-            elif tipo == "barcode":
-                qs = (
-                    qs.exclude(tag_rfid__regex=RFID_TAG_REGEX)
-                    .exclude(tag_rfid__regex=QR_DECODED_REGEX)
-                    .filter(tag_rfid__regex=BARCODE_REGEX)
-                )
-
-            qs = qs.order_by("tag_rfid")
-
-            headers = [
-                "Última Leitura",
-                "Tag",
-                "Nº Série",
-                "Fabricante",
-                "Tara",
-                "Últ. Requalificação",
-                "Próx. Requalificação",
-                "Penúlt. Envasadora",
-                "Data Penúltimo Env.",
-                "Últ. Envasadora",
-                "Data Último Env.",
-                "Status",
-                "Status Requalificação",
-                "Total Leituras",
-                "Data Cadastro",
-            ]
-            ws.append(headers)
-
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-
-            for c in qs:
-                ws.append(
-                    [
-                        _fmt_dt(getattr(c, "ultima_leitura", None)),
-                        c.tag_rfid,
-                        c.numero_serie or "-",
-                        c.fabricante or "-",
-                        float(c.tara) if c.tara is not None else "-",
-                        _fmt_date(c.data_ultima_requalificacao),
-                        _fmt_date(c.data_proxima_requalificacao),
-                        c.penultima_envasadora or "-",
-                        _fmt_date(c.data_penultimo_envasamento),
-                        c.ultima_envasadora or "-",
-                        _fmt_date(c.data_ultimo_envasamento),
-                        c.get_status_display(),
-                        c.get_status_requalificacao_display(),
-                        c.num_leituras,
-                        _fmt_dt(c.data_cadastro),
-                    ]
-                )
-
-            total_itens = qs.count()
-            total_leituras_relatorio = sum(int(b.num_leituras or 0) for b in qs)
-            filename = f"relatorio_consolidado_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-
-        # auto width
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    max_length = max(max_length, len(str(cell.value)))
-                except Exception:
-                    pass
-            ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
-
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
-
-        data_hora_str = timezone.localtime(timezone.now()).strftime("%d/%m/%Y às %H:%M")
-
-        corpo_html = f"""
-        <!DOCTYPE html>
-        <html lang="pt-BR">
-        <head><meta charset="UTF-8"></head>
-        <body>
-            <div style="font-family:Segoe UI, Tahoma, Geneva, Verdana, sans-serif;">
-                <h2>RFID FLOW - Relatório</h2>
-                <p>Relatório gerado em <strong>{data_hora_str}</strong>.</p>
-                <p><strong>Filtros aplicados:</strong> {filtro_resumo}</p>
-                <p><strong>Total de itens no relatório:</strong> {total_itens}</p>
-                <p><strong>Total de leituras (conforme filtros):</strong> {total_leituras_relatorio}</p>
-                <p>Segue anexo o arquivo Excel.</p>
-            </div>
-        </body>
-        </html>
-        """
-
-        raw_from = (getattr(settings, "DEFAULT_FROM_EMAIL", "") or "").strip()
-        safe_from = raw_from
-        if "<" in safe_from and ">" in safe_from:
-            safe_from = safe_from.split("<", 1)[1].split(">", 1)[0].strip()
-
-        logger.warning(
-            "EMAIL SEND ATTEMPT | raw_from=%r | safe_from=%r | to=%r | filename=%r | modo=%r | tipo=%r",
-            raw_from,
-            safe_from,
-            destinatario,
-            filename,
-            modo,
-            tipo,
-        )
-
-        email = EmailMessage(
-            subject=f"Relatório RFID Flow - {data_hora_str}",
-            body=corpo_html,
-            from_email=safe_from,
-            to=[destinatario],
-        )
-        email.content_subtype = "html"
-        email.attach(
-            filename,
-            excel_buffer.getvalue(),
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        email = email_relatorio(
+            filtro, destinatario, filename, conteudo_excel, CONTENT_TYPE_XLSX
         )
         email.send(fail_silently=False)
 
@@ -1354,6 +646,21 @@ enviar_relatorio_view = enviar_email_view
                 help_text="Observação livre",
                 default="Leitura Mobile",
             ),
+            "leitor_id": serializers.CharField(
+                required=False, help_text="Identificação do leitor/coletor"
+            ),
+            "data_hora": serializers.DateTimeField(
+                required=False, help_text="Horário da leitura no coletor (offline)"
+            ),
+            "seq": serializers.IntegerField(
+                required=False,
+                help_text="Sequencial da leitura no leitor (idempotência; exige leitor_id)",
+            ),
+            "id_cliente": serializers.UUIDField(
+                required=False, help_text="UUID da leitura gerado no coletor (idempotência)"
+            ),
+            "antena": serializers.IntegerField(required=False),
+            "rssi": serializers.IntegerField(required=False),
         },
     ),
     responses={
@@ -1365,6 +672,15 @@ enviar_relatorio_view = enviar_email_view
                 "id_leitura": serializers.IntegerField(),
             },
         ),
+        202: inline_serializer(
+            name="RFIDLeituraResponseAccepted",
+            fields={
+                "success": serializers.BooleanField(),
+                "message": serializers.CharField(),
+                "pendente": serializers.BooleanField(),
+                "id_pendente": serializers.IntegerField(),
+            },
+        ),
         400: inline_serializer(
             name="RFIDLeituraResponseBadRequest",
             fields={
@@ -1407,44 +723,412 @@ def api_registrar_leitura(request):
         return JsonResponse({"success": False, "error": "Use POST"}, status=405)
 
     try:
-        # 1. Ler o JSON que vem do Android
-        data = json.loads(request.body)
+        # 1. Formato binário compacto (uma leitura) ou JSON vindo do Android
+        if request.content_type == protocolo_binario.CONTENT_TYPE:
+            try:
+                itens = protocolo_binario.decodificar_lote(request.body)
+            except ValueError as e:
+                return JsonResponse({"success": False, "error": str(e)}, status=400)
+            if len(itens) != 1:
+                return JsonResponse(
+                    {
+                        "success": False,
+                        "error": "Envie uma leitura (várias: /api/leituras/lote/)",
+                    },
+                    status=400,
+                )
+            item = itens[0]
+        else:
+            data = json.loads(request.body)
 
-        # 2. Pegar os dados usando os nomes exatos
-        tag_rfid = data.get("tag_rfid", "").strip()
-        operador = data.get("operador", "PDA_C72").strip()  # Valor padrão se vier vazio
-        observacao = data.get("observacao", "Leitura Mobile").strip()
+            # 2. Pegar os dados usando os nomes exatos (operador/observacao têm valor padrão)
+            try:
+                item = item_de_dict(data)
+            except ValueError as e:
+                return JsonResponse({"success": False, "error": str(e)}, status=400)
 
-        if not tag_rfid:
+        try:
+            verificar_tag(item.tag_rfid)
+        except TagRejeitada as e:
+            return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+        # 2a. Retry do coletor (mesmo seq/id_cliente): devolve a leitura original
+        id_original = idempotencia.buscar_leitura(item.chave_idempotencia)
+        if id_original is not None:
             return JsonResponse(
-                {"success": False, "error": "Tag RFID faltando"}, status=400
+                {
+                    "success": True,
+                    "message": "Leitura já registrada",
+                    "duplicada": True,
+                    "id_leitura": id_original,
+                }
             )
 
-        # 3. Lógica do Botijão (Mantida igual a sua)
-        botijao, criado = Botijao.objects.get_or_create(tag_rfid=tag_rfid)
+        # 2b. Repetição do mesmo EPC no mesmo leitor dentro da janela: descarta sem escrever
+        chave = chave_leitura(item.tag_rfid, item.leitor_id, item.antena, item.operador)
+        nova, id_anterior = reservar_leitura(chave)
+        if not nova:
+            return JsonResponse(
+                {
+                    "success": True,
+                    "message": "Leitura duplicada ignorada",
+                    "duplicada": True,
+                    "id_leitura": id_anterior,
+                }
+            )
 
-        leitura = LeituraRFID.objects.create(
-            botijao=botijao,
-            operador=operador,
-            observacao=observacao,
-        )
+        # 2c. Modo assíncrono: só enfileira e confirma o recebimento (202)
+        if ingestao_assincrona():
+            try:
+                (id_pendente,) = enfileirar_leituras([item])
+            except Exception:
+                obter_deduplicador().liberar(chave)
+                raise
+            return JsonResponse(
+                {
+                    "success": True,
+                    "message": "Leitura recebida",
+                    "pendente": True,
+                    "id_pendente": id_pendente,
+                },
+                status=202,
+            )
 
-        # 4. Log (O usuário será None pois não tem sessão, isso evita o crash)
         try:
-            LogAuditoria.criar_log(
-                botijao=botijao,
-                acao="leitura",
-                usuario=None,  # Android sem login envia como None ou Sistema
-                descricao=f"Leitura API. Op: {operador}",
-                dados_anteriores=None,
-                dados_novos={"leitura_id": leitura.id},
-            )
+            id_leitura = _registrar_leitura_api(item)
         except Exception:
-            pass
+            obter_deduplicador().liberar(chave)
+            raise
 
+        obter_deduplicador().confirmar(chave, id_leitura)
         return JsonResponse(
-            {"success": True, "message": "Sucesso", "id_leitura": leitura.id}
+            {"success": True, "message": "Sucesso", "id_leitura": id_leitura}
+        )
+
+    except Exception as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=500)
+
+
+def _registrar_leitura_api(item):
+    """Grava uma leitura recebida pela API e retorna o id da LeituraRFID."""
+    try:
+        id_leitura = _gravar_leitura_api(item)
+    except IntegrityError:
+        # retry concorrente com a mesma chave: a outra requisição gravou primeiro
+        id_original = idempotencia.buscar_leitura(item.chave_idempotencia)
+        if id_original is None:
+            raise
+        return id_original
+
+    idempotencia.lembrar(item.chave_idempotencia, id_leitura)
+    return id_leitura
+
+
+def _gravar_leitura_api(item):
+    # 3a. Motor set-based (RFID_INGESTAO_MOTOR="sql"): mesmas regras, menos round trips
+    if motor_sql_ativo():
+        resultado = registrar_leitura_sql(
+            item, descricao_log=f"Leitura API. Op: {item.operador}"
         )
+        return resultado["id_leitura"]
+
+    # 3. Lógica do Botijão (tag -> id via cache em memória; cria se não existir).
+    # O UPDATE do contador confirma o id em cache (tag e deletado=False).
+    def gravar(botijao_id, criado):
+        leitura = LeituraRFID(
+            botijao_id=botijao_id,
+            operador=item.operador,
+            observacao=item.observacao,
+            rssi=item.rssi,
+            antena=item.antena,
+            leitor_id=item.leitor_id,
+            data_hora=item.data_hora or timezone.now(),
+            chave_idempotencia=item.chave_idempotencia,
+        )
+        leitura.save(tag_rfid=item.tag_rfid)
+        return leitura
+
+    try:
+        leitura = gravar_com_botijao(item.tag_rfid, gravar)
+    except IntegrityError:
+        # id em cache de um botijão removido em outro worker: esquece a tag
+        invalidar_tag(item.tag_rfid)
+        raise
+
+    # 4. Log (O usuário será None pois não tem sessão, isso evita o crash)
+    try:
+        LogAuditoria.criar_log(
+            botijao_id=leitura.botijao_id,
+            acao="leitura",
+            usuario=None,  # Android sem login envia como None ou Sistema
+            descricao=f"Leitura API. Op: {item.operador}",
+            dados_anteriores=None,
+            dados_novos={"leitura_id": leitura.id},
+        )
+    except Exception:
+        pass
+
+    return leitura.id
+
+
+# -----------------------
+# API para registrar leituras RFID em lote
+# -----------------------
+@extend_schema(
+    tags=["RFID"],
+    summary="Registrar leituras RFID em lote",
+    description=(
+        "Recebe várias leituras em um único POST (ex.: passagem de um portal fixo). "
+        "Todas as tags são resolvidas de uma vez, botijões faltantes e leituras são "
+        "criados em bulk e o ciclo de envasadoras + auditoria são aplicados em uma "
+        "única transação. A resposta traz o status de cada item, na mesma ordem do envio."
+    ),
+    auth=[],
+    request=inline_serializer(
+        name="RFIDLoteRequest",
+        fields={
+            "operador": serializers.CharField(
+                required=False,
+                help_text="Operador/dispositivo padrão para os itens do lote",
+                default="PDA_C72",
+            ),
+            "observacao": serializers.CharField(
+                required=False,
+                help_text="Observação padrão para os itens do lote",
+                default="Leitura Mobile",
+            ),
+            "leitor_id": serializers.CharField(
+                required=False, help_text="Identificação do leitor/portal"
+            ),
+            "leituras": serializers.ListField(
+                child=serializers.DictField(),
+                help_text="Lista de leituras: tag_rfid (obrigatório), operador, observacao, rssi, antena, leitor_id",
+            ),
+        },
+    ),
+    responses={
+        200: inline_serializer(
+            name="RFIDLoteResponseOK",
+            fields={
+                "success": serializers.BooleanField(),
+                "total": serializers.IntegerField(),
+                "registradas": serializers.IntegerField(),
+                "duplicadas": serializers.IntegerField(),
+                "erros": serializers.IntegerField(),
+                "itens": serializers.ListField(child=serializers.DictField()),
+            },
+        ),
+        400: inline_serializer(
+            name="RFIDLoteResponseBadRequest",
+            fields={
+                "success": serializers.BooleanField(),
+                "error": serializers.CharField(),
+            },
+        ),
+        500: inline_serializer(
+            name="RFIDLoteResponseServerError",
+            fields={
+                "success": serializers.BooleanField(),
+                "error": serializers.CharField(),
+            },
+        ),
+    },
+    examples=[
+        OpenApiExample(
+            "Exemplo lote (portal)",
+            value={
+                "operador": "PORTAL_01",
+                "leitor_id": "portal-doca-1",
+                "leituras": [
+                    {"tag_rfid": "E2000017221101441890ABCD", "antena": 1, "rssi": -52},
+                    {"tag_rfid": "E2000017221101441890ABCE", "antena": 2},
+                ],
+            },
+            request_only=True,
+        ),
+    ],
+)
+@api_view(["POST"])
+@csrf_exempt
+def api_registrar_leituras_lote(request):
+    try:
+        itens_resposta, validos = _ler_lote(request)
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
 
+    try:
+        resultados = ingerir_lote([item for _, item in validos])
     except Exception as e:
+        logger.exception("Erro ao registrar lote RFID")
         return JsonResponse({"success": False, "error": str(e)}, status=500)
+
+    for (indice, _), resultado in zip(validos, resultados):
+        itens_resposta[indice] = {"indice": indice, **resultado}
+
+    contagem = Counter(r["status"] for r in itens_resposta)
+    resposta = {
+        "success": True,
+        "total": len(itens_resposta),
+        "duplicadas": contagem["duplicada"],
+        "erros": contagem["erro"],
+        "itens": itens_resposta,
+    }
+
+    # Modo assíncrono: um único INSERT na fila e resposta 202
+    if ingestao_assincrona():
+        return JsonResponse({**resposta, "pendentes": contagem["pendente"]}, status=202)
+
+    return JsonResponse({**resposta, "registradas": contagem["ok"]})
+
+
+def _ler_lote(request):
+    """
+    Lê o corpo do lote (JSON ou formato binário compacto).
+
+    Retorna (itens_resposta, validos): a lista de respostas já com os erros de
+    validação por item e os pares (indice, ItemLeitura) a registrar.
+    Levanta ValueError quando o envio inteiro é inválido.
+    """
+    limite = max_itens_lote()
+
+    if request.content_type == protocolo_binario.CONTENT_TYPE:
+        if protocolo_binario.quantidade_declarada(request.body) > limite:
+            raise ValueError(f"Lote excede {limite} itens")
+        itens = protocolo_binario.decodificar_lote(request.body)
+        if not itens:
+            raise ValueError("Lote vazio")
+        return [None] * len(itens), list(enumerate(itens))
+
+    try:
+        data = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("JSON inválido")
+
+    # aceita {"leituras": [...]} (com cabeçalho) ou a lista pura
+    if isinstance(data, list):
+        cabecalho, brutos = {}, data
+    elif isinstance(data, dict) and isinstance(data.get("leituras"), list):
+        cabecalho, brutos = data, data["leituras"]
+    else:
+        raise ValueError("Envie uma lista em 'leituras'")
+
+    if not brutos:
+        raise ValueError("Lote vazio")
+    if len(brutos) > limite:
+        raise ValueError(f"Lote excede {limite} itens")
+
+    itens_resposta = [None] * len(brutos)
+    validos = []
+    for indice, bruto in enumerate(brutos):
+        try:
+            validos.append((indice, item_de_dict(bruto, padrao=cabecalho)))
+        except ValueError as e:
+            itens_resposta[indice] = {"indice": indice, "status": "erro", "error": str(e)}
+    return itens_resposta, validos
+
+
+# -----------------------
+# API de backfill em NDJSON (coletores que ficaram offline)
+# -----------------------
+NDJSON_MAX_FALHAS_DETALHADAS = 100
+
+
+@csrf_exempt
+def api_registrar_leituras_ndjson(request):
+    """
+    Uma leitura JSON por linha, com o `data_hora` do coletor.
+
+    O corpo é lido linha a linha (nunca inteiro em memória) e gravado em blocos
+    de RFID_LOTE_MAX_ITENS via `registrar_leituras_em_lote`; dentro de cada
+    bloco o ciclo de envasadoras avança na ordem cronológica das leituras, e
+    leituras mais antigas que a última já aplicada ao botijão (de um bloco
+    anterior ou do histórico ao vivo) são gravadas sem avançar o ciclo.
+    Sem deduplicação: leituras antigas da mesma tag são eventos distintos.
+
+    Valores padrão de operador/observacao/leitor_id podem vir na query string.
+    """
+    if request.method != "POST":
+        return JsonResponse(
+            {"success": False, "error": "Método não permitido"}, status=405
+        )
+
+    cabecalho = {
+        chave: request.GET[chave]
+        for chave in ("operador", "observacao", "leitor_id")
+        if request.GET.get(chave)
+    }
+    tamanho_bloco = max_itens_lote()
+    bloco = []  # (número da linha, ItemLeitura)
+    totais = Counter()
+    falhas = []
+
+    def registrar_falha(numero, erro):
+        totais["erros"] += 1
+        if len(falhas) < NDJSON_MAX_FALHAS_DETALHADAS:
+            falhas.append({"linha": numero, "error": erro})
+
+    def gravar_bloco():
+        resultados = registrar_leituras_em_lote(
+            [item for _, item in bloco], descricao_origem="Leitura API (backfill)"
+        )
+        for (numero, _), resultado in zip(bloco, resultados):
+            if resultado["status"] == "ok":
+                totais["registradas"] += 1
+            elif resultado["status"] == "duplicada":
+                totais["duplicadas"] += 1
+            else:
+                registrar_falha(numero, resultado["error"])
+        bloco.clear()
+
+    try:
+        # HttpRequest é iterável por linha (readline sobre o stream do corpo)
+        for numero, linha in enumerate(request, start=1):
+            if not linha.strip():
+                continue
+            totais["linhas"] += 1
+
+            try:
+                dados = json.loads(linha)
+            except ValueError:
+                registrar_falha(numero, "JSON inválido")
+                continue
+
+            try:
+                item = item_de_dict(dados, padrao=cabecalho)
+                verificar_tag(item.tag_rfid)
+            except ValueError as e:
+                registrar_falha(numero, str(e))
+                continue
+
+            bloco.append((numero, item))
+            if len(bloco) >= tamanho_bloco:
+                gravar_bloco()
+
+        if bloco:
+            gravar_bloco()
+
+    except Exception as e:
+        # blocos anteriores já foram gravados: o coletor pode reenviar a partir
+        # da primeira linha não confirmada
+        logger.exception("Erro no backfill NDJSON")
+        return JsonResponse(
+            {
+                "success": False,
+                "error": str(e),
+                "linhas": totais["linhas"],
+                "registradas": totais["registradas"],
+            },
+            status=500,
+        )
+
+    metricas.incrementar("backfill.leituras", totais["registradas"])
+    return JsonResponse(
+        {
+            "success": True,
+            "linhas": totais["linhas"],
+            "registradas": totais["registradas"],
+            "duplicadas": totais["duplicadas"],
+            "erros": totais["erros"],
+            "falhas": falhas,
+        }
+    )
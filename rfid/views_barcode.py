@@ -8,7 +8,12 @@ from django.shortcuts import render
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
-from .models import Botijao, LeituraCodigoBarra, LogAuditoria
+from django.db.models import F
+
+from .models import Botijao, LeituraCodigoBarra, LogAuditoria, ResumoLeituraDiaria
+from .utils.cache_tags import TagRejeitada, gravar_com_botijao, verificar_tag
+from .utils.resumo_diario import totais_por_dia
+from .utils.validadores import com_etag, marca_barcode_dashboard
 
 
 def _normalizar_codigo_lido(valor: str) -> str:
@@ -68,6 +73,11 @@ def api_registrar_barcode(request):
 
         codigo = _normalizar_codigo_lido(bruto)
 
+        try:
+            verificar_tag(codigo)
+        except TagRejeitada as e:
+            return JsonResponse({"success": False, "error": str(e)}, status=400)
+
         # 1) Salvar leitura
         leitura = LeituraCodigoBarra.objects.create(
             codigo=codigo,
@@ -78,15 +88,20 @@ def api_registrar_barcode(request):
 
         # 2) Criar/obter Botijao
         # ⚠️ Recomendo depois trocar para um campo apropriado (ex: codigo_barra)
-        botijao, criado = Botijao.objects.get_or_create(tag_rfid=codigo)
+        def contar(botijao_id, criado):
+            # filtra tag/deletado: confirma o id que veio do cache de tags
+            if not Botijao.objects.filter(pk=botijao_id, tag_rfid=codigo).update(
+                total_leituras=F("total_leituras") + 1
+            ):
+                raise Botijao.DoesNotExist
+            return botijao_id, criado
 
-        botijao.total_leituras += 1
-        botijao.save(update_fields=["total_leituras"])
+        botijao_id, criado = gravar_com_botijao(codigo, contar)
 
         # 3) Log
         try:
             LogAuditoria.criar_log(
-                botijao=botijao,
+                botijao_id=botijao_id,
                 acao="leitura",
                 usuario=None,
                 descricao="Leitura automática via Barcode/QR",
@@ -114,9 +129,13 @@ def pagina_leitura_barcode(request):
     return render(request, "rfid/barcode_leitura.html")
 
 
+@com_etag("barcode_dashboard", marca_barcode_dashboard)
 def api_barcode_dashboard(request):
-    hoje = timezone.now().date()
-    leituras_hoje = LeituraCodigoBarra.objects.filter(data_hora__date=hoje).count()
+    # contagem do dia vem do resumo diário (não varre as leituras)
+    hoje = timezone.localdate()
+    leituras_hoje = totais_por_dia(ResumoLeituraDiaria.TIPO_CODIGO, hoje, hoje).get(
+        hoje, 0
+    )
     ultimas = list(LeituraCodigoBarra.objects.all().order_by("-data_hora")[:20])
 
     dados = []
@@ -0,0 +1,72 @@
+# rfid/views_eventos.py
+"""
+Server-Sent Events para as telas ao vivo (dashboard e leitura de código).
+
+Views assíncronas: só funcionam servidas pelo ASGI (uvicorn app.asgi). No
+WSGI respondem 204 e as páginas voltam ao refresh/polling antigo.
+
+Cada conexão dura no máximo RFID_SSE_MAX_SEGUNDOS; o EventSource do navegador
+reconecta sozinho (campo `retry`) e recebe o estado atual ao reconectar.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from rfid.utils import metricas
+from rfid.utils.eventos import formatar_sse, obter_transmissor
+
+# comentário SSE enviado quando não há eventos (mantém proxies com a conexão aberta)
+HEARTBEAT_SEGUNDOS = 15
+RETRY_MS = 3000
+
+
+async def _fluxo(nome):
+    transmissor = obter_transmissor(nome)
+    fila = await transmissor.assinar()
+    fim = time.monotonic() + int(getattr(settings, "RFID_SSE_MAX_SEGUNDOS", 300))
+    metricas.incrementar(f"sse.{nome}.aberturas")
+
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                evento, dados = await asyncio.wait_for(
+                    fila.get(), min(HEARTBEAT_SEGUNDOS, restante)
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield formatar_sse(evento, dados)
+    finally:
+        transmissor.cancelar(fila)
+
+
+def _resposta_sse(request, nome):
+    if not isinstance(request, ASGIRequest):
+        # WSGI: o stream prenderia um worker; o cliente cai no polling
+        return HttpResponse(status=204)
+
+    resposta = StreamingHttpResponse(_fluxo(nome), content_type="text/event-stream")
+    resposta["Cache-Control"] = "no-cache"
+    resposta["X-Accel-Buffering"] = "no"
+    return resposta
+
+
+async def eventos_dashboard(request):
+    """📡 Deltas do dashboard (leituras novas, contadores, faixas de requalificação)."""
+    autenticado = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not autenticado:
+        return HttpResponse(status=401)
+    return _resposta_sse(request, "dashboard")
+
+
+async def eventos_barcode(request):
+    """📡 Deltas da tela de leitura de código (mesmo acesso de /api/barcode/dashboard/)."""
+    return _resposta_sse(request, "barcode")
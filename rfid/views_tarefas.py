@@ -0,0 +1,84 @@
+# rfid/views_tarefas.py
+"""
+Acompanhamento das tarefas de relatório em segundo plano
+(rfid/utils/tarefas_relatorio.py): página de status com progresso, JSON para
+o polling da página e download do arquivo gerado. Cada usuário vê só as
+próprias tarefas (staff vê todas).
+"""
+import os
+from urllib.parse import urlencode
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+
+from rfid.models import TarefaRelatorio
+from rfid.utils.relatorios import FiltroRelatorio
+from rfid.utils.tarefas_relatorio import tipo_conteudo
+
+# intervalo do polling da página de status
+POLLING_MS = 2000
+
+
+def _tarefa_do_usuario(request, tarefa_id) -> TarefaRelatorio:
+    tarefa = get_object_or_404(TarefaRelatorio, pk=tarefa_id)
+    if not request.user.is_staff and tarefa.usuario_id != request.user.id:
+        raise Http404
+    return tarefa
+
+
+def _estado(tarefa: TarefaRelatorio) -> dict:
+    concluida = tarefa.status == TarefaRelatorio.STATUS_CONCLUIDA and tarefa.arquivo
+    return {
+        "id": tarefa.pk,
+        "tipo": tarefa.tipo,
+        "status": tarefa.status,
+        "status_display": tarefa.get_status_display(),
+        "finalizada": tarefa.finalizada,
+        "progresso": tarefa.progresso,
+        "total": tarefa.total,
+        "percentual": tarefa.percentual,
+        "tentativas": tarefa.tentativas,
+        "erro": tarefa.erro,
+        "destinatario": tarefa.destinatario,
+        "tamanho_bytes": tarefa.tamanho_bytes,
+        "duracao_geracao": tarefa.duracao_geracao,
+        "duracao_envio": tarefa.duracao_envio,
+        "download_url": (
+            reverse("baixar_tarefa_relatorio", args=[tarefa.pk]) if concluida else None
+        ),
+    }
+
+
+@login_required
+def tarefa_relatorio(request, tarefa_id):
+    tarefa = _tarefa_do_usuario(request, tarefa_id)
+    filtro = FiltroRelatorio.de_parametros(tarefa.filtros)
+    context = {
+        "tarefa": tarefa,
+        "estado": _estado(tarefa),
+        "filtro_resumo": filtro.resumo(),
+        "filtros_qs": urlencode(filtro.parametros()),
+        "polling_ms": POLLING_MS,
+    }
+    return render(request, "tarefa_relatorio.html", context)
+
+
+@login_required
+def tarefa_relatorio_api(request, tarefa_id):
+    tarefa = _tarefa_do_usuario(request, tarefa_id)
+    return JsonResponse({"success": True, **_estado(tarefa)})
+
+
+@login_required
+def baixar_tarefa_relatorio(request, tarefa_id):
+    tarefa = _tarefa_do_usuario(request, tarefa_id)
+    if tarefa.status != TarefaRelatorio.STATUS_CONCLUIDA or not tarefa.arquivo:
+        raise Http404
+    return FileResponse(
+        tarefa.arquivo.open("rb"),
+        as_attachment=True,
+        filename=os.path.basename(tarefa.arquivo.name),
+        content_type=tipo_conteudo(tarefa),
+    )
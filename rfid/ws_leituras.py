@@ -0,0 +1,196 @@
+# rfid/ws_leituras.py
+"""
+Ingestão contínua de leituras RFID via WebSocket (ASGI).
+
+O leitor (PDA/portal) abre uma conexão em /ws/leituras/ e envia frames
+compactos; cada frame recebe um ack com o `id_leitura`. As gravações são
+agrupadas em micro-lotes (RFID_WS_LOTE_MS) e passam por `ingerir_lote` —
+mesmas regras da API HTTP (tag-lixo, deduplicação, fila assíncrona, ciclo).
+
+Conexão:
+    ws://host/ws/leituras/?token=...&operador=PORTAL_01&leitor_id=doca-1
+    (token só é exigido se RFID_WS_TOKEN estiver definido)
+
+Frame (texto JSON; objeto ou lista de objetos):
+    {"n": 17, "t": "E200...", "a": 1, "r": -52}
+    n = número do frame (ecoado no ack), t = tag_rfid, a = antena, r = rssi,
+    o = operador, b = observacao, l = leitor_id, s = seq, u = id_cliente
+    (nomes longos também valem)
+
+Ack (um por micro-lote):
+    {"acks": [{"n": 17, "status": "ok", "id_leitura": 123}, ...]}
+    status: ok | duplicada | pendente | erro
+"""
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from rfid.utils import metricas
+from rfid.utils.ingestao import ingerir_lote, item_de_dict, max_itens_lote
+
+logger = logging.getLogger("rfid")
+
+ROTA = "/ws/leituras/"
+
+# nomes curtos aceitos nos frames
+ALIASES = {
+    "t": "tag_rfid",
+    "o": "operador",
+    "b": "observacao",
+    "l": "leitor_id",
+    "a": "antena",
+    "r": "rssi",
+    "s": "seq",
+    "u": "id_cliente",
+}
+
+
+def _janela_lote() -> float:
+    return int(getattr(settings, "RFID_WS_LOTE_MS", 10)) / 1000
+
+
+def _expandir(frame):
+    if not isinstance(frame, dict):
+        return frame
+    return {ALIASES.get(chave, chave): valor for chave, valor in frame.items()}
+
+
+def _gravar(itens):
+    """Roda em thread: conexão de banco própria, descartada ao fim de cada lote."""
+    close_old_connections()
+    try:
+        return ingerir_lote(itens, descricao_origem="Leitura WebSocket")
+    finally:
+        close_old_connections()
+
+
+class SessaoLeituras:
+    """Uma conexão WebSocket: recebe frames, agrupa e devolve acks."""
+
+    def __init__(self, scope, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        self.parametros = {chave: valores[-1] for chave, valores in query.items()}
+        self.send = send
+        self.fila = asyncio.Queue()
+        self.aberta = True
+
+    def autorizada(self) -> bool:
+        token = getattr(settings, "RFID_WS_TOKEN", "")
+        return not token or self.parametros.get("token") == token
+
+    async def enviar(self, mensagem):
+        if not self.aberta:
+            return
+        try:
+            await self.send({"type": "websocket.send", "text": json.dumps(mensagem)})
+        except Exception:
+            # cliente caiu no meio do envio; as leituras já foram gravadas
+            self.aberta = False
+
+    async def receber_frame(self, texto):
+        try:
+            dados = json.loads(texto)
+        except ValueError:
+            await self.enviar(
+                {"acks": [{"n": None, "status": "erro", "error": "JSON inválido"}]}
+            )
+            return
+
+        frames = dados if isinstance(dados, list) else [dados]
+        erros = []
+        for frame in frames:
+            numero = frame.get("n") if isinstance(frame, dict) else None
+            try:
+                item = item_de_dict(_expandir(frame), padrao=self.parametros)
+            except ValueError as e:
+                erros.append({"n": numero, "status": "erro", "error": str(e)})
+                continue
+            self.fila.put_nowait((numero, item))
+
+        metricas.incrementar("ws.frames", len(frames))
+        if erros:
+            await self.enviar({"acks": erros})
+
+    async def descarregar(self):
+        """Micro-lotes: espera o primeiro item, junta o que chegar na janela e grava."""
+        janela = _janela_lote()
+        limite = max_itens_lote()
+        fim = False
+
+        while not fim:
+            primeiro = await self.fila.get()
+            if primeiro is None:
+                break
+            pendentes = [primeiro]
+            prazo = time.monotonic() + janela
+
+            while len(pendentes) < limite:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    proximo = await asyncio.wait_for(self.fila.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                if proximo is None:
+                    fim = True
+                    break
+                pendentes.append(proximo)
+
+            inicio = time.monotonic()
+            try:
+                resultados = await sync_to_async(_gravar)(
+                    [item for _, item in pendentes]
+                )
+            except Exception as e:
+                logger.exception("Erro ao registrar micro-lote WebSocket")
+                resultados = [{"status": "erro", "error": str(e)}] * len(pendentes)
+            metricas.registrar_tempo("ws.lote", time.monotonic() - inicio)
+            metricas.incrementar("ws.leituras", len(pendentes))
+
+            await self.enviar(
+                {
+                    "acks": [
+                        {"n": numero, **resultado}
+                        for (numero, _), resultado in zip(pendentes, resultados)
+                    ]
+                }
+            )
+
+
+async def ws_leituras(scope, receive, send):
+    """Aplicação ASGI do endpoint /ws/leituras/."""
+    mensagem = await receive()
+    if mensagem["type"] != "websocket.connect":
+        return
+
+    sessao = SessaoLeituras(scope, send)
+    if not sessao.autorizada():
+        await send({"type": "websocket.close", "code": 4401})
+        return
+
+    await send({"type": "websocket.accept"})
+    metricas.incrementar("ws.conexoes")
+    tarefa = asyncio.create_task(sessao.descarregar())
+
+    try:
+        while True:
+            mensagem = await receive()
+            if mensagem["type"] == "websocket.disconnect":
+                sessao.aberta = False
+                break
+            if mensagem["type"] == "websocket.receive":
+                texto = mensagem.get("text")
+                if texto is None:
+                    texto = (mensagem.get("bytes") or b"").decode("utf-8", "replace")
+                await sessao.receber_frame(texto)
+    finally:
+        # o que já foi recebido é gravado mesmo se o cliente desconectar
+        sessao.fila.put_nowait(None)
+        await tarefa
@@ -0,0 +1,172 @@
+"""
+Benchmark: pico de memória (RSS) da exportação XLSX x número de linhas.
+
+Compara o motor em streaming (rfid/utils/planilhas.py: write-only + iterator)
+com o Workbook em memória usado antes (células estilizadas + largura
+automática percorrendo todas as colunas). Cada medição roda num processo
+próprio, porque o pico de RSS (ru_maxrss) só cresce.
+
+Usa um banco SQLite próprio (populado na primeira execução) para não tocar
+nos dados reais.
+
+Uso:
+    python scripts/benchmark_exportacao.py --linhas 10000 50000 200000
+    python scripts/benchmark_exportacao.py --modo detalhado --linhas 50000
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+BANCO = Path(tempfile.gettempdir()) / "rfid-benchmark-exportacao.sqlite3"
+
+sys.path.insert(0, str(RAIZ))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BANCO}")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from openpyxl import Workbook  # noqa: E402
+
+from rfid.models import Botijao, LogAuditoria  # noqa: E402
+from rfid.utils.planilhas import escrever_xlsx, planilha_relatorio  # noqa: E402
+from rfid.utils.relatorios import DESCRICAO_TROCA, FiltroRelatorio  # noqa: E402
+
+
+def pico_rss_mb():
+    # Linux: KB; macOS: bytes
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def popular(quantidade):
+    """Garante `quantidade` botijões, cada um com um evento de troca."""
+    existentes = Botijao.all_objects.count()
+    if existentes >= quantidade:
+        return
+    print(f"populando {quantidade - existentes} botijões em {BANCO} ...")
+    hoje = timezone.localdate()
+    for inicio in range(existentes, quantidade, 5000):
+        fim = min(inicio + 5000, quantidade)
+        botijoes = Botijao.all_objects.bulk_create(
+            [
+                Botijao(
+                    tag_rfid=f"E200{i:020X}",
+                    numero_serie=f"NS-{i:08d}",
+                    fabricante="Fabricante Exemplo",
+                    tipo_identificador="rfid",
+                    data_proxima_requalificacao=hoje,
+                    ultima_envasadora="Distribuidora 2",
+                    penultima_envasadora="Distribuidora 1",
+                    data_ultimo_envasamento=hoje,
+                    ultima_leitura_em=timezone.now(),
+                    total_leituras=3,
+                )
+                for i in range(inicio, fim)
+            ]
+        )
+        LogAuditoria.objects.bulk_create(
+            [
+                LogAuditoria(
+                    botijao_id=b.id,
+                    acao="leitura",
+                    descricao=f"{DESCRICAO_TROCA} por leitura RFID.",
+                    dados_anteriores={"ultima_envasadora": "Distribuidora 1"},
+                    dados_novos={"ultima_envasadora": "Distribuidora 2"},
+                )
+                for b in botijoes
+            ]
+        )
+
+
+def exportar_workbook(destino, titulo, cabecalho, linhas):
+    """Como era antes: planilha inteira em memória + largura automática."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = titulo
+    ws.append(cabecalho)
+    for linha in linhas:
+        ws.append(linha)
+    for column in ws.columns:
+        maior = max(len(str(cell.value)) for cell in column)
+        ws.column_dimensions[column[0].column_letter].width = min(maior + 2, 50)
+    wb.save(destino)
+
+
+def medir(motor, modo, quantidade):
+    titulo, cabecalho, linhas, _ = planilha_relatorio(FiltroRelatorio(modo=modo))
+    linhas = islice(linhas, quantidade)
+    base = pico_rss_mb()
+    inicio = time.perf_counter()
+    with tempfile.TemporaryFile() as arquivo:
+        if motor == "streaming":
+            escrever_xlsx(arquivo, titulo, cabecalho, linhas)
+        else:
+            exportar_workbook(arquivo, titulo, cabecalho, linhas)
+        tamanho = arquivo.tell()
+    segundos = time.perf_counter() - inicio
+    print(f"{base:.1f} {pico_rss_mb():.1f} {segundos:.2f} {tamanho}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--linhas", type=int, nargs="+", default=[1000, 10000, 50000, 200000]
+    )
+    parser.add_argument(
+        "--modo", choices=("consolidado", "detalhado"), default="consolidado"
+    )
+    parser.add_argument("--motores", nargs="+", default=["streaming", "workbook"])
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        medir(args.medir, args.modo, args.linhas[0])
+        return
+
+    call_command("migrate", verbosity=0)
+    popular(max(args.linhas))
+
+    print(f"modo={args.modo}  banco={BANCO}")
+    print(
+        f"{'linhas':>8} {'motor':>10} {'RSS base':>9} {'pico RSS':>9} "
+        f"{'acréscimo':>10} {'tempo':>7} {'arquivo':>9}"
+    )
+    for quantidade in args.linhas:
+        for motor in args.motores:
+            saida = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--medir",
+                    motor,
+                    "--modo",
+                    args.modo,
+                    "--linhas",
+                    str(quantidade),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+                env=os.environ,
+            ).stdout.split()
+            base, pico, segundos, tamanho = (float(v) for v in saida[-4:])
+            print(
+                f"{quantidade:>8} {motor:>10} {base:>7.1f}MB {pico:>7.1f}MB "
+                f"{pico - base:>8.1f}MB {segundos:>6.2f}s {tamanho / 1024:>7.0f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
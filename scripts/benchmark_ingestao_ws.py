@@ -0,0 +1,157 @@
+"""
+Teste de carga local: leituras/s via HTTP (/api/registrar-leitura/) x WebSocket
+(/ws/leituras/), ambos servidos pelo uvicorn (app.asgi).
+
+Sobe um uvicorn em uma porta livre com um banco SQLite temporário (ou usa
+--url para apontar para um servidor já rodando) e dispara o mesmo volume de
+leituras pelos dois caminhos.
+
+Uso:
+    python scripts/benchmark_ingestao_ws.py --leituras 2000
+    python scripts/benchmark_ingestao_ws.py --url http://127.0.0.1:8000 --clientes 8
+
+Com o SQLite temporário use 1 cliente: requisições HTTP simultâneas disputam
+o lock de escrita ("database is locked"). Para medir concorrência, aponte
+--url para um servidor com PostgreSQL.
+
+Requer uvicorn, httpx e websockets (requirements.txt).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import websockets
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _tag(cliente, i):
+    # frota pequena e repetida, como um portal lendo os mesmos cilindros
+    return f"BENCH-{cliente:02d}-{i % 200:04d}"
+
+
+def subir_servidor(porta):
+    banco = Path(tempfile.mkdtemp()) / "benchmark.sqlite3"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{banco}",
+        "DEBUG": "False",
+        "RFID_DEDUP_JANELA_SEGUNDOS": "0",
+    }
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--noinput", "-v", "0"],
+        cwd=RAIZ,
+        env=env,
+        check=True,
+    )
+    processo = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.asgi:application",
+            "--port",
+            str(porta),
+            "--log-level",
+            "warning",
+        ],
+        cwd=RAIZ,
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            with socket.create_connection(("127.0.0.1", porta), timeout=0.1):
+                return processo
+        except OSError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("uvicorn não subiu")
+
+
+async def carga_http(url, clientes, por_cliente):
+    async def cliente(n, http):
+        for i in range(por_cliente):
+            r = await http.post(
+                f"{url}/api/registrar-leitura/",
+                json={"tag_rfid": _tag(n, i), "operador": "BENCH_HTTP"},
+            )
+            r.raise_for_status()
+
+    async with httpx.AsyncClient(timeout=30) as http:
+        await asyncio.gather(*(cliente(n, http) for n in range(clientes)))
+
+
+async def carga_ws(url, clientes, por_cliente):
+    ws_url = url.replace("http", "ws", 1) + "/ws/leituras/?operador=BENCH_WS"
+
+    async def cliente(n):
+        async with websockets.connect(ws_url) as ws:
+            for i in range(por_cliente):
+                await ws.send(json.dumps({"n": i, "t": _tag(n, i)}))
+            recebidos = 0
+            while recebidos < por_cliente:
+                acks = json.loads(await ws.recv())["acks"]
+                erros = [a for a in acks if a["status"] == "erro"]
+                if erros:
+                    raise RuntimeError(f"Falha no ack: {erros[0]}")
+                recebidos += len(acks)
+
+    await asyncio.gather(*(cliente(n) for n in range(clientes)))
+
+
+def medir(nome, corrotina, total):
+    inicio = time.perf_counter()
+    asyncio.run(corrotina)
+    duracao = time.perf_counter() - inicio
+    print(
+        f"{nome:<10} {total:>7} leituras  {duracao:7.2f}s  {total / duracao:9.1f} leituras/s"
+    )
+    return total / duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=2000, help="total por caminho")
+    parser.add_argument("--clientes", type=int, default=1, help="conexões simultâneas")
+    parser.add_argument(
+        "--url", help="servidor já rodando (ex.: http://127.0.0.1:8000)"
+    )
+    args = parser.parse_args()
+
+    por_cliente = max(1, args.leituras // args.clientes)
+    total = por_cliente * args.clientes
+
+    processo = None
+    url = args.url
+    if not url:
+        porta = _porta_livre()
+        processo = subir_servidor(porta)
+        url = f"http://127.0.0.1:{porta}"
+
+    try:
+        http = medir("HTTP", carga_http(url, args.clientes, por_cliente), total)
+        ws = medir("WebSocket", carga_ws(url, args.clientes, por_cliente), total)
+        print(f"WebSocket / HTTP: {ws / http:.1f}x")
+    finally:
+        if processo:
+            processo.terminate()
+            processo.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: JSON x formato binário (rfid/utils/protocolo_binario.py).
+
+Mede, para o mesmo lote de leituras, os bytes trafegados (cru e gzip) e o
+tempo de parse no servidor até a lista de ItemLeitura.
+
+Uso:
+    python scripts/benchmark_protocolo_binario.py --leituras 500 --repeticoes 200
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from rfid.utils import protocolo_binario  # noqa: E402
+from rfid.utils.ingestao import item_de_dict  # noqa: E402
+
+
+def gerar_leituras(quantidade):
+    # precisão de ms, como no formato binário
+    inicio = timezone.now().replace(microsecond=0) - timedelta(hours=6)
+    leituras = []
+    for seq in range(quantidade):
+        inicio += timedelta(milliseconds=random.randint(50, 5000))
+        leituras.append(
+            {
+                "tag_rfid": "E200" + "".join(random.choices("0123456789ABCDEF", k=20)),
+                "data_hora": inicio,
+                "antena": random.randint(1, 4),
+                "rssi": random.randint(-80, -30),
+                "seq": seq,
+            }
+        )
+    return leituras
+
+
+def corpo_json(leituras):
+    # o que o app Android envia hoje: chaves repetidas em toda leitura
+    return json.dumps(
+        [
+            {
+                **leitura,
+                "data_hora": leitura["data_hora"].isoformat(),
+                "operador": "PDA_C72",
+                "observacao": "Leitura Mobile",
+                "leitor_id": "pda-07",
+            }
+            for leitura in leituras
+        ]
+    ).encode()
+
+
+def parse_json(corpo):
+    return [item_de_dict(bruto) for bruto in json.loads(corpo)]
+
+
+def cronometrar(funcao, corpo, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(corpo)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leituras", type=int, default=500)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    leituras = gerar_leituras(args.leituras)
+    corpos = {
+        "JSON": corpo_json(leituras),
+        "binário": protocolo_binario.codificar_lote(
+            leituras,
+            operador="PDA_C72",
+            observacao="Leitura Mobile",
+            leitor_id="pda-07",
+        ),
+    }
+    parsers = {"JSON": parse_json, "binário": protocolo_binario.decodificar_lote}
+
+    assert parse_json(corpos["JSON"]) == parsers["binário"](corpos["binário"])
+
+    print(f"{args.leituras} leituras por lote\n")
+    print(
+        f"{'formato':<9} {'bytes':>9} {'gzip':>9} {'B/leitura':>10} {'parse (ms)':>11}"
+    )
+    for nome, corpo in corpos.items():
+        tempo = cronometrar(parsers[nome], corpo, args.repeticoes)
+        print(
+            f"{nome:<9} {len(corpo):>9} {len(gzip.compress(corpo)):>9} "
+            f"{len(corpo) / args.leituras:>10.1f} {tempo * 1000:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()